@@ -0,0 +1,114 @@
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Query, Session
+
+from app.api.base_crud import CRUDBase
+
+from . import models, schemas
+
+# Position of an event in the feed: (txid, id)
+Position = Tuple[int, int]
+
+
+class CRUDApplicationEvent(
+    CRUDBase[
+        models.ApplicationEvent,
+        schemas.ApplicationEventCreate,
+        schemas.ApplicationEventCreate,
+    ]
+):
+    def record(
+        self,
+        db: Session,
+        application_id: int,
+        popup_city_id: int,
+        event_type: schemas.ApplicationEventType,
+        status: Optional[str] = None,
+    ) -> None:
+        """Add an event to the session, committed along with the change it describes"""
+        db.add(
+            self.model(
+                application_id=application_id,
+                popup_city_id=popup_city_id,
+                event_type=event_type.value,
+                status=status,
+            )
+        )
+
+    def _settled(self, db: Session, query: Query) -> Query:
+        """
+        Keep the events whose transaction has ended.
+
+        Ids are assigned on insert but become visible on commit, so a slow
+        transaction can still commit a smaller id. Transactions older than the
+        snapshot xmin have all ended, and any later one has a greater txid, so
+        the feed is read in (txid, id) order up to there. SQLite runs one writer
+        at a time, so everything it shows is settled.
+        """
+        if db.get_bind().dialect.name != 'postgresql':
+            return query
+        xmin = db.execute(
+            text('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+        ).scalar()
+        return query.filter(self.model.txid < xmin)
+
+    def get_offset(self, db: Session, consumer: str) -> Optional[Position]:
+        offset = db.get(models.ApplicationEventOffset, consumer)
+        return (offset.last_txid, offset.last_event_id) if offset else None
+
+    def set_offset(self, db: Session, consumer: str, position: Position) -> None:
+        offset = db.get(models.ApplicationEventOffset, consumer)
+        if offset is None:
+            offset = models.ApplicationEventOffset(consumer=consumer)
+            db.add(offset)
+        offset.last_txid, offset.last_event_id = position
+        db.commit()
+
+    def get_last_position(self, db: Session) -> Position:
+        """Position of the last settled event, to follow the feed from there"""
+        query = db.query(self.model.txid, self.model.id)
+        last = (
+            self._settled(db, query)
+            .order_by(self.model.txid.desc(), self.model.id.desc())
+            .first()
+        )
+        return tuple(last) if last else (0, 0)
+
+    def consume(
+        self,
+        db: Session,
+        consumer: str,
+        event_types: Optional[Sequence[schemas.ApplicationEventType]] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[List[models.ApplicationEvent]]:
+        """
+        Yield batches of the events written since the consumer's last run.
+
+        Events are read in (txid, id) order, so none is skipped by a transaction
+        that commits late. The consumer's offset moves past a batch once it asks
+        for the next one, so a batch that fails to process is delivered again on
+        the next run.
+        """
+        position = self.get_offset(db, consumer) or (0, 0)
+        query = self._settled(db, db.query(self.model))
+        if event_types:
+            query = query.filter(
+                self.model.event_type.in_([t.value for t in event_types])
+            )
+        while True:
+            events = (
+                query.filter(tuple_(self.model.txid, self.model.id) > position)
+                .order_by(self.model.txid, self.model.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not events:
+                return
+
+            yield events
+            position = (events[-1].txid, events[-1].id)
+            self.set_offset(db, consumer, position)
+
+
+application_event = CRUDApplicationEvent(models.ApplicationEvent)
@@ -0,0 +1,126 @@
+from sqlalchemy import DDL, BigInteger, Column, DateTime, Index, Integer, String, event
+
+from app.api.applications.models import Application
+from app.core.database import Base
+from app.core.utils import current_time
+
+
+class ApplicationEvent(Base):
+    """
+    Append-only feed of application changes, ordered by id.
+
+    Creations, updates and status changes are written by triggers on the
+    applications table, so they include the changes NocoDB makes directly;
+    payment approvals and attendee changes are recorded by the API.
+    """
+
+    __tablename__ = 'application_events'
+
+    id = Column(
+        BigInteger().with_variant(Integer, 'sqlite'),
+        primary_key=True,
+        autoincrement=True,
+    )
+    application_id = Column(Integer, nullable=False)
+    popup_city_id = Column(Integer, nullable=False)
+    event_type = Column(String, nullable=False)
+    # Effective status of the application when the event was written
+    status = Column(String)
+    # Id of the writing transaction on Postgres (see `crud.consume`)
+    txid = Column(BigInteger, nullable=False, server_default='0')
+    created_at = Column(DateTime, nullable=False, default=current_time)
+
+    __table_args__ = (
+        Index('ix_application_events_application_id', application_id),
+        Index('ix_application_events_txid', txid, id),
+    )
+
+
+class ApplicationEventOffset(Base):
+    """Last event processed by each consumer of the feed"""
+
+    __tablename__ = 'application_event_offsets'
+
+    consumer = Column(String, primary_key=True)
+    last_txid = Column(BigInteger, nullable=False, default=0, server_default='0')
+    last_event_id = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, default=current_time, onupdate=current_time)
+
+
+ApplicationEvent.__table__.add_is_dependent_on(Application.__table__)
+
+_POSTGRES_EVENTS_TRIGGER = (
+    """
+CREATE OR REPLACE FUNCTION record_application_events() RETURNS trigger AS $$
+DECLARE
+    kind VARCHAR := 'created';
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        kind := 'updated';
+        IF OLD.effective_status IS DISTINCT FROM NEW.effective_status THEN
+            kind := 'status_changed';
+        END IF;
+    END IF;
+    INSERT INTO application_events
+        (application_id, popup_city_id, event_type, status, created_at)
+    VALUES (
+        NEW.id, NEW.popup_city_id, kind, NEW.effective_status,
+        now() AT TIME ZONE 'utc'
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""",
+    """
+CREATE TRIGGER application_events
+AFTER INSERT OR UPDATE ON applications
+FOR EACH ROW EXECUTE FUNCTION record_application_events()
+""",
+)
+
+_SQLITE_EVENTS_TRIGGER = (
+    """
+CREATE TRIGGER application_events_insert AFTER INSERT ON applications
+BEGIN
+    INSERT INTO application_events
+        (application_id, popup_city_id, event_type, status, created_at)
+    VALUES (
+        NEW.id, NEW.popup_city_id, 'created', NEW.effective_status,
+        CURRENT_TIMESTAMP
+    );
+END
+""",
+    """
+CREATE TRIGGER application_events_update AFTER UPDATE ON applications
+BEGIN
+    INSERT INTO application_events
+        (application_id, popup_city_id, event_type, status, created_at)
+    VALUES (
+        NEW.id,
+        NEW.popup_city_id,
+        CASE WHEN OLD.effective_status IS NOT NEW.effective_status
+            THEN 'status_changed' ELSE 'updated' END,
+        NEW.effective_status,
+        CURRENT_TIMESTAMP
+    );
+END
+""",
+)
+
+_POSTGRES_TXID_DEFAULT = """
+ALTER TABLE application_events
+ALTER COLUMN txid SET DEFAULT pg_current_xact_id()::text::bigint
+"""
+
+for statement in (_POSTGRES_TXID_DEFAULT, *_POSTGRES_EVENTS_TRIGGER):
+    event.listen(
+        ApplicationEvent.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='postgresql'),
+    )
+for statement in _SQLITE_EVENTS_TRIGGER:
+    event.listen(
+        ApplicationEvent.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='sqlite'),
+    )
@@ -0,0 +1,19 @@
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ApplicationEventType(str, Enum):
+    CREATED = 'created'
+    UPDATED = 'updated'
+    STATUS_CHANGED = 'status_changed'
+    PAYMENT_APPROVED = 'payment_approved'
+    ATTENDEE_CHANGED = 'attendee_changed'
+
+
+class ApplicationEventCreate(BaseModel):
+    application_id: int
+    popup_city_id: int
+    event_type: ApplicationEventType
+    status: Optional[str] = None
@@ -1,10 +1,25 @@
-from typing import List, Optional, Tuple, Union
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 from fastapi import HTTPException, status
-from sqlalchemy import case, desc, exists
+from sqlalchemy import (
+    ColumnElement,
+    and_,
+    case,
+    desc,
+    exists,
+    func,
+    or_,
+    select,
+    true,
+    update,
+)
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy.orm import Session, noload, selectinload
 
+from app.api.application_events.crud import application_event as event_crud
+from app.api.application_events.schemas import ApplicationEventType
 from app.api.applications import models, schemas
 from app.api.attendees import schemas as attendees_schemas
 from app.api.attendees.crud import attendee as attendees_crud
@@ -13,12 +28,30 @@ from app.api.base_crud import CRUDBase
 from app.api.citizens.models import Citizen as CitizenModel
 from app.api.email_logs.crud import email_log
 from app.api.email_logs.schemas import EmailEvent
+from app.api.groups.models import GroupLeader
 from app.api.organizations.crud import organization as organization_crud
 from app.api.popup_city.models import PopUpCity
+from app.api.products.crud import product as product_crud
+from app.api.products.models import Product
+from app.api.products.schemas import Product as ProductSchema
+from app.core.cache import TTLCache
 from app.core.logger import logger
 from app.core.security import SYSTEM_TOKEN, TokenData
 from app.core.utils import current_time
 
+DIRECTORY_SEARCH_FIELDS = (
+    'first_name',
+    'last_name',
+    'organization',
+    'role',
+    'telegram',
+)
+
+# Facet counts are only refreshed when their TTL expires: the directory is mostly
+# rebuilt by another process, and in-process invalidation before the commit
+# could let a concurrent request cache the old counts again
+_directory_facets_cache = TTLCache(expiry=timedelta(minutes=1))
+
 
 def _requested_a_discount(
     application: Union[models.Application, schemas.Application],
@@ -63,6 +96,65 @@ def calculate_status(
     return reviews_status, requested_a_discount
 
 
+def calculated_status_expressions(
+    requires_approval: bool,
+) -> Tuple[ColumnElement[str], ColumnElement[bool]]:
+    """
+    SQL counterpart of `calculate_status` for the applications of a popup city.
+
+    The reviews outcome is computed by NocoDB, so a decided status already stored
+    (accepted, rejected or withdrawn) stands in for it.
+    Returns the (status, requested_discount) expressions.
+    """
+    Application = models.Application
+    raw_status = Application._status
+    if requires_approval:
+        requested_a_discount = Application.scholarship_request
+    else:
+        requested_a_discount = or_(
+            Application.is_renter, Application.scholarship_request
+        )
+
+    missing_discount = and_(
+        requested_a_discount,
+        or_(
+            Application._discount_assigned.is_(None),
+            Application._discount_assigned == '',
+        ),
+    )
+    pending = case(
+        (
+            Application.submitted_at.isnot(None),
+            schemas.ApplicationStatus.IN_REVIEW.value,
+        ),
+        else_=schemas.ApplicationStatus.DRAFT.value,
+    )
+
+    whens = [
+        (
+            raw_status.in_(
+                [
+                    schemas.ApplicationStatus.REJECTED.value,
+                    schemas.ApplicationStatus.WITHDRAWN.value,
+                ]
+            ),
+            raw_status,
+        )
+    ]
+    if not requires_approval:
+        whens.append((~requested_a_discount, schemas.ApplicationStatus.ACCEPTED.value))
+    whens.append(
+        (
+            or_(
+                raw_status.is_distinct_from(schemas.ApplicationStatus.ACCEPTED.value),
+                missing_discount,
+            ),
+            pending,
+        )
+    )
+    return case(*whens, else_=raw_status), requested_a_discount
+
+
 def _send_application_received_mail(application: models.Application):
     email_log.send_mail(
         receiver_mail=application.email,
@@ -73,9 +165,75 @@ def _send_application_received_mail(application: models.Application):
     )
 
 
+def _response_profile():
+    """Only what schemas.Application serializes."""
+    return (
+        selectinload(models.Application.attendees).selectinload(Attendee.products),
+        selectinload(models.Application.attendees).selectinload(
+            Attendee.attendee_products
+        ),
+        noload(models.Application.citizen),
+        noload(models.Application.popup_city),
+        noload(models.Application.organization_rel),
+        noload(models.Application.group),
+        noload(models.Application.payments),
+    )
+
+
+def _payment_profile():
+    """Everything payments_utils touches to price a payment."""
+    return (
+        selectinload(models.Application.popup_city),
+        selectinload(models.Application.group),
+        selectinload(models.Application.attendees).selectinload(Attendee.products),
+        selectinload(models.Application.attendees)
+        .selectinload(Attendee.attendee_products)
+        .selectinload(AttendeeProduct.product),
+    )
+
+
 class CRUDApplication(
     CRUDBase[models.Application, schemas.ApplicationCreate, schemas.ApplicationCreate]
 ):
+    load_profiles = {
+        'detail': _response_profile,
+        'payment': _payment_profile,
+    }
+    nested_fields = ('attendees',)
+    # Response fields backed by a differently named column
+    projection_aliases = {
+        'info_not_shared': '_info_not_shared',
+        'discount_assigned': '_discount_assigned',
+        'status': '_effective_status',
+    }
+
+    def _projection_column(self, field: str) -> ColumnElement:
+        return super()._projection_column(self.projection_aliases.get(field, field))
+
+    def _complete_projection(
+        self, db: Session, items: List[Dict[str, Any]], fields: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        for item in items:
+            # Rows skip the response schema, so apply its validators here
+            if item.get('email') is not None:
+                item['email'] = schemas.Application.clean_email(item['email'])
+            if 'info_not_shared' in item:
+                values = (item['info_not_shared'] or '').split(',')
+                values = [v.strip() for v in values if v.strip()]
+                item['info_not_shared'] = values if item['info_not_shared'] else None
+            if 'discount_assigned' in item:
+                value = item['discount_assigned']
+                item['discount_assigned'] = int(value) if value else None
+
+        if 'attendees' in fields:
+            attendee_fields = list(attendees_schemas.Attendee.model_fields)
+            attendees = attendees_crud.find_by_applications(
+                db, [item['id'] for item in items], attendee_fields
+            )
+            for item in items:
+                item['attendees'] = attendees.get(item['id'], [])
+        return items
+
     def update_citizen_profile(self, db: Session, application: models.Application):
         citizen = application.citizen
 
@@ -106,6 +264,15 @@ class CRUDApplication(
         is_leader = db_obj.group.is_leader(user_id) if db_obj.group else False
         return user == SYSTEM_TOKEN or db_obj.citizen_id == user_id or is_leader
 
+    def _permission_filter(self, user: TokenData) -> ColumnElement[bool]:
+        if user == SYSTEM_TOKEN:
+            return true()
+        is_leader = exists().where(
+            GroupLeader.group_id == models.Application.group_id,
+            GroupLeader.citizen_id == user.citizen_id,
+        )
+        return or_(models.Application.citizen_id == user.citizen_id, is_leader)
+
     def create(
         self,
         db: Session,
@@ -204,12 +371,126 @@ class CRUDApplication(
             application.requested_discount = requested_discount
 
         self.update_citizen_profile(db, application)
+        self.refresh_attendees_directory(db, [application.id])
 
         db.add(application)
         db.commit()
         db.refresh(application)
         return application
 
+    def recompute_statuses(
+        self, db: Session, popup_city: PopUpCity, dry_run: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Re-evaluate `calculate_status` for all the applications of a popup city.
+
+        Drafts and group applications are left alone, as on create. Returns the
+        changed rows with their previous and new values; unless `dry_run`, they
+        are updated in a single statement and committed.
+        """
+        Application = self.model
+        new_status, new_requested_discount = calculated_status_expressions(
+            popup_city.requires_approval
+        )
+        condition = and_(
+            Application.popup_city_id == popup_city.id,
+            Application.group_id.is_(None),
+            Application._status.isnot(None),
+            Application._status != schemas.ApplicationStatus.DRAFT.value,
+            or_(
+                new_status.is_distinct_from(Application._status),
+                new_requested_discount.is_distinct_from(Application.requested_discount),
+            ),
+        )
+        rows = db.execute(
+            select(
+                Application.id,
+                Application.email,
+                Application._status.label('status'),
+                new_status.label('new_status'),
+                Application.requested_discount,
+                new_requested_discount.label('new_requested_discount'),
+                Application.accepted_at,
+            ).where(condition)
+        ).mappings()
+        changes = [dict(row) for row in rows]
+        if not changes or dry_run:
+            return changes
+
+        now = current_time()
+        db.execute(
+            update(Application)
+            .where(condition)
+            .values(
+                {
+                    Application._status: new_status,
+                    Application.requested_discount: new_requested_discount,
+                    Application.accepted_at: case(
+                        (
+                            and_(
+                                new_status == schemas.ApplicationStatus.ACCEPTED.value,
+                                Application.accepted_at.is_(None),
+                            ),
+                            now,
+                        ),
+                        else_=Application.accepted_at,
+                    ),
+                    Application.updated_at: now,
+                }
+            ),
+            execution_options={'synchronize_session': 'fetch'},
+        )
+        email_log.cancel_scheduled_emails(
+            db,
+            entity_type='application',
+            entity_id=[change['id'] for change in changes],
+        )
+        for change in changes:
+            if (
+                change['new_status'] == schemas.ApplicationStatus.ACCEPTED.value
+                and change['accepted_at'] is None
+            ):
+                change['accepted_at'] = now
+        db.commit()
+        return changes
+
+    def get_status_counts(self, db: Session, popup_city_id: int) -> Dict[str, int]:
+        """Number of applications of a popup city per effective status"""
+        Count = models.ApplicationStatusCount
+        rows = db.query(Count.status, Count.count).filter(
+            Count.popup_city_id == popup_city_id,
+            Count.count > 0,
+        )
+        return dict(rows.all())
+
+    def get_review_queue(
+        self,
+        db: Session,
+        popup_city_id: int,
+        cursor: str = '',
+        limit: int = 50,
+        status: schemas.ApplicationStatus = schemas.ApplicationStatus.IN_REVIEW,
+        requested_discount: Optional[bool] = None,
+        scholarship_request: Optional[bool] = None,
+        projection: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Page through the applications to review, oldest submission first."""
+        filters = schemas.ApplicationFilter(
+            popup_city_id=popup_city_id,
+            status=status,
+            requested_discount=requested_discount,
+            scholarship_request=scholarship_request,
+        )
+        return self.find_page(
+            db,
+            cursor=cursor,
+            limit=limit,
+            filters=filters,
+            sort_by='submitted_at',
+            sort_order='asc',
+            projection=projection or list(schemas.Application.model_fields),
+        )
+
     def find(
         self,
         db: Session,
@@ -217,11 +498,27 @@ class CRUDApplication(
         limit: int = 100,
         filters: Optional[schemas.ApplicationFilter] = None,
         user: Optional[TokenData] = None,
-    ) -> List[models.Application]:
+        sort_by: str = 'created_at',
+        sort_order: str = 'desc',
+        profile: Optional[str] = None,
+        projection: Optional[Sequence[str]] = None,
+        cursor: Optional[str] = None,
+    ) -> Union[List[models.Application], List[Dict[str, Any]]]:
         if user:
             filters = filters or schemas.ApplicationFilter()
             filters.citizen_id = user.citizen_id
-        return super().find(db, skip, limit, filters, user)
+        return super().find(
+            db,
+            skip,
+            limit,
+            filters,
+            user,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            profile=profile,
+            projection=projection,
+            cursor=cursor,
+        )
 
     def create_attendee(
         self,
@@ -249,6 +546,7 @@ class CRUDApplication(
         attendee = attendees_schemas.InternalAttendeeCreate(
             **attendee.model_dump(), application_id=application_id
         )
+        self._record_attendee_change(db, application)
         attendee = attendees_crud.create(db, attendee, user)
         return application
 
@@ -269,6 +567,7 @@ class CRUDApplication(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f'Attendee {attendee.email} already exists',
             )
+        self._record_attendee_change(db, application)
         _ = attendees_crud.update(db, attendee_id, attendee, user)
         return application
 
@@ -291,9 +590,21 @@ class CRUDApplication(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail='Cannot delete main attendee',
             )
+        self._record_attendee_change(db, application)
         attendees_crud.delete(db, attendee_id, user)
         return application
 
+    def _record_attendee_change(
+        self, db: Session, application: models.Application
+    ) -> None:
+        event_crud.record(
+            db,
+            application_id=application.id,
+            popup_city_id=application.popup_city_id,
+            event_type=ApplicationEventType.ATTENDEE_CHANGED,
+            status=application.status,
+        )
+
     def get_attendees_directory(
         self,
         db: Session,
@@ -301,82 +612,248 @@ class CRUDApplication(
         skip: int,
         limit: int,
         user: TokenData,
+        q: Optional[str] = None,
+        product_ids: Optional[List[int]] = None,
+        brings_kids: Optional[bool] = None,
     ) -> Tuple[List[dict], int]:
-        # Create the ordering expressions
-        info_not_shared_order = case(
-            (models.Application._info_not_shared.is_(None), 0),
-            (models.Application._info_not_shared.like('%brings_kids%'), 1),
-            else_=0,
-        ).label('info_not_shared_order')
-
-        # Handle nulls explicitly in the brings_kids ordering
-        brings_kids_order = case(
-            (models.Application.brings_kids.is_(None), 0),
-            (models.Application.brings_kids.is_(True), 2),
-            (models.Application.brings_kids.is_(False), 1),
-        ).label('brings_kids_order')
-
-        # Query applications with main attendees that have products
-        base_query = (
-            db.query(
-                models.Application,
-                info_not_shared_order,
-                brings_kids_order,
+        entry = models.AttendeeDirectoryEntry
+        query = db.query(entry).filter(entry.popup_city_id == popup_city_id)
+
+        # Hidden values are left out of search_text and of the facet columns,
+        # so filtering cannot reveal them
+        if q and q.strip():
+            query = query.filter(
+                entry.search_text.contains(q.strip().lower(), autoescape=True)
             )
-            .join(models.Application.attendees.and_(Attendee.category == 'main'))
-            .options(contains_eager(models.Application.attendees.of_type(Attendee)))
-            .filter(
-                models.Application.popup_city_id == popup_city_id,
-                # Check if the attendee has any products using EXISTS
-                exists()
-                .where(AttendeeProduct.attendee_id == Attendee.id)
-                .correlate(Attendee),
+        if product_ids:
+            query = query.filter(
+                exists().where(
+                    models.AttendeeDirectoryProduct.application_id
+                    == entry.application_id,
+                    models.AttendeeDirectoryProduct.product_id.in_(product_ids),
+                )
             )
-            .order_by(
-                info_not_shared_order,
-                desc(brings_kids_order),
-                models.Application.created_at,
-                models.Application.id,
+        if brings_kids is not None:
+            query = query.filter(entry.brings_kids.is_(brings_kids))
+
+        total = query.count()
+        entries = (
+            query.order_by(
+                entry.info_not_shared_order,
+                desc(entry.brings_kids_order),
+                entry.application_created_at,
+                entry.application_id,
             )
+            .offset(skip)
+            .limit(limit)
+            .all()
         )
 
-        total = base_query.count()
-        query_results = base_query.offset(skip).limit(limit).all()
-
         attendees = []
-        for result in query_results:
-            # The Application object is the first element
-            application: models.Application = result[0]
-            main_attendee = application.attendees[0]
-
-            check_in, check_out = None, None
-            for p in main_attendee.products:
-                if not check_in or (p.start_date and p.start_date < check_in):
-                    check_in = p.start_date
-                if not check_out or (p.end_date and p.end_date > check_out):
-                    check_out = p.end_date
-
+        for entry in entries:
             a = {
-                'first_name': application.first_name,
-                'last_name': application.last_name,
-                'email': application.email,
-                'telegram': application.telegram,
-                'brings_kids': application.brings_kids,
-                'role': application.role,
-                'organization': application.organization,
-                'participation': main_attendee.products,
-                'check_in': check_in,
-                'check_out': check_out,
+                'first_name': entry.first_name,
+                'last_name': entry.last_name,
+                'email': entry.email,
+                'telegram': entry.telegram,
+                'brings_kids': entry.brings_kids,
+                'role': entry.role,
+                'organization': entry.organization,
+                'participation': entry.participation,
+                'check_in': entry.check_in,
+                'check_out': entry.check_out,
             }
 
-            if application.info_not_shared:
-                for f in application.info_not_shared:
+            if entry.hidden_fields:
+                for f in entry.hidden_fields.split(','):
                     a[f] = schemas.HIDDEN_VALUE
 
             attendees.append(a)
 
         return attendees, total
 
+    def get_attendees_directory_facets(
+        self, db: Session, popup_city_id: int
+    ) -> schemas.AttendeesDirectoryFacets:
+        facets = _directory_facets_cache.get(popup_city_id)
+        if facets is not None:
+            return facets
+
+        entry = models.AttendeeDirectoryEntry
+        total, brings_kids = (
+            db.query(
+                func.count(entry.application_id),
+                func.count(entry.application_id).filter(entry.brings_kids.is_(True)),
+            )
+            .filter(entry.popup_city_id == popup_city_id)
+            .one()
+        )
+        directory_product = models.AttendeeDirectoryProduct
+        products = (
+            db.query(
+                directory_product.product_id,
+                Product.name,
+                func.count(directory_product.application_id).label('count'),
+            )
+            .join(Product, Product.id == directory_product.product_id)
+            .filter(directory_product.popup_city_id == popup_city_id)
+            .group_by(directory_product.product_id, Product.name)
+            .order_by(directory_product.product_id)
+            .all()
+        )
+        facets = schemas.AttendeesDirectoryFacets(
+            total=total,
+            brings_kids=brings_kids,
+            products=[
+                schemas.DirectoryProductFacet(
+                    product_id=p.product_id, name=p.name, count=p.count
+                )
+                for p in products
+            ],
+        )
+        _directory_facets_cache.set(popup_city_id, facets)
+        return facets
+
+    def refresh_attendees_directory(
+        self, db: Session, application_ids: Iterable[int]
+    ) -> None:
+        """Recompute the directory rows of the given applications, without committing."""
+        application_ids = set(application_ids)
+        if not application_ids:
+            return
+
+        db.flush()
+        db.query(models.AttendeeDirectoryProduct).filter(
+            models.AttendeeDirectoryProduct.application_id.in_(application_ids)
+        ).delete(synchronize_session=False)
+        db.query(models.AttendeeDirectoryEntry).filter(
+            models.AttendeeDirectoryEntry.application_id.in_(application_ids)
+        ).delete(synchronize_session=False)
+        entries = self._build_directory_entries(
+            db, models.Application.id.in_(application_ids)
+        )
+        db.add_all(entries)
+
+    def rebuild_attendees_directory(self, db: Session, popup_city_id: int) -> int:
+        """Recompute the whole directory of a popup city."""
+        db.query(models.AttendeeDirectoryProduct).filter(
+            models.AttendeeDirectoryProduct.popup_city_id == popup_city_id
+        ).delete(synchronize_session=False)
+        db.query(models.AttendeeDirectoryEntry).filter(
+            models.AttendeeDirectoryEntry.popup_city_id == popup_city_id
+        ).delete(synchronize_session=False)
+        entries = self._build_directory_entries(
+            db, models.Application.popup_city_id == popup_city_id
+        )
+        db.add_all(entries)
+        db.commit()
+        return len(entries)
+
+    def _build_directory_entries(
+        self, db: Session, condition: ColumnElement[bool]
+    ) -> List[models.AttendeeDirectoryEntry]:
+        """Listed applications are those whose main attendee has products."""
+        application = models.Application
+        rows = (
+            db.query(
+                application.id,
+                application.popup_city_id,
+                application.first_name,
+                application.last_name,
+                application.email,
+                application.telegram,
+                application.brings_kids,
+                application.role,
+                application.organization,
+                application._info_not_shared.label('info_not_shared'),
+                application.created_at,
+                Attendee.id.label('main_attendee_id'),
+                Attendee.stay_start,
+                Attendee.stay_end,
+            )
+            .join(
+                Attendee,
+                and_(
+                    Attendee.application_id == application.id,
+                    Attendee.category == 'main',
+                ),
+            )
+            .filter(
+                condition,
+                exists().where(AttendeeProduct.attendee_id == Attendee.id),
+            )
+            .all()
+        )
+
+        product_fields = list(ProductSchema.model_fields)
+        product_rows = (
+            db.query(
+                AttendeeProduct.attendee_id.label('_attendee_id'),
+                *product_crud.projection_columns(product_fields),
+            )
+            .join(Product, Product.id == AttendeeProduct.product_id)
+            .filter(AttendeeProduct.attendee_id.in_([r.main_attendee_id for r in rows]))
+            .order_by(AttendeeProduct.attendee_id, Product.id)
+            .all()
+        )
+        products = defaultdict(list)
+        for product_row in product_rows:
+            product = dict(product_row._mapping)
+            products[product.pop('_attendee_id')].append(product)
+
+        brings_kids_order = {None: 0, True: 2, False: 1}
+        entries = []
+        for row in rows:
+            hidden = [
+                f.strip() for f in (row.info_not_shared or '').split(',') if f.strip()
+            ]
+
+            def masked(field: str, value: Any) -> Any:
+                return schemas.HIDDEN_VALUE if field in hidden else value
+
+            participation = [
+                ProductSchema(**p).model_dump(mode='json')
+                for p in products[row.main_attendee_id]
+            ]
+
+            entries.append(
+                models.AttendeeDirectoryEntry(
+                    application_id=row.id,
+                    popup_city_id=row.popup_city_id,
+                    main_attendee_id=row.main_attendee_id,
+                    info_not_shared_order=int(
+                        'brings_kids' in (row.info_not_shared or '')
+                    ),
+                    brings_kids_order=brings_kids_order[row.brings_kids],
+                    application_created_at=row.created_at,
+                    first_name=masked('first_name', row.first_name),
+                    last_name=masked('last_name', row.last_name),
+                    email=masked('email', row.email),
+                    telegram=masked('telegram', row.telegram),
+                    brings_kids=None if 'brings_kids' in hidden else row.brings_kids,
+                    role=masked('role', row.role),
+                    organization=masked('organization', row.organization),
+                    participation=[] if 'participation' in hidden else participation,
+                    check_in=None if 'check_in' in hidden else row.stay_start,
+                    check_out=None if 'check_out' in hidden else row.stay_end,
+                    hidden_fields=','.join(hidden) or None,
+                    search_text=' '.join(
+                        value.lower()
+                        for field in DIRECTORY_SEARCH_FIELDS
+                        if (value := getattr(row, field)) and field not in hidden
+                    ),
+                    products=[]
+                    if 'participation' in hidden
+                    else [
+                        models.AttendeeDirectoryProduct(
+                            product_id=p['id'], popup_city_id=row.popup_city_id
+                        )
+                        for p in participation
+                    ],
+                )
+            )
+        return entries
+
     def delete(self, db: Session, id: int, user: TokenData) -> models.Application:
         """Delete a record."""
         try:
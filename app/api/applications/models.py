@@ -1,16 +1,22 @@
 from typing import TYPE_CHECKING, List, Optional, Union
 
 from sqlalchemy import (
+    DDL,
     Boolean,
     Column,
+    Computed,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
+    event,
 )
-from sqlalchemy.orm import Mapped, relationship, synonym
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Mapped, relationship
+from sqlalchemy.types import JSON
 
 from app.api.applications.schemas import ApplicationStatus
 from app.core.database import Base
@@ -25,6 +31,34 @@ if TYPE_CHECKING:
     from app.api.products.models import Product
 
 
+def effective_status(
+    status: Optional[str],
+    group_id: Optional[int],
+    requested_discount: Optional[bool],
+    discount_assigned: Optional[str],
+) -> Optional[str]:
+    """Compute the effective status from the raw column values"""
+    if not status or status != ApplicationStatus.ACCEPTED.value:
+        return status
+
+    if group_id is not None:
+        return ApplicationStatus.ACCEPTED.value
+
+    if requested_discount and not discount_assigned:
+        return ApplicationStatus.IN_REVIEW.value
+
+    return ApplicationStatus.ACCEPTED.value
+
+
+# SQL counterpart of effective_status, stored by the database on every write
+EFFECTIVE_STATUS_SQL = (
+    f"CASE WHEN status = '{ApplicationStatus.ACCEPTED.value}' "
+    'AND group_id IS NULL AND requested_discount '
+    "AND (discount_assigned IS NULL OR discount_assigned = '') "
+    f"THEN '{ApplicationStatus.IN_REVIEW.value}' ELSE status END"
+)
+
+
 class Application(Base):
     __tablename__ = 'applications'
 
@@ -102,6 +136,12 @@ class Application(Base):
     requested_discount = Column(Boolean, nullable=False, default=False)
     _status = Column('status', String)
     _discount_assigned = Column('discount_assigned', String)
+    _effective_status = Column(
+        'effective_status',
+        String,
+        Computed(EFFECTIVE_STATUS_SQL, persisted=True),
+        index=True,
+    )
 
     payments: Mapped[List['Payment']] = relationship(
         'Payment', back_populates='application'
@@ -111,16 +151,12 @@ class Application(Base):
     )
 
     citizen_id = Column(Integer, ForeignKey('humans.id'), nullable=False)
-    citizen: Mapped['Citizen'] = relationship(
-        'Citizen', back_populates='applications', lazy='joined'
-    )
+    citizen: Mapped['Citizen'] = relationship('Citizen', back_populates='applications')
     popup_city_id = Column(Integer, ForeignKey('popups.id'), nullable=False)
-    popup_city: Mapped['PopUpCity'] = relationship('PopUpCity', lazy='joined')
+    popup_city: Mapped['PopUpCity'] = relationship('PopUpCity')
 
     organization_id = Column(Integer, ForeignKey('organizations.id'), nullable=True)
-    organization_rel: Mapped[Optional['Organization']] = relationship(
-        'Organization', lazy='joined'
-    )
+    organization_rel: Mapped[Optional['Organization']] = relationship('Organization')
 
     group_id = Column(Integer, ForeignKey('groups.id'), nullable=True)
     group = None
@@ -136,6 +172,13 @@ class Application(Base):
 
     __table_args__ = (
         UniqueConstraint('citizen_id', 'popup_city_id', name='uix_citizen_popup'),
+        Index(
+            'ix_applications_review_queue',
+            'popup_city_id',
+            'effective_status',
+            'submitted_at',
+            'id',
+        ),
     )
 
     @property
@@ -160,22 +203,21 @@ class Application(Base):
 
     def get_status(self) -> Optional[str]:
         """Compute the effective status based on validation rules"""
-        if not self._status or self._status != ApplicationStatus.ACCEPTED.value:
-            return self._status
-
-        if self.group_id is not None:
-            return ApplicationStatus.ACCEPTED.value
-
-        if self.requested_discount and self.discount_assigned is None:
-            return ApplicationStatus.IN_REVIEW.value
-
-        return ApplicationStatus.ACCEPTED.value
+        return effective_status(
+            self._status,
+            self.group_id,
+            self.requested_discount,
+            self._discount_assigned,
+        )
 
     def set_status(self, value: Optional[str]) -> None:
         """Set the raw status value"""
         self._status = value
 
-    status = synonym('_status', descriptor=property(get_status, set_status))
+    # Reads compute the effective status, SQL expressions use the stored column
+    status = hybrid_property(
+        get_status, set_status, expr=lambda cls: cls._effective_status
+    )
 
     def clean_reviews(self) -> None:
         self.timour_review = None
@@ -189,8 +231,201 @@ class Application(Base):
         return [product for attendee in self.attendees for product in attendee.products]
 
 
+class AttendeeDirectoryEntry(Base):
+    """
+    Precomputed row of the attendees directory, one per listed application.
+
+    Holds the ordering keys, the check-in/check-out bounds and the values
+    already masked according to `info_not_shared`, so the directory is read
+    with a single range scan on the popup index.
+    """
+
+    __tablename__ = 'attendees_directory'
+
+    application_id = Column(
+        Integer,
+        ForeignKey('applications.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    popup_city_id = Column(Integer, ForeignKey('popups.id'), nullable=False)
+    main_attendee_id = Column(Integer, nullable=False)
+
+    info_not_shared_order = Column(Integer, nullable=False)
+    brings_kids_order = Column(Integer, nullable=False)
+    application_created_at = Column(DateTime)
+
+    first_name = Column(String)
+    last_name = Column(String)
+    email = Column(String)
+    telegram = Column(String)
+    brings_kids = Column(Boolean)
+    role = Column(String)
+    organization = Column(String)
+    participation = Column(JSON)
+    check_in = Column(DateTime)
+    check_out = Column(DateTime)
+    hidden_fields = Column(String)
+    # Lowercased name, organization, role and telegram, without hidden values
+    search_text = Column(String, nullable=False, default='')
+
+    updated_at = Column(DateTime, default=current_time, onupdate=current_time)
+
+    products: Mapped[List['AttendeeDirectoryProduct']] = relationship(
+        'AttendeeDirectoryProduct', cascade='all, delete-orphan'
+    )
+
+    __table_args__ = (
+        Index(
+            'ix_attendees_directory_popup_order',
+            popup_city_id,
+            info_not_shared_order,
+            brings_kids_order.desc(),
+            application_created_at,
+            application_id,
+        ),
+        Index(
+            'ix_attendees_directory_search_text',
+            search_text,
+            postgresql_using='gin',
+            postgresql_ops={'search_text': 'gin_trgm_ops'},
+        ),
+    )
+
+
+class AttendeeDirectoryProduct(Base):
+    """Product facet of a directory entry, omitted when participation is hidden"""
+
+    __tablename__ = 'attendees_directory_products'
+
+    application_id = Column(
+        Integer,
+        ForeignKey('attendees_directory.application_id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    product_id = Column(Integer, ForeignKey('products.id'), primary_key=True)
+    popup_city_id = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index(
+            'ix_attendees_directory_products_popup_product',
+            popup_city_id,
+            product_id,
+        ),
+    )
+
+
+# The trigram index needs the extension, which init.sql only sets up on new databases
+event.listen(
+    AttendeeDirectoryEntry.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'),
+)
+
+
+class ApplicationStatusCount(Base):
+    """
+    Number of applications of a popup city per effective status.
+
+    Maintained by triggers on the applications table, so it also follows the
+    status changes NocoDB writes directly to the database.
+    """
+
+    __tablename__ = 'application_status_counts'
+
+    popup_city_id = Column(Integer, ForeignKey('popups.id'), primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+ApplicationStatusCount.__table__.add_is_dependent_on(Application.__table__)
+
+_SEED_STATUS_COUNTS = """
+INSERT INTO application_status_counts (popup_city_id, status, count)
+SELECT popup_city_id, effective_status, COUNT(*) FROM applications
+WHERE effective_status IS NOT NULL
+GROUP BY popup_city_id, effective_status
+"""
+
+_POSTGRES_STATUS_COUNTS_TRIGGER = (
+    """
+CREATE OR REPLACE FUNCTION count_application_statuses() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF OLD.effective_status IS NOT DISTINCT FROM NEW.effective_status
+            AND OLD.popup_city_id = NEW.popup_city_id THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE application_status_counts SET count = count - 1
+        WHERE popup_city_id = OLD.popup_city_id AND status = OLD.effective_status;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF NEW.effective_status IS NOT NULL THEN
+            INSERT INTO application_status_counts (popup_city_id, status, count)
+            VALUES (NEW.popup_city_id, NEW.effective_status, 1)
+            ON CONFLICT (popup_city_id, status)
+            DO UPDATE SET count = application_status_counts.count + 1;
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""",
+    """
+CREATE TRIGGER application_status_counts
+AFTER INSERT OR UPDATE OR DELETE ON applications
+FOR EACH ROW EXECUTE FUNCTION count_application_statuses()
+""",
+)
+
+_DECREMENT_OLD = """
+    UPDATE application_status_counts SET count = count - 1
+    WHERE popup_city_id = OLD.popup_city_id AND status = OLD.effective_status;"""
+_INCREMENT_NEW = """
+    INSERT INTO application_status_counts (popup_city_id, status, count)
+    SELECT NEW.popup_city_id, NEW.effective_status, 1
+    WHERE NEW.effective_status IS NOT NULL
+    ON CONFLICT (popup_city_id, status) DO UPDATE SET count = count + 1;"""
+
+_SQLITE_STATUS_COUNTS_TRIGGER = (
+    f"""
+CREATE TRIGGER application_status_counts_insert AFTER INSERT ON applications
+BEGIN{_INCREMENT_NEW}
+END
+""",
+    f"""
+CREATE TRIGGER application_status_counts_update AFTER UPDATE ON applications
+WHEN OLD.effective_status IS NOT NEW.effective_status
+    OR OLD.popup_city_id != NEW.popup_city_id
+BEGIN{_DECREMENT_OLD}{_INCREMENT_NEW}
+END
+""",
+    f"""
+CREATE TRIGGER application_status_counts_delete AFTER DELETE ON applications
+BEGIN{_DECREMENT_OLD}
+END
+""",
+)
+
+# Created along with the counters table, which is seeded from existing rows
+event.listen(ApplicationStatusCount.__table__, 'after_create', DDL(_SEED_STATUS_COUNTS))
+for statement in _POSTGRES_STATUS_COUNTS_TRIGGER:
+    event.listen(
+        ApplicationStatusCount.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='postgresql'),
+    )
+for statement in _SQLITE_STATUS_COUNTS_TRIGGER:
+    event.listen(
+        ApplicationStatusCount.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='sqlite'),
+    )
+
+
 def setup_relationships():
     from app.api.groups.models import Group
 
     if not hasattr(Application, 'group') or Application.group is None:
-        Application.group = relationship('Group', lazy='joined')
+        Application.group = relationship('Group')
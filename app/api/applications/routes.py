@@ -1,10 +1,20 @@
-from fastapi import APIRouter, Depends, status
+from typing import List, Optional, Union
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
 from app.api.applications import schemas
 from app.api.applications.crud import application as application_crud
 from app.api.attendees import schemas as attendees_schemas
-from app.api.common.schemas import PaginatedResponse, PaginationMetadata
+from app.api.common.fields import sparse_fields
+from app.api.common.pagination import cursor_param
+from app.api.common.schemas import (
+    CursorPaginatedResponse,
+    PaginatedResponse,
+    PaginationMetadata,
+)
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.logger import logger
 from app.core.security import TokenData, get_current_user
@@ -26,21 +36,43 @@ def create_application(
     return application_crud.create(db=db, obj=application, user=current_user)
 
 
-@router.get('/', response_model=list[schemas.Application])
+@router.get(
+    '/',
+    response_model=Union[
+        list[schemas.Application], CursorPaginatedResponse[schemas.Application]
+    ],
+)
 def get_applications(
     current_user: TokenData = Depends(get_current_user),
     filters: schemas.ApplicationFilter = Depends(),
     skip: int = 0,
+    # Unbounded as before for offset pages; `find_page` checks cursor pages
     limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
+    fields: Optional[List[str]] = Depends(sparse_fields(schemas.Application)),
     db: Session = Depends(get_db),
 ):
-    return application_crud.find(
+    projection = fields or list(schemas.Application.model_fields)
+    if cursor is not None:
+        applications, next_cursor = application_crud.find_page(
+            db=db,
+            cursor=cursor,
+            limit=limit,
+            filters=filters,
+            user=current_user,
+            projection=projection,
+        )
+        return ORJSONResponse({'items': applications, 'next_cursor': next_cursor})
+
+    applications = application_crud.find(
         db=db,
         skip=skip,
         limit=limit,
         filters=filters,
         user=current_user,
+        projection=projection,
     )
+    return ORJSONResponse(applications)
 
 
 @router.get(
@@ -51,6 +83,14 @@ def get_attendees_directory(
     popup_city_id: int,
     skip: int = 0,
     limit: int = 100,
+    q: Optional[str] = Query(
+        default=None,
+        description='Search in name, organization, role and telegram',
+    ),
+    product_id: Optional[List[int]] = Query(
+        default=None, description='Only attendees with any of these products'
+    ),
+    brings_kids: Optional[bool] = None,
     current_user: TokenData = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -60,6 +100,9 @@ def get_attendees_directory(
         skip=skip,
         limit=limit,
         user=current_user,
+        q=q,
+        product_ids=product_id,
+        brings_kids=brings_kids,
     )
     return PaginatedResponse(
         items=attendees,
@@ -71,13 +114,71 @@ def get_attendees_directory(
     )
 
 
+@router.get(
+    '/attendees_directory/{popup_city_id}/facets',
+    response_model=schemas.AttendeesDirectoryFacets,
+)
+def get_attendees_directory_facets(
+    popup_city_id: int,
+    current_user: TokenData = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    return application_crud.get_attendees_directory_facets(
+        db=db, popup_city_id=popup_city_id
+    )
+
+
+@router.get(
+    '/review-queue/{popup_city_id}',
+    response_model=schemas.ReviewQueue,
+)
+def get_review_queue(
+    popup_city_id: int,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: Optional[str] = Depends(cursor_param),
+    application_status: schemas.ApplicationStatus = Query(
+        default=schemas.ApplicationStatus.IN_REVIEW, alias='status'
+    ),
+    requested_discount: Optional[bool] = None,
+    scholarship_request: Optional[bool] = None,
+    fields: Optional[List[str]] = Depends(sparse_fields(schemas.Application)),
+    x_api_key: str = Header(...),
+    db: Session = Depends(get_db),
+):
+    if x_api_key != settings.REVIEWS_API_KEY:
+        raise HTTPException(status_code=403, detail='Invalid API key')
+
+    applications, next_cursor = application_crud.get_review_queue(
+        db=db,
+        popup_city_id=popup_city_id,
+        cursor=cursor or '',
+        limit=limit,
+        status=application_status,
+        requested_discount=requested_discount,
+        scholarship_request=scholarship_request,
+        projection=fields,
+    )
+    counts = application_crud.get_status_counts(db=db, popup_city_id=popup_city_id)
+    return ORJSONResponse(
+        {'items': applications, 'next_cursor': next_cursor, 'counts': counts}
+    )
+
+
 @router.get('/{application_id}', response_model=schemas.Application)
 def get_application(
     application_id: int,
     current_user: TokenData = Depends(get_current_user),
+    fields: Optional[List[str]] = Depends(sparse_fields(schemas.Application)),
     db: Session = Depends(get_db),
 ):
-    return application_crud.get(db=db, id=application_id, user=current_user)
+    if fields is not None:
+        application = application_crud.get_projection(
+            db=db, id=application_id, user=current_user, fields=fields
+        )
+        return ORJSONResponse(application)
+    return application_crud.get(
+        db=db, id=application_id, user=current_user, profile='detail'
+    )
 
 
 @router.put('/{application_id}', response_model=schemas.Application)
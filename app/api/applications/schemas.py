@@ -1,10 +1,11 @@
 from datetime import datetime
 from enum import Enum
-from typing import Literal, Optional, Union
+from typing import Dict, Literal, Optional, Union
 
 from pydantic import BaseModel, ConfigDict, field_validator
 
 from app.api.attendees.schemas import Attendee
+from app.api.common.schemas import CursorPaginatedResponse
 from app.api.products.schemas import Product
 from app.core.security import Token
 
@@ -27,6 +28,8 @@ class ApplicationFilter(BaseModel):
     citizen_id: Optional[int] = None
     popup_city_id: Optional[int] = None
     status: Optional[ApplicationStatus] = None
+    requested_discount: Optional[bool] = None
+    scholarship_request: Optional[bool] = None
 
 
 class ApplicationBaseCommon(BaseModel):
@@ -139,3 +142,19 @@ class AttendeesDirectory(BaseModel):
     role: Union[Optional[str], Literal['*']]
     organization: Union[Optional[str], Literal['*']]
     participation: Union[Optional[list[Product]], Literal['*']]
+
+
+class DirectoryProductFacet(BaseModel):
+    product_id: int
+    name: str
+    count: int
+
+
+class AttendeesDirectoryFacets(BaseModel):
+    total: int
+    brings_kids: int
+    products: list[DirectoryProductFacet]
+
+
+class ReviewQueue(CursorPaginatedResponse[Application]):
+    counts: Dict[str, int]
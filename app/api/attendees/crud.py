@@ -1,11 +1,17 @@
 import random
 import string
-from typing import List, Optional
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import ColumnElement, exists, func, select, true, update
+from sqlalchemy.orm import Session, selectinload
 
+from app.api.applications.models import Application
 from app.api.base_crud import CRUDBase
+from app.api.products.crud import product as product_crud
+from app.api.products.models import Product
+from app.api.products.schemas import ProductWithQuantity
 from app.core.security import SYSTEM_TOKEN, TokenData
 
 from . import models, schemas
@@ -14,14 +20,137 @@ from . import models, schemas
 class CRUDAttendees(
     CRUDBase[models.Attendee, schemas.InternalAttendeeCreate, schemas.AttendeeUpdate]
 ):
+    nested_fields = ('products',)
+
     def _check_permission(self, db_obj: models.Attendee, user: TokenData) -> bool:
         return db_obj.application.citizen_id == user.citizen_id or user == SYSTEM_TOKEN
 
+    def _permission_filter(self, user: TokenData) -> ColumnElement[bool]:
+        if user == SYSTEM_TOKEN:
+            return true()
+        return exists().where(
+            Application.id == models.Attendee.application_id,
+            Application.citizen_id == user.citizen_id,
+        )
+
+    def _complete_projection(
+        self, db: Session, items: List[Dict[str, Any]], fields: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        if 'products' not in fields or not items:
+            return items
+
+        product_fields = [
+            f for f in ProductWithQuantity.model_fields if f != 'quantity'
+        ]
+        rows = (
+            db.query(
+                models.AttendeeProduct.attendee_id.label('_attendee_id'),
+                models.AttendeeProduct.quantity.label('quantity'),
+                *product_crud.projection_columns(product_fields),
+            )
+            .join(Product, Product.id == models.AttendeeProduct.product_id)
+            .filter(models.AttendeeProduct.attendee_id.in_([i['id'] for i in items]))
+            .order_by(models.AttendeeProduct.attendee_id, Product.id)
+            .all()
+        )
+        products = defaultdict(list)
+        for row in rows:
+            product = dict(row._mapping)
+            products[product.pop('_attendee_id')].append(product)
+
+        for item in items:
+            item['products'] = products[item['id']]
+        return items
+
+    def find_by_applications(
+        self, db: Session, application_ids: Sequence[int], fields: Sequence[str]
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """Projected attendees of several applications, grouped by application id."""
+        if not application_ids:
+            return {}
+
+        rows = (
+            db.query(
+                self.model.application_id.label('_application_id'),
+                *self.projection_columns(fields),
+            )
+            .filter(self.model.application_id.in_(application_ids))
+            .order_by(self.model.id)
+            .all()
+        )
+        items = [dict(row._mapping) for row in rows]
+        items = self._complete_projection(db, items, fields)
+
+        attendees = defaultdict(list)
+        for item in items:
+            application_id = item.pop('_application_id')
+            if 'id' not in fields:
+                item.pop('id')
+            attendees[application_id].append(item)
+        return attendees
+
     def get_by_email(self, db: Session, email: str) -> List[models.Attendee]:
-        return db.query(self.model).filter(self.model.email == email).all()
+        return (
+            db.query(self.model)
+            .filter(self.model.email == email)
+            .options(
+                selectinload(self.model.products),
+                selectinload(self.model.application).selectinload(
+                    Application.popup_city
+                ),
+            )
+            .all()
+        )
+
+    def refresh_stay_summary(self, db: Session, application_ids: Iterable[int]) -> None:
+        """
+        Recompute the stay summary of the attendees of the given applications.
+
+        Must run whenever their attendee_products change; does not commit.
+        """
+        application_ids = set(application_ids)
+        if not application_ids:
+            return
+
+        db.flush()
+        attendee = models.Attendee
+        attendee_product = models.AttendeeProduct
+        products = (
+            select(Product)
+            .join(attendee_product, attendee_product.product_id == Product.id)
+            .where(attendee_product.attendee_id == attendee.id)
+        )
+        # The first product is the earliest starting one, as check-in emails expect
+        first_product = (
+            products.where(Product.start_date.isnot(None))
+            .order_by(Product.start_date, Product.id)
+            .limit(1)
+        )
+        db.execute(
+            update(attendee)
+            .where(attendee.application_id.in_(application_ids))
+            .values(
+                stay_start=products.with_only_columns(
+                    func.min(Product.start_date)
+                ).scalar_subquery(),
+                stay_end=products.with_only_columns(
+                    func.max(Product.end_date)
+                ).scalar_subquery(),
+                first_product_id=first_product.with_only_columns(
+                    Product.id
+                ).scalar_subquery(),
+                pass_category=first_product.with_only_columns(
+                    Product.category
+                ).scalar_subquery(),
+                products_count=products.with_only_columns(
+                    func.count()
+                ).scalar_subquery(),
+            ),
+            execution_options={'synchronize_session': 'fetch'},
+        )
 
     def get_by_code(self, db: Session, code: str) -> models.Attendee:
-        """Get a single record by code with permission check."""
+        """Get a single record by its unique check-in code."""
         return db.query(self.model).filter(self.model.check_in_code == code).first()
 
     def find(
@@ -43,10 +172,17 @@ class CRUDAttendees(
         obj: schemas.AttendeeCreate,
         user: TokenData,
     ) -> models.Attendee:
-        code = ''.join(random.choices(string.ascii_uppercase, k=4))
-        obj.check_in_code = 'EE25' + code
+        obj.check_in_code = self._generate_check_in_code(db)
         return super().create(db, obj, user)
 
+    def _generate_check_in_code(self, db: Session) -> str:
+        # Codes are unique, so draw again on the rare collision
+        while True:
+            code = 'EE25' + ''.join(random.choices(string.ascii_uppercase, k=4))
+            taken = exists().where(self.model.check_in_code == code)
+            if not db.query(taken).scalar():
+                return code
+
     def update(
         self,
         db: Session,
@@ -1,6 +1,6 @@
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, relationship
 
 from app.core.database import Base
@@ -44,6 +44,13 @@ class Attendee(Base):
     poap_url = Column(String)
     check_in_code = Column(String, nullable=False)
 
+    # Stay summary over the attendee products, kept by refresh_stay_summary
+    stay_start = Column(DateTime)
+    stay_end = Column(DateTime)
+    first_product_id = Column(Integer, ForeignKey('products.id'))
+    pass_category = Column(String)
+    products_count = Column(Integer, nullable=False, default=0, server_default='0')
+
     application: Mapped['Application'] = relationship(
         'Application', back_populates='attendees'
     )
@@ -59,10 +66,21 @@ class Attendee(Base):
     payment_products: Mapped[List['PaymentProduct']] = relationship(
         'PaymentProduct', back_populates='attendee'
     )
+    first_product: Mapped[Optional['Product']] = relationship(
+        'Product', foreign_keys=[first_product_id], viewonly=True
+    )
 
     created_at = Column(DateTime, default=current_time)
     updated_at = Column(DateTime, default=current_time, onupdate=current_time)
 
+    # Attendees of an application by stay start, e.g. the check-in emails
+    __table_args__ = (
+        Index('ix_attendees_application_stay', application_id, stay_start),
+        Index('ix_attendees_check_in_code', check_in_code, unique=True),
+        # Changes since a check-in manifest
+        Index('ix_attendees_updated_at', updated_at),
+    )
+
     def get_product_quantity(self, product_id: int) -> int:
         for attendee_product in self.attendee_products:
             if attendee_product.product_id == product_id:
@@ -1,12 +1,27 @@
-from typing import Generic, List, Optional, Type, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import psycopg2
 from fastapi import HTTPException, status
 from pydantic import BaseModel
+from sqlalchemy import ColumnElement, Row, and_, exists, null, or_, true
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import DeclarativeMeta
-from sqlalchemy.orm import Query, Session
+from sqlalchemy.orm import Query, QueryableAttribute, Session
+from sqlalchemy.orm.interfaces import ORMOption
 
+from app.api.common.pagination import decode_cursor, encode_cursor
 from app.core.logger import logger
 from app.core.security import SYSTEM_TOKEN, TokenData
 
@@ -16,13 +31,57 @@ UpdateSchemaType = TypeVar('UpdateSchemaType', bound=BaseModel)
 
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Named loader option factories, e.g. {'list': lambda: [selectinload(...)]}.
+    # Factories are called per query so mappers are configured lazily.
+    load_profiles: Dict[str, Callable[[], Sequence[ORMOption]]] = {}
+    # Response fields filled by `_complete_projection` instead of a column
+    nested_fields: Sequence[str] = ()
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
 
+    def _load_options(self, profile: Optional[str]) -> Sequence[ORMOption]:
+        if profile is None:
+            return ()
+        if profile not in self.load_profiles:
+            raise ValueError(
+                f'Unknown load profile for {self.model.__name__}: {profile}'
+            )
+        return self.load_profiles[profile]()
+
+    def _projection_column(self, field: str) -> ColumnElement:
+        """Override this method to map response fields that are not plain columns"""
+        attr = getattr(self.model, field, None)
+        if isinstance(attr, QueryableAttribute):
+            return attr
+        return null()
+
+    def projection_columns(self, fields: Sequence[str]) -> List[ColumnElement]:
+        # The id is always selected so nested collections can be attached
+        columns = {'id': self.model.id}
+        for field in fields:
+            if field not in self.nested_fields:
+                columns[field] = self._projection_column(field)
+        return [column.label(name) for name, column in columns.items()]
+
+    def _complete_projection(
+        self, db: Session, items: List[Dict[str, Any]], fields: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        """Override this method to convert values and attach nested collections"""
+        return items
+
     def _check_permission(self, db_obj: ModelType, user: TokenData) -> bool:
         """Override this method to implement permission checks"""
         return user == SYSTEM_TOKEN
 
+    def _permission_filter(self, user: TokenData) -> Optional[ColumnElement[bool]]:
+        """
+        Override this method to express `_check_permission` as a SQL condition.
+        When it returns None, `get` falls back to loading the object and
+        calling `_check_permission` on it.
+        """
+        return None
+
     def _apply_filters(
         self, query: Query, filters: Optional[BaseModel] = None
     ) -> Query:
@@ -81,9 +140,24 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             db.rollback()
             raise e
 
-    def get(self, db: Session, id: int, user: TokenData) -> ModelType:
+    def get(
+        self,
+        db: Session,
+        id: int,
+        user: TokenData,
+        profile: Optional[str] = None,
+    ) -> ModelType:
         """Get a single record by id with permission check."""
-        obj = db.query(self.model).filter(self.model.id == id).first()
+        query = db.query(self.model).filter(self.model.id == id)
+        query = query.options(*self._load_options(profile))
+        permission = self._permission_filter(user)
+        if permission is not None:
+            obj = query.filter(permission).first()
+            if not obj:
+                self._raise_not_found_or_forbidden(db, id)
+            return obj
+
+        obj = query.first()
         if not obj:
             logger.error('Record not found')
             raise HTTPException(
@@ -95,6 +169,34 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=err_msg)
         return obj
 
+    def get_projection(
+        self, db: Session, id: int, user: TokenData, fields: Sequence[str]
+    ) -> Dict[str, Any]:
+        """Get a single record as a dict of the given fields with permission check."""
+        permission = self._permission_filter(user)
+        if permission is None:
+            # Models without a SQL permission filter are checked on the ORM object
+            self.get(db, id, user)
+            permission = true()
+
+        query = db.query(*self.projection_columns(fields))
+        row = query.filter(self.model.id == id, permission).first()
+        if not row:
+            self._raise_not_found_or_forbidden(db, id)
+        return self._build_projection(db, [row], fields)[0]
+
+    def _raise_not_found_or_forbidden(self, db: Session, id: int) -> None:
+        """Tell apart a missing record from one the user cannot access."""
+        found = db.query(exists().where(self.model.id == id)).scalar()
+        if not found:
+            logger.error('Record not found')
+            raise HTTPException(
+                status_code=404, detail=f'{self.model.__name__} not found'
+            )
+        err_msg = f'Not authorized to access this {self.model.__name__}: {id}'
+        logger.error(err_msg)
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=err_msg)
+
     def find(
         self,
         db: Session,
@@ -104,24 +206,137 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         user: Optional[TokenData] = None,
         sort_by: str = 'created_at',
         sort_order: str = 'desc',
-    ) -> List[ModelType]:
-        """Get multiple records with pagination, filters, sorting and permission check."""
-        query = db.query(self.model)
+        profile: Optional[str] = None,
+        projection: Optional[Sequence[str]] = None,
+        cursor: Optional[str] = None,
+    ) -> Union[List[ModelType], List[Dict[str, Any]]]:
+        """
+        Get multiple records with pagination, filters, sorting and permission check.
+
+        With `projection`, only those fields are selected and plain dicts are
+        returned instead of ORM objects, ready to be serialized as they are.
+        With `cursor` (empty for the first page), `skip` is ignored and rows are
+        paged by keyset on (sort_by, id); see `find_page`.
+        """
+        if projection is not None:
+            query = db.query(*self.projection_columns(projection))
+        else:
+            query = db.query(self.model).options(*self._load_options(profile))
         query = self._apply_filters(query, filters)
+        if user is not None:
+            permission = self._permission_filter(user)
+            if permission is not None:
+                query = query.filter(permission)
+
+        query = self._apply_sorting(query, sort_by, sort_order, cursor)
+        if cursor is None:
+            query = query.offset(skip)
+        results = query.limit(limit).all()
+        if projection is None:
+            return results
+        return self._build_projection(db, results, projection)
+
+    def find_page(
+        self,
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort_by: str = 'created_at',
+        sort_order: str = 'desc',
+        projection: Optional[Sequence[str]] = None,
+        **kwargs,
+    ) -> Tuple[Union[List[ModelType], List[Dict[str, Any]]], Optional[str]]:
+        """
+        Get one keyset page and the cursor of the next one (None on the last page).
+
+        Extra keyword arguments (filters, user, profile) are passed to `find`, so
+        subclass overrides of `find` apply here too.
+        """
+        if limit < 1:
+            raise HTTPException(status_code=400, detail=f'Invalid limit: {limit}')
 
+        # The cursor is built from the last row, so its id and sort key are needed
+        extra_fields = []
+        if projection is not None:
+            extra_fields = [f for f in ('id', sort_by) if f not in projection]
+            # Only passed when set, as some `find` overrides don't project
+            kwargs['projection'] = [*projection, *extra_fields]
+
+        items = self.find(
+            db,
+            limit=limit + 1,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor or '',
+            **kwargs,
+        )
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            if projection is None:
+                value, last_id = getattr(last, sort_by), last.id
+            else:
+                value, last_id = last[sort_by], last['id']
+            next_cursor = encode_cursor(sort_by, sort_order, value, last_id)
+
+        for field in extra_fields:
+            for item in items:
+                item.pop(field)
+        return items, next_cursor
+
+    def _apply_sorting(
+        self,
+        query: Query,
+        sort_by: str,
+        sort_order: str,
+        cursor: Optional[str] = None,
+    ) -> Query:
         # Validate sort field exists
         if not hasattr(self.model, sort_by):
             raise HTTPException(
                 status_code=400, detail=f'Invalid sort field: {sort_by}'
             )
 
-        # Apply sorting
         order_by = getattr(self.model, sort_by)
+        if cursor is None:
+            return query.order_by(order_by.desc() if sort_order == 'desc' else order_by)
+
+        # Keyset mode: id breaks ties and NULL sort keys always come last
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort_by, sort_order)
+            query = query.filter(
+                self._after_cursor(order_by, value, last_id, sort_order)
+            )
         if sort_order == 'desc':
-            order_by = order_by.desc()
+            return query.order_by(order_by.desc().nulls_last(), self.model.id.desc())
+        return query.order_by(order_by.asc().nulls_last(), self.model.id.asc())
+
+    def _after_cursor(
+        self, column: ColumnElement, value: Any, last_id: int, sort_order: str
+    ) -> ColumnElement[bool]:
+        if sort_order == 'desc':
+            after_value, after_id = column < value, self.model.id < last_id
+        else:
+            after_value, after_id = column > value, self.model.id > last_id
+
+        if value is None:
+            return and_(column.is_(None), after_id)
+        return or_(
+            after_value,
+            and_(column == value, after_id),
+            column.is_(None),
+        )
 
-        query = query.order_by(order_by)
-        return query.offset(skip).limit(limit).all()
+    def _build_projection(
+        self, db: Session, rows: Sequence[Row], fields: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        items = [dict(row._mapping) for row in rows]
+        items = self._complete_projection(db, items, fields)
+        if 'id' not in fields:
+            for item in items:
+                item.pop('id')
+        return items
 
     def update(
         self,
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Query, Session
+
+from app.api.applications.models import Application
+from app.api.attendees.models import Attendee, AttendeeProduct
+from app.api.check_in import schemas
+from app.core.utils import current_time
+
+
+class CheckInCodeRegistry:
+    """
+    In-process map of check-in codes to their attendee, warmed per popup.
+
+    The first scan of a popup loads the codes of all its attendees, so the next
+    scans are answered from memory. A popup is reloaded after `expiry`, or as soon
+    as one of its payments is approved (see `invalidate`). Unknown codes and codes
+    of attendees without products are looked up again, as they may have been
+    created or paid for in another worker.
+    """
+
+    def __init__(self, expiry: timedelta = timedelta(minutes=10)):
+        self._popups: Dict[int, Tuple[datetime, Dict[str, schemas.CheckInCode]]] = {}
+        self._popup_ids: Dict[str, int] = {}
+        self._expiry = expiry
+        self._lock = Lock()
+
+    def _query(self, db: Session) -> Query:
+        has_products = exists().where(AttendeeProduct.attendee_id == Attendee.id)
+        return db.query(
+            Application.popup_city_id,
+            Attendee.check_in_code,
+            Attendee.id,
+            Attendee.name,
+            has_products.label('has_products'),
+        ).join(Application, Application.id == Attendee.application_id)
+
+    def _entry(self, row) -> schemas.CheckInCode:
+        return schemas.CheckInCode(
+            attendee_id=row.id, name=row.name, has_products=row.has_products
+        )
+
+    def _cached(self, code: str) -> Tuple[Optional[int], Optional[schemas.CheckInCode]]:
+        """The popup of the code, if it was loaded and is not expired, and its entry"""
+        with self._lock:
+            popup_city_id = self._popup_ids.get(code)
+            popup = self._popups.get(popup_city_id)
+            if popup is None:
+                return None, None
+            loaded_at, codes = popup
+            if current_time() - loaded_at > self._expiry:
+                return None, None
+            return popup_city_id, codes.get(code)
+
+    def load(self, db: Session, popup_city_id: int) -> None:
+        """Load the codes of every attendee of the popup."""
+        rows = self._query(db).filter(Application.popup_city_id == popup_city_id)
+        codes = {row.check_in_code: self._entry(row) for row in rows}
+        with self._lock:
+            self._popups[popup_city_id] = (current_time(), codes)
+            self._popup_ids.update(dict.fromkeys(codes, popup_city_id))
+
+    def get_many(
+        self, db: Session, codes: Iterable[str]
+    ) -> Dict[str, schemas.CheckInCode]:
+        """Entries of the given codes; unknown codes are left out."""
+        entries = {}
+        missing = {}
+        for code in set(codes):
+            popup_city_id, entry = self._cached(code)
+            if entry is not None and entry.has_products:
+                entries[code] = entry
+            else:
+                missing[code] = popup_city_id
+        if not missing:
+            return entries
+
+        rows = self._query(db).filter(Attendee.check_in_code.in_(missing)).all()
+        to_load = set()
+        for row in rows:
+            entries[row.check_in_code] = self._entry(row)
+            popup_city_id = missing[row.check_in_code]
+            if popup_city_id is None:
+                to_load.add(row.popup_city_id)
+                continue
+            with self._lock:
+                popup = self._popups.get(popup_city_id)
+                if popup is not None:
+                    popup[1][row.check_in_code] = entries[row.check_in_code]
+        for popup_city_id in to_load:
+            self.load(db, popup_city_id)
+        return entries
+
+    def get(self, db: Session, code: str) -> Optional[schemas.CheckInCode]:
+        return self.get_many(db, [code]).get(code)
+
+    def discard(self, codes: Iterable[str]) -> None:
+        """Forget the codes, e.g. of deleted attendees, so they are looked up again"""
+        with self._lock:
+            for code in codes:
+                popup = self._popups.get(self._popup_ids.pop(code, None))
+                if popup is not None:
+                    popup[1].pop(code, None)
+
+    def invalidate(self, popup_city_id: Optional[int] = None) -> None:
+        """Reload the popup, or every popup, on its next scan"""
+        with self._lock:
+            if popup_city_id is None:
+                self._popups.clear()
+            else:
+                self._popups.pop(popup_city_id, None)
+
+
+check_in_codes = CheckInCodeRegistry()
@@ -1,14 +1,28 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Insert, case
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.applications.crud import application as application_crud
+from app.api.applications.models import Application
 from app.api.attendees.crud import attendee as attendee_crud
+from app.api.attendees.models import Attendee
 from app.api.base_crud import CRUDBase
+from app.api.check_in.codes import check_in_codes
 from app.core.logger import logger
 from app.core.security import SYSTEM_TOKEN
-from app.core.utils import current_time
+from app.core.utils import current_time, to_utc
 
 from . import models, schemas
 
+MANIFEST_FIELDS = ['code', 'attendee_id', 'name', 'valid_from', 'valid_to']
+# Delta manifests reach back this far before `since`, so they include changes
+# committed late by transactions that started before it
+MANIFEST_OVERLAP = timedelta(minutes=1)
+
 
 class CRUDCheckIn(
     CRUDBase[
@@ -30,49 +44,203 @@ class CRUDCheckIn(
             .first()
         )
 
+    def _insert(self, db: Session) -> Insert:
+        if db.get_bind().dialect.name == 'postgresql':
+            return postgresql.insert(models.CheckIn)
+        return sqlite.insert(models.CheckIn)
+
+    def _record_qr_scans(
+        self, db: Session, scans: Dict[int, Tuple[str, datetime]]
+    ) -> Dict[int, datetime]:
+        """
+        Upsert the check-ins of the scanned attendees, by attendee id.
+
+        A single statement keyed on the unique attendee_id, so concurrent scans of
+        a code can't both create its row, and replaying scans changes nothing. The
+        earliest scan time is kept and returned, which is how a first scan is told
+        apart from the later ones. Does not commit.
+        """
+        now = current_time()
+        insert = self._insert(db)
+        check_in = models.CheckIn.__table__.c
+        stmt = insert.values(
+            [
+                {
+                    'code': code,
+                    'attendee_id': attendee_id,
+                    'virtual_check_in': False,
+                    'qr_check_in': True,
+                    'qr_scan_timestamp': scanned_at,
+                }
+                for attendee_id, (code, scanned_at) in scans.items()
+            ]
+        ).on_conflict_do_update(
+            index_elements=[check_in.attendee_id],
+            set_={
+                'code': insert.excluded.code,
+                'qr_check_in': True,
+                'qr_scan_timestamp': case(
+                    (
+                        check_in.qr_scan_timestamp <= insert.excluded.qr_scan_timestamp,
+                        check_in.qr_scan_timestamp,
+                    ),
+                    else_=insert.excluded.qr_scan_timestamp,
+                ),
+                'updated_at': now,
+            },
+        )
+        rows = db.execute(
+            stmt.returning(check_in.attendee_id, check_in.qr_scan_timestamp)
+        )
+        return dict(rows.tuples().all())
+
     def new_qr_check_in(
         self,
         db: Session,
         code: str,
     ) -> schemas.CheckInResponse:
-        attendee = attendee_crud.get_by_code(db, code)
+        attendee = check_in_codes.get(db, code)
         logger.info('Attendee with code %s found: %s', code, attendee is not None)
-        if not attendee or not attendee.products:
+        if not attendee or not attendee.has_products:
             logger.error('Attendee with code %s not found or has no products', code)
             return schemas.CheckInResponse(success=False, first_check_in=False)
 
-        existing_check_in = self.get_check_in_by_attendee_id(db, attendee.id)
-        if existing_check_in:
-            logger.info('Existing check-in for attendee %s', attendee.id)
-            first_check_in = not existing_check_in.qr_check_in
-            existing_check_in.code = code
-            existing_check_in.qr_check_in = True
-            if not existing_check_in.qr_scan_timestamp:
-                existing_check_in.qr_scan_timestamp = current_time()
-
+        now = current_time()
+        try:
+            scan_times = self._record_qr_scans(db, {attendee.attendee_id: (code, now)})
             db.commit()
+        except IntegrityError:
+            # The attendee was deleted since its code was cached
+            db.rollback()
+            check_in_codes.discard([code])
+            logger.error('Attendee with code %s was deleted', code)
+            return schemas.CheckInResponse(success=False, first_check_in=False)
 
-            return schemas.CheckInResponse(
-                success=True,
-                first_check_in=first_check_in,
-                name=attendee.name,
-                scan_time=existing_check_in.qr_scan_timestamp,
-            )
-
-        logger.info('Creating new check-in for attendee %s', attendee.id)
-        new_check_in = schemas.InternalCheckInCreate(
-            code=code,
-            attendee_id=attendee.id,
-            qr_check_in=True,
-            qr_scan_timestamp=current_time(),
+        scan_time = scan_times[attendee.attendee_id]
+        first_check_in = scan_time == now
+        logger.info(
+            'QR check-in for attendee %s, first: %s',
+            attendee.attendee_id,
+            first_check_in,
         )
-        super().create(db, new_check_in, SYSTEM_TOKEN)
         return schemas.CheckInResponse(
             success=True,
-            first_check_in=True,
+            first_check_in=first_check_in,
             name=attendee.name,
-            scan_time=new_check_in.qr_scan_timestamp,
+            scan_time=scan_time,
+        )
+
+    def _apply_qr_scans(
+        self, db: Session, scans: List[schemas.QRScan], now: datetime
+    ) -> Tuple[Dict[str, schemas.CheckInCode], Dict[int, datetime]]:
+        """The attendees of the scanned codes, and their recorded scan times."""
+        attendees = check_in_codes.get_many(db, [s.code for s in scans])
+        # The earliest scan of each valid code; a device clock ahead counts as now
+        first_scans = {}
+        for scan in sorted(scans, key=lambda s: s.scanned_at):
+            attendee = attendees.get(scan.code)
+            if attendee and attendee.has_products:
+                scanned_at = min(scan.scanned_at, now)
+                first_scans.setdefault(attendee.attendee_id, (scan.code, scanned_at))
+
+        scan_times = {}
+        if first_scans:
+            scan_times = self._record_qr_scans(db, first_scans)
+            db.commit()
+        logger.info('Applied %s offline scans, %s valid', len(scans), len(first_scans))
+        return attendees, scan_times
+
+    def new_qr_check_ins(
+        self,
+        db: Session,
+        scans: List[schemas.QRScan],
+    ) -> List[schemas.QRScanResult]:
+        """Apply scans queued by offline scanners, in one transaction."""
+        now = current_time()
+        try:
+            attendees, scan_times = self._apply_qr_scans(db, scans, now)
+        except IntegrityError:
+            # An attendee was deleted since its code was cached: look them up again
+            db.rollback()
+            check_in_codes.discard(s.code for s in scans)
+            attendees, scan_times = self._apply_qr_scans(db, scans, now)
+
+        results = []
+        for scan in scans:
+            attendee = attendees.get(scan.code)
+            if not attendee or attendee.attendee_id not in scan_times:
+                results.append(
+                    schemas.QRScanResult(
+                        code=scan.code, success=False, first_check_in=False
+                    )
+                )
+                continue
+            scan_time = scan_times[attendee.attendee_id]
+            results.append(
+                schemas.QRScanResult(
+                    code=scan.code,
+                    success=True,
+                    first_check_in=scan_time == min(scan.scanned_at, now),
+                    name=attendee.name,
+                    scan_time=scan_time,
+                )
+            )
+        return results
+
+    def get_manifest(
+        self, db: Session, popup_city_id: int, since: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Valid check-in codes of the popup, for scanners to work offline.
+
+        Codes are listed as rows of MANIFEST_FIELDS, with the stay of the attendee
+        as pass validity. With `since`, only attendees changed after it are
+        listed, and the codes of those without products anymore or deleted since
+        (see `models.DeletedAttendee`) are listed in `removed`.
+        """
+        now = current_time()
+        query = (
+            db.query(
+                Attendee.check_in_code,
+                Attendee.id,
+                Attendee.name,
+                Attendee.stay_start,
+                Attendee.stay_end,
+                Attendee.products_count,
+            )
+            .join(Application, Application.id == Attendee.application_id)
+            .filter(Application.popup_city_id == popup_city_id)
+            .order_by(Attendee.id)
         )
+        if since is None:
+            query = query.filter(Attendee.products_count > 0)
+        else:
+            since = to_utc(since)
+            query = query.filter(Attendee.updated_at >= since - MANIFEST_OVERLAP)
+
+        codes = []
+        removed = []
+        for row in query:
+            if not row.products_count:
+                removed.append(row.check_in_code)
+                continue
+            codes.append(
+                [row.check_in_code, row.id, row.name, row.stay_start, row.stay_end]
+            )
+        if since is not None:
+            deleted = db.query(models.DeletedAttendee.check_in_code).filter(
+                models.DeletedAttendee.popup_city_id == popup_city_id,
+                models.DeletedAttendee.deleted_at >= since - MANIFEST_OVERLAP,
+            )
+            removed.extend(code for (code,) in deleted)
+        return {
+            'popup_city_id': popup_city_id,
+            'generated_at': now,
+            'since': since,
+            'fields': MANIFEST_FIELDS,
+            'codes': codes,
+            'removed': removed,
+        }
 
     def new_virtual_check_in(
         self,
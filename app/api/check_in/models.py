@@ -1,5 +1,16 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    event,
+)
 
+from app.api.attendees.models import Attendee
 from app.core.database import Base
 from app.core.utils import current_time
 
@@ -30,3 +41,68 @@ class CheckIn(Base):
 
     created_at = Column(DateTime, default=current_time)
     updated_at = Column(DateTime, default=current_time, onupdate=current_time)
+
+
+class DeletedAttendee(Base):
+    """
+    Check-in codes of deleted attendees, for delta manifests to list as removed.
+
+    Written by triggers on the attendees table, so they include the attendees
+    NocoDB deletes directly.
+    """
+
+    __tablename__ = 'deleted_attendees'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    attendee_id = Column(Integer, nullable=False)
+    popup_city_id = Column(Integer, nullable=False)
+    check_in_code = Column(String, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=current_time)
+
+    __table_args__ = (
+        Index('ix_deleted_attendees_popup_deleted_at', popup_city_id, deleted_at),
+    )
+
+
+DeletedAttendee.__table__.add_is_dependent_on(Attendee.__table__)
+
+_POSTGRES_DELETED_ATTENDEES_TRIGGER = (
+    """
+CREATE OR REPLACE FUNCTION record_deleted_attendee() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_attendees
+        (attendee_id, popup_city_id, check_in_code, deleted_at)
+    SELECT OLD.id, popup_city_id, OLD.check_in_code, now() AT TIME ZONE 'utc'
+    FROM applications WHERE id = OLD.application_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""",
+    """
+CREATE TRIGGER deleted_attendees
+AFTER DELETE ON attendees
+FOR EACH ROW EXECUTE FUNCTION record_deleted_attendee()
+""",
+)
+
+_SQLITE_DELETED_ATTENDEES_TRIGGER = """
+CREATE TRIGGER deleted_attendees AFTER DELETE ON attendees
+BEGIN
+    INSERT INTO deleted_attendees
+        (attendee_id, popup_city_id, check_in_code, deleted_at)
+    SELECT OLD.id, popup_city_id, OLD.check_in_code, CURRENT_TIMESTAMP
+    FROM applications WHERE id = OLD.application_id;
+END
+"""
+
+for statement in _POSTGRES_DELETED_ATTENDEES_TRIGGER:
+    event.listen(
+        DeletedAttendee.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='postgresql'),
+    )
+event.listen(
+    DeletedAttendee.__table__,
+    'after_create',
+    DDL(_SQLITE_DELETED_ATTENDEES_TRIGGER).execute_if(dialect='sqlite'),
+)
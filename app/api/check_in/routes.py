@@ -1,14 +1,48 @@
-from fastapi import APIRouter, Depends, Header, HTTPException
+import json
+from datetime import datetime
+from typing import List, Optional
+
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.check_in import schemas
 from app.api.check_in.crud import check_in as check_in_crud
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.qr import QRFormat, decode_qr_token, qr_cache
+from app.core.utils import compute_etag, current_time, etag_matches, sign
 
 router = APIRouter()
 
 
+@router.get(
+    '/qr/{token}.{image_format}',
+    response_class=Response,
+    responses={200: {'content': {f.media_type: {} for f in QRFormat}}},
+)
+def get_qr_image(
+    token: str,
+    image_format: QRFormat,
+    if_none_match: Optional[str] = Header(None),
+):
+    decoded = decode_qr_token(token)
+    if decoded is None:
+        raise HTTPException(status_code=404, detail='QR code not found')
+    check_in_code, expires_at = decoded
+
+    content = qr_cache.render(json.dumps({'code': check_in_code}), image_format)
+    etag = compute_etag(content)
+    # The image of a token never changes, so it can be cached until it expires
+    max_age = int((expires_at - current_time()).total_seconds())
+    headers = {'ETag': etag, 'Cache-Control': f'public, max-age={max_age}, immutable'}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=content, media_type=image_format.media_type, headers=headers
+    )
+
+
 @router.post('/qr', response_model=schemas.CheckInResponse)
 def new_qr_check_in(
     check_in: schemas.NewQRCheckIn,
@@ -23,6 +57,39 @@ def new_qr_check_in(
     )
 
 
+@router.post('/qr/batch', response_model=List[schemas.QRScanResult])
+def new_qr_check_ins(
+    batch: schemas.QRScanBatch,
+    x_api_key: str = Header(...),
+    db: Session = Depends(get_db),
+):
+    if x_api_key != settings.CHECK_IN_API_KEY:
+        raise HTTPException(status_code=403, detail='Invalid API key')
+    return check_in_crud.new_qr_check_ins(db=db, scans=batch.scans)
+
+
+@router.get('/manifest/{popup_city_id}', response_class=Response)
+def get_manifest(
+    popup_city_id: int,
+    since: Optional[datetime] = None,
+    x_api_key: str = Header(...),
+    db: Session = Depends(get_db),
+):
+    """
+    Valid codes of the popup, signed with the check-in API key.
+
+    Pass the `generated_at` of the previous manifest as `since` to get only the
+    changes. The `X-Signature` header is the hex HMAC-SHA256 of the body.
+    """
+    if x_api_key != settings.CHECK_IN_API_KEY:
+        raise HTTPException(status_code=403, detail='Invalid API key')
+
+    manifest = check_in_crud.get_manifest(db, popup_city_id, since)
+    content = orjson.dumps(manifest)
+    headers = {'X-Signature': sign(content, settings.CHECK_IN_API_KEY)}
+    return Response(content=content, media_type='application/json', headers=headers)
+
+
 @router.post('/virtual', response_model=schemas.CheckInResponse)
 def new_virtual_check_in(
     check_in: schemas.NewVirtualCheckIn,
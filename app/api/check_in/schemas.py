@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
+
+from app.core.utils import to_utc
 
 
 class InternalCheckInCreate(BaseModel):
@@ -35,8 +37,30 @@ class NewVirtualCheckIn(NewCheckIn):
     departure_date: datetime
 
 
+class QRScan(NewCheckIn):
+    scanned_at: datetime
+
+    @field_validator('scanned_at')
+    def validate_scanned_at(cls, v):
+        return to_utc(v)
+
+
+class QRScanBatch(BaseModel):
+    scans: List[QRScan] = Field(..., min_length=1, max_length=1000)
+
+
+class CheckInCode(BaseModel):
+    attendee_id: int
+    name: str
+    has_products: bool
+
+
 class CheckInResponse(BaseModel):
     success: bool
     first_check_in: bool
     name: Optional[str] = None
     scan_time: Optional[datetime] = None
+
+
+class QRScanResult(CheckInResponse):
+    code: str
@@ -1,18 +1,25 @@
 import random
 from datetime import timedelta
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 import requests
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import ColumnElement, true
+from sqlalchemy.orm import Session, selectinload
 
 from app.api.access_tokens import schemas as access_token_schemas
 from app.api.access_tokens.crud import access_token as access_token_crud
+from app.api.applications.models import Application
+from app.api.attendees.models import Attendee
 from app.api.base_crud import CRUDBase
 from app.api.citizens import models, schemas
 from app.api.citizens.schemas import CitizenPoaps, CitizenPoapsByPopup, PoapClaim
 from app.api.email_logs.crud import email_log
 from app.api.email_logs.schemas import EmailEvent
+from app.api.groups.models import Group, GroupLeader
+from app.api.payments.models import Payment
+from app.api.popup_city.models import PopUpCity
+from app.api.products.models import Product
 from app.core.config import settings
 from app.core.locks import DistributedLock
 from app.core.logger import logger
@@ -105,6 +112,11 @@ class CRUDCitizen(
     def _check_permission(self, db_obj: models.Citizen, user: TokenData) -> bool:
         return user == SYSTEM_TOKEN or db_obj.id == user.citizen_id
 
+    def _permission_filter(self, user: TokenData) -> ColumnElement[bool]:
+        if user == SYSTEM_TOKEN:
+            return true()
+        return models.Citizen.id == user.citizen_id
+
     def find(
         self,
         db: Session,
@@ -112,11 +124,24 @@ class CRUDCitizen(
         limit: int = 100,
         filters: Optional[schemas.CitizenFilter] = None,
         user: Optional[TokenData] = None,
-    ) -> List[models.Citizen]:
+        sort_by: str = 'created_at',
+        sort_order: str = 'desc',
+        projection: Optional[Sequence[str]] = None,
+        cursor: Optional[str] = None,
+    ) -> Union[List[models.Citizen], List[Dict[str, Any]]]:
         if user:
             filters = filters or schemas.CitizenFilter()
             filters.id = user.citizen_id
-        return super().find(db, skip, limit, filters)
+        return super().find(
+            db,
+            skip,
+            limit,
+            filters,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            projection=projection,
+            cursor=cursor,
+        )
 
     def get_by_email(self, db: Session, email: str) -> Optional[models.Citizen]:
         return db.query(self.model).filter(self.model.primary_email == email).first()
@@ -267,5 +292,63 @@ class CRUDCitizen(
 
         return response
 
+    def get_bootstrap(self, db: Session, user: TokenData) -> schemas.CitizenBootstrap:
+        """
+        Everything the portal needs right after login, loaded with a fixed
+        number of queries regardless of how many applications the citizen has.
+        """
+        citizen = self.get(db, user.citizen_id, user)
+
+        popups = db.query(PopUpCity).order_by(PopUpCity.portal_order).all()
+
+        applications = (
+            db.query(Application)
+            .filter(Application.citizen_id == citizen.id)
+            .options(
+                selectinload(Application.attendees).selectinload(Attendee.products),
+                selectinload(Application.attendees).selectinload(
+                    Attendee.attendee_products
+                ),
+            )
+            .order_by(Application.created_at.desc())
+            .all()
+        )
+
+        popup_ids = {a.popup_city_id for a in applications}
+        products = []
+        if popup_ids:
+            products = (
+                db.query(Product)
+                .filter(Product.popup_city_id.in_(popup_ids))
+                .order_by(Product.name)
+                .all()
+            )
+
+        payments = (
+            db.query(Payment)
+            .join(Payment.application)
+            .filter(Application.citizen_id == citizen.id)
+            .options(selectinload(Payment.products_snapshot))
+            .order_by(Payment.created_at.desc())
+            .all()
+        )
+
+        groups = (
+            db.query(Group)
+            .join(GroupLeader, GroupLeader.group_id == Group.id)
+            .filter(GroupLeader.citizen_id == citizen.id)
+            .order_by(Group.name)
+            .all()
+        )
+
+        return schemas.CitizenBootstrap(
+            citizen=citizen,
+            popups=popups,
+            applications=applications,
+            products=products,
+            payments=payments,
+            groups=groups,
+        )
+
 
 citizen = CRUDCitizen(models.Citizen)
@@ -1,13 +1,18 @@
-from typing import Optional
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
 from app.api.citizens import schemas
 from app.api.citizens.crud import citizen as citizen_crud
+from app.api.common.fields import sparse_fields
+from app.api.common.pagination import cursor_param
+from app.api.common.schemas import CursorPaginatedResponse
 from app.core.database import get_db
 from app.core.logger import logger
 from app.core.security import TokenData, get_current_user
+from app.core.utils import compute_etag, etag_matches
 
 router = APIRouter()
 
@@ -54,21 +59,44 @@ def login(
 
 
 # Get all citizens
-@router.get('/', response_model=list[schemas.Citizen])
+@router.get(
+    '/',
+    response_model=Union[
+        list[schemas.Citizen], CursorPaginatedResponse[schemas.Citizen]
+    ],
+)
 def get_citizens(
     current_user: TokenData = Depends(get_current_user),
     filters: schemas.CitizenFilter = Depends(),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=100),
+    cursor: Optional[str] = Depends(cursor_param),
+    fields: Optional[List[str]] = Depends(sparse_fields(schemas.Citizen)),
     db: Session = Depends(get_db),
 ):
-    return citizen_crud.find(
+    if cursor is not None:
+        citizens, next_cursor = citizen_crud.find_page(
+            db=db,
+            cursor=cursor,
+            limit=limit,
+            filters=filters,
+            user=current_user,
+            projection=fields,
+        )
+        page = {'items': citizens, 'next_cursor': next_cursor}
+        return page if fields is None else ORJSONResponse(page)
+
+    citizens = citizen_crud.find(
         db=db,
         skip=skip,
         limit=limit,
         filters=filters,
         user=current_user,
+        projection=fields,
     )
+    if fields is None:
+        return citizens
+    return ORJSONResponse(citizens)
 
 
 @router.get('/my-poaps', response_model=schemas.CitizenPoaps)
@@ -79,6 +107,21 @@ def get_my_poaps(
     return citizen_crud.get_poaps_from_citizen(db=db, user=current_user)
 
 
+@router.get('/me/bootstrap', response_model=schemas.CitizenBootstrap)
+def get_my_bootstrap(
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: TokenData = Depends(get_current_user),
+):
+    bootstrap = citizen_crud.get_bootstrap(db=db, user=current_user)
+    content = bootstrap.model_dump_json().encode()
+    etag = compute_etag(content)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=content, media_type='application/json', headers=headers)
+
+
 # Get citizen by ID
 @router.get('/{citizen_id}', response_model=schemas.Citizen)
 def get_citizen(
@@ -4,6 +4,12 @@ from urllib.parse import unquote
 
 from pydantic import BaseModel, ConfigDict, field_validator
 
+from app.api.applications.schemas import Application
+from app.api.groups.schemas import Group
+from app.api.payments.schemas import Payment
+from app.api.popup_city.schemas import PopUpCity
+from app.api.products.schemas import Product
+
 
 class Authenticate(BaseModel):
     email: str
@@ -98,3 +104,12 @@ class CitizenPoapsByPopup(BaseModel):
 
 class CitizenPoaps(BaseModel):
     results: List[CitizenPoapsByPopup]
+
+
+class CitizenBootstrap(BaseModel):
+    citizen: Citizen
+    popups: List[PopUpCity]
+    applications: List[Application]
+    products: List[Product]
+    payments: List[Payment]
+    groups: List[Group]
@@ -0,0 +1,40 @@
+"""Sparse fieldset (`?fields=`) support for list and detail endpoints."""
+
+from typing import Callable, List, Optional, Type
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+
+
+def parse_fields(value: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """
+    Parse a comma separated list of response fields.
+
+    Returns None when no fields were requested, so callers can fall back to the
+    full response model. Fields not defined in `schema` are rejected.
+    """
+    if not value:
+        return None
+
+    fields = list(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in schema.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Unknown fields: {", ".join(unknown)}',
+        )
+    return fields or None
+
+
+def sparse_fields(schema: Type[BaseModel]) -> Callable[..., Optional[List[str]]]:
+    """Build a dependency that reads the `fields` query parameter for `schema`."""
+
+    def dependency(
+        fields: Optional[str] = Query(
+            default=None,
+            description='Comma separated list of fields to return',
+        ),
+    ) -> Optional[List[str]]:
+        return parse_fields(fields, schema)
+
+    return dependency
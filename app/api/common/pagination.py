@@ -0,0 +1,49 @@
+"""Opaque cursors for keyset pagination on (sort key, id)."""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, id: int) -> str:
+    if isinstance(value, datetime):
+        value = {'datetime': value.isoformat()}
+    payload = json.dumps([sort_by, sort_order, value, id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    """Return the (sort value, id) of the last row of the previous page."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_sort_by, cursor_sort_order, value, id = payload
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value['datetime'])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor'
+        )
+
+    if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Cursor does not match the requested sort',
+        )
+    return value, id
+
+
+def cursor_param(
+    cursor: Optional[str] = Query(
+        default=None,
+        description=(
+            'Keyset pagination cursor: pass an empty value for the first page, '
+            'then the next_cursor of the previous response. Without it, the '
+            'list is paged with skip/limit.'
+        ),
+    ),
+) -> Optional[str]:
+    return cursor
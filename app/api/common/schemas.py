@@ -1,6 +1,6 @@
 """Common schema definitions used across the API."""
 
-from typing import Generic, List, TypeVar
+from typing import Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel
 
@@ -33,3 +33,16 @@ class PaginatedResponse(BaseModel, Generic[T]):
 
     items: List[T]
     pagination: PaginationMetadata
+
+
+class CursorPaginatedResponse(BaseModel, Generic[T]):
+    """
+    A page of a keyset (cursor) paginated listing.
+
+    Attributes:
+        items: The list of items for the current page
+        next_cursor: Opaque cursor for the next page, None on the last page
+    """
+
+    items: List[T]
+    next_cursor: Optional[str] = None
@@ -1,24 +1,27 @@
-import json
 import urllib.parse
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
 
-from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from sqlalchemy import ColumnElement, func, insert
+from sqlalchemy.orm import Query, Session
 
 from app.api.applications.models import Application
 from app.api.base_crud import CRUDBase
+from app.api.citizens.models import Citizen
 from app.api.email_logs import models, schemas
 from app.api.email_logs.schemas import (
     EmailAttachment,
     EmailEvent,
     EmailLogCreate,
+    EmailMessage,
     EmailStatus,
 )
 from app.api.popup_city.models import PopUpCity
 from app.core.config import settings
 from app.core.database import SessionLocal
 from app.core.logger import logger
-from app.core.mail import send_mail
+from app.core.mail import POSTMARK_BATCH_SIZE, send_mail, send_mails
 from app.core.utils import create_spice, current_time, encode
 
 
@@ -48,9 +51,137 @@ def _generate_authenticate_url(
     return auth_url
 
 
+def resolve_citizen_ids(db: Session, emails: Iterable[str]) -> Dict[str, int]:
+    """Map each email to the id of the citizen it belongs to, in one query."""
+    emails = set(emails)
+    if not emails:
+        return {}
+    citizens = db.query(Citizen.primary_email, Citizen.id).filter(
+        Citizen.primary_email.in_(emails)
+    )
+    return {email: citizen_id for email, citizen_id in citizens}
+
+
+def _add_popup_params(event: str, popup_city: Optional[PopUpCity], params: dict) -> str:
+    """Add the popup's details to the email parameters and return its template."""
+    template = event
+    if popup_city:
+        template = popup_city.get_email_template(event)
+        params.update(
+            {
+                'popup_name': popup_city.name,
+                'web_url': popup_city.web_url,
+                'email_image': popup_city.email_image,
+                'contact_email': popup_city.contact_email,
+                'blog_url': popup_city.blog_url,
+                'twitter_url': popup_city.twitter_url,
+            }
+        )
+
+    params['portal_url'] = settings.FRONTEND_URL
+    return template
+
+
+class EmailLogBatch:
+    """
+    Collects the logs of the emails sent in a loop and writes them together.
+
+    Logs are written through the given session every `size` emails, on `flush`
+    (which `send_mails` calls after each Postmark batch) and when the batch is
+    closed. A failed write rolls the session back and raises, keeping the logs:
+
+        with EmailLogBatch(db) as log_batch:
+            for application in applications:
+                email_log.send_mail(..., log_batch=log_batch)
+    """
+
+    def __init__(self, db: Session, size: int = 500):
+        self.db = db
+        self.size = size
+        self.logs: List[EmailLogCreate] = []
+
+    def add(self, log: EmailLogCreate) -> None:
+        self.logs.append(log)
+        if len(self.logs) >= self.size:
+            self.flush()
+
+    def flush(self) -> None:
+        # Kept on failure, so closing the batch tries to write them again
+        email_log.create_many(self.db, self.logs)
+        self.logs = []
+
+    def __enter__(self) -> 'EmailLogBatch':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+
+# Email parameters that let their receiver log in or check in
+SECRET_PARAMS = ('code', 'the_url', 'ticketing_url', 'virtual_checkin_url', 'qr_codes')
+REDACTED = '[redacted]'
+
+
 class CRUDEmailLog(
     CRUDBase[models.EmailLog, schemas.EmailLogCreate, schemas.EmailLogCreate]
 ):
+    def _complete_projection(
+        self, db: Session, items: List[Dict[str, Any]], fields: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        for item in items:
+            params = item.get('params')
+            if params:
+                item['params'] = {
+                    k: REDACTED if k in SECRET_PARAMS else v for k, v in params.items()
+                }
+        return items
+
+    def _param_matches(self, key: str, value: Any) -> ColumnElement[bool]:
+        """Compare a JSON parameter as its own type, not as its text"""
+        element = self.model.params[key]
+        if isinstance(value, bool):
+            return element.as_boolean() == value
+        if isinstance(value, int):
+            return element.as_integer() == value
+        if isinstance(value, float):
+            return element.as_float() == value
+        if isinstance(value, str):
+            return element.as_string() == value
+        raise ValueError(f'Unsupported email log parameter filter: {key}')
+
+    def _apply_filters(
+        self, query: Query, filters: Optional[BaseModel] = None
+    ) -> Query:
+        params = getattr(filters, 'params', None)
+        if params:
+            # Match each given parameter instead of the whole JSON document
+            for key, value in params.items():
+                query = query.filter(self._param_matches(key, value))
+            filters = filters.model_copy(update={'params': None})
+
+        created_from = getattr(filters, 'created_from', None)
+        if created_from:
+            query = query.filter(self.model.created_at >= created_from)
+        created_to = getattr(filters, 'created_to', None)
+        if created_to:
+            query = query.filter(self.model.created_at < created_to)
+        return super()._apply_filters(query, filters)
+
+    def get_stats(
+        self, db: Session, filters: schemas.EmailLogQuery
+    ) -> List[Dict[str, Any]]:
+        """Number of logs per event and status"""
+        query = db.query(
+            self.model.event,
+            self.model.status,
+            func.count().label('count'),
+        )
+        query = self._apply_filters(query, filters)
+        rows = query.group_by(self.model.event, self.model.status).order_by(
+            self.model.event, self.model.status
+        )
+        return [row._asdict() for row in rows]
+
     def generate_authenticate_url(
         self,
         db: Session,
@@ -66,6 +197,32 @@ class CRUDEmailLog(
         popup_slug = application.popup_city.slug
         return _generate_authenticate_url(email, citizen.spice, citizen.id, popup_slug)
 
+    def create_many(self, db: Session, logs: Sequence[EmailLogCreate]) -> None:
+        """Insert the logs in one statement, filling in the citizen ids."""
+        if not logs:
+            return
+
+        columns = self.model.__table__.columns.keys()
+        rows = [
+            {k: v for k, v in log.model_dump().items() if k in columns} for log in logs
+        ]
+        try:
+            citizen_ids = resolve_citizen_ids(
+                db, (row['receiver_email'] for row in rows if not row['citizen_id'])
+            )
+            now = current_time()
+            for row in rows:
+                row['citizen_id'] = row['citizen_id'] or citizen_ids.get(
+                    row['receiver_email']
+                )
+                row['created_at'] = row['created_at'] or now
+
+            db.execute(insert(self.model), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
     def get_by_email(self, db: Session, email: str) -> List[models.EmailLog]:
         return db.query(self.model).filter(self.model.receiver_email == email).all()
 
@@ -83,6 +240,7 @@ class CRUDEmailLog(
         citizen_id: Optional[int] = None,
         popup_slug: Optional[str] = None,
         attachments: Optional[List[EmailAttachment]] = None,
+        log_batch: Optional[EmailLogBatch] = None,
     ) -> dict:
         if send_at and not entity_type and not entity_id:
             raise ValueError(
@@ -95,24 +253,9 @@ class CRUDEmailLog(
                 receiver_mail, spice, citizen_id, popup_slug
             )
 
-        db = SessionLocal()
         status = EmailStatus.FAILED
         error_message = None
-        template = event
-        if popup_city:
-            template = popup_city.get_email_template(event)
-            params.update(
-                {
-                    'popup_name': popup_city.name,
-                    'web_url': popup_city.web_url,
-                    'email_image': popup_city.email_image,
-                    'contact_email': popup_city.contact_email,
-                    'blog_url': popup_city.blog_url,
-                    'twitter_url': popup_city.twitter_url,
-                }
-            )
-
-        params['portal_url'] = settings.FRONTEND_URL
+        template = _add_popup_params(event, popup_city, params)
         try:
             if send_at is not None:
                 logger.info('Scheduled email to be sent at %s', send_at)
@@ -131,25 +274,82 @@ class CRUDEmailLog(
             error_message = str(e)
             raise
         finally:
+            email_log_data = EmailLogCreate(
+                receiver_email=receiver_mail,
+                popup_city_id=popup_city.id if popup_city else None,
+                template=template,
+                event=event,
+                params=params,
+                status=status,
+                send_at=send_at,
+                error_message=error_message,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                citizen_id=citizen_id,
+            )
+            if log_batch is not None:
+                # Batched emails are de-duplicated by their logs, so a failed
+                # write stops the caller instead of sending them again
+                log_batch.add(email_log_data)
+            else:
+                try:
+                    with SessionLocal() as db:
+                        self.create_many(db, [email_log_data])
+                except Exception as db_error:
+                    logger.error('Failed to log email: %s', str(db_error))
+
+    def send_mails(
+        self,
+        messages: Sequence[EmailMessage],
+        *,
+        popup_city: Optional[PopUpCity] = None,
+        log_batch: EmailLogBatch,
+    ) -> List[EmailStatus]:
+        """Send the emails in Postmark batches and log them, returning their status."""
+        statuses = []
+        for i in range(0, len(messages), POSTMARK_BATCH_SIZE):
+            chunk = messages[i : i + POSTMARK_BATCH_SIZE]
+            prepared = []
+            for message in chunk:
+                params = dict(message.params)
+                template = _add_popup_params(message.event, popup_city, params)
+                prepared.append(
+                    {
+                        'receiver_mail': message.receiver_email,
+                        'template': template,
+                        'params': params,
+                        'attachments': message.attachments,
+                    }
+                )
+
             try:
-                email_log_data = EmailLogCreate(
-                    receiver_email=receiver_mail,
-                    popup_city_id=popup_city.id if popup_city else None,
-                    template=template,
-                    event=event,
-                    params=params,
-                    status=status,
-                    send_at=send_at,
-                    error_message=error_message,
-                    entity_type=entity_type,
-                    entity_id=entity_id,
-                    attachments=attachments,
+                results = send_mails(prepared)
+            except Exception as e:
+                logger.error('Failed to send a batch of emails: %s', str(e))
+                results = [
+                    {'status': EmailStatus.FAILED, 'error_message': str(e)}
+                ] * len(chunk)
+
+            for message, sent, result in zip(chunk, prepared, results):
+                statuses.append(result['status'])
+                log_batch.add(
+                    EmailLogCreate(
+                        receiver_email=message.receiver_email,
+                        popup_city_id=popup_city.id if popup_city else None,
+                        template=sent['template'],
+                        event=message.event,
+                        params=sent['params'],
+                        status=result['status'],
+                        error_message=result.get('error_message'),
+                        entity_type=message.entity_type,
+                        entity_id=message.entity_id,
+                        citizen_id=message.citizen_id,
+                    )
                 )
-                self.create(db, obj=email_log_data)
-            except Exception as db_error:
-                logger.error('Failed to log email: %s', str(db_error))
-            finally:
-                db.close()
+            # Sent emails are de-duplicated by their logs, so write them before
+            # sending more, or a crash would send the chunk again on the next run
+            log_batch.flush()
+        return statuses
 
     def send_login_mail(
         self,
@@ -185,7 +385,7 @@ class CRUDEmailLog(
                 continue
 
             try:
-                params = json.loads(email.params)
+                params = email.params or {}
                 send_mail(
                     receiver_mail=email.receiver_email,
                     template=email.template,
@@ -207,10 +407,13 @@ class CRUDEmailLog(
                     )
                     db.rollback()
 
-    def cancel_scheduled_emails(self, db: Session, entity_type: str, entity_id: int):
+    def cancel_scheduled_emails(
+        self, db: Session, entity_type: str, entity_id: Union[int, List[int]]
+    ):
+        entity_ids = entity_id if isinstance(entity_id, list) else [entity_id]
         db.query(self.model).filter(
             self.model.entity_type == entity_type,
-            self.model.entity_id == entity_id,
+            self.model.entity_id.in_(entity_ids),
             self.model.status == EmailStatus.SCHEDULED,
         ).update({'status': EmailStatus.CANCELLED})
         db.commit()
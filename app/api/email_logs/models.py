@@ -1,8 +1,25 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, event
+from typing import TYPE_CHECKING
 
-from app.core.database import Base, SessionLocal
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, relationship
+from sqlalchemy.types import JSON
+
+from app.core.database import Base
 from app.core.utils import current_time
 
+if TYPE_CHECKING:
+    from app.api.applications.models import Application
+    from app.api.popup_city.models import EmailTemplate
+
 
 class EmailLog(Base):
     __tablename__ = 'email_logs'
@@ -17,7 +34,7 @@ class EmailLog(Base):
     receiver_email = Column(String, nullable=False, index=True)
     event = Column(String, nullable=False)
     template = Column(String, nullable=False)
-    params = Column(String)  # JSON string of parameters
+    params = Column(JSON().with_variant(JSONB(), 'postgresql'))
     status = Column(String)  # success, failed, scheduled, canceled
     send_at = Column(DateTime, nullable=True)
     error_message = Column(String, nullable=True)
@@ -32,23 +49,63 @@ class EmailLog(Base):
     created_by = Column(String)
     updated_by = Column(String)
 
+    __table_args__ = (
+        # Emails already sent for an entity, e.g. the unique email webhook check
+        Index(
+            'ix_email_logs_entity_event_status',
+            entity_type,
+            entity_id,
+            event,
+            status,
+        ),
+        # Receivers of the emails of a template, e.g. the check-in emails
+        Index('ix_email_logs_template_receiver', template, receiver_email),
+        # Email log listing and stats by date range
+        Index('ix_email_logs_created_event_status', created_at, event, status),
+        # Frequencies of the reminders already sent to an application
+        Index(
+            'ix_email_logs_reminder_freq',
+            entity_id,
+            template,
+            params['freq'].as_string(),
+        ),
+    )
+
 
-@event.listens_for(EmailLog, 'before_insert')
-def set_citizen_id(mapper, connection, target):
-    if target.citizen_id or not target.receiver_email:
-        return
+class ReminderSchedule(Base):
+    """
+    Pending reminders of a template for an application.
 
-    session = SessionLocal.object_session(target)
-    if not session:
-        return
+    `remaining_frequencies` holds the frequencies not sent yet, in order, and
+    `next_due_at` is when the first of them is due, counted from `starts_at`.
+    The row is deleted once all of them were sent or the application stops
+    qualifying for the reminder.
+    """
 
-    from app.api.citizens.models import Citizen
+    __tablename__ = 'reminder_schedules'
 
-    citizen = (
-        session.query(Citizen)
-        .filter(Citizen.primary_email == target.receiver_email)
-        .first()
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    application_id = Column(
+        Integer, ForeignKey('applications.id', ondelete='CASCADE'), nullable=False
+    )
+    email_template_id = Column(
+        Integer,
+        ForeignKey('popup_email_templates.id', ondelete='CASCADE'),
+        nullable=False,
     )
+    starts_at = Column(DateTime, nullable=False)
+    next_due_at = Column(DateTime, nullable=False)
+    remaining_frequencies = Column(String, nullable=False)
 
-    if citizen:
-        target.citizen_id = citizen.id
+    created_at = Column(DateTime, default=current_time)
+    updated_at = Column(DateTime, default=current_time, onupdate=current_time)
+
+    application: Mapped['Application'] = relationship('Application')
+    email_template: Mapped['EmailTemplate'] = relationship('EmailTemplate')
+
+    __table_args__ = (
+        UniqueConstraint(
+            'application_id', 'email_template_id', name='uix_reminder_application'
+        ),
+        Index('ix_reminder_schedules_due', 'email_template_id', 'next_due_at'),
+    )
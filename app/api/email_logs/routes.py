@@ -0,0 +1,59 @@
+from datetime import timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+from app.api.common.fields import sparse_fields
+from app.api.common.pagination import cursor_param
+from app.api.common.schemas import CursorPaginatedResponse
+from app.api.email_logs import schemas
+from app.api.email_logs.crud import email_log as email_log_crud
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.utils import current_time
+
+router = APIRouter()
+
+# Stats without a start date cover this period, so they don't scan the whole table
+STATS_DEFAULT_PERIOD = timedelta(days=30)
+
+
+def _check_api_key(x_api_key: str) -> None:
+    if x_api_key != settings.EMAIL_LOGS_API_KEY:
+        raise HTTPException(status_code=403, detail='Invalid API key')
+
+
+@router.get('/', response_model=CursorPaginatedResponse[schemas.EmailLog])
+def get_email_logs(
+    filters: schemas.EmailLogQuery = Depends(),
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[str] = Depends(cursor_param),
+    fields: Optional[List[str]] = Depends(sparse_fields(schemas.EmailLog)),
+    x_api_key: str = Header(...),
+    db: Session = Depends(get_db),
+):
+    _check_api_key(x_api_key)
+
+    email_logs, next_cursor = email_log_crud.find_page(
+        db=db,
+        cursor=cursor or '',
+        limit=limit,
+        filters=filters,
+        projection=fields or list(schemas.EmailLog.model_fields),
+    )
+    return ORJSONResponse({'items': email_logs, 'next_cursor': next_cursor})
+
+
+@router.get('/stats', response_model=List[schemas.EmailLogStats])
+def get_email_log_stats(
+    filters: schemas.EmailLogQuery = Depends(),
+    x_api_key: str = Header(...),
+    db: Session = Depends(get_db),
+):
+    _check_api_key(x_api_key)
+
+    if filters.created_from is None:
+        filters.created_from = current_time() - STATS_DEFAULT_PERIOD
+    return email_log_crud.get_stats(db=db, filters=filters)
@@ -1,9 +1,8 @@
-import json
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field, field_serializer
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class EmailStatus(str, Enum):
@@ -22,17 +21,22 @@ class EmailEvent(str, Enum):
     CHECK_IN = 'check-in'
 
 
-class EmailLogFilter(BaseModel):
+class EmailLogQuery(BaseModel):
+    """Email log filters accepted as query parameters"""
+
     receiver_email: Optional[str] = None
+    event: Optional[str] = None
     template: Optional[str] = None
     status: Optional[EmailStatus] = None
-    params: Optional[dict] = None
+    entity_type: Optional[str] = None
+    entity_id: Optional[int] = None
+    popup_city_id: Optional[int] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
 
-    @field_serializer('params')
-    def serialize_params(self, params: Optional[dict]) -> Optional[str]:
-        if params is None or not params:
-            return None
-        return json.dumps(params, sort_keys=True)
+
+class EmailLogFilter(EmailLogQuery):
+    params: Optional[dict] = None
 
 
 class EmailAttachment(BaseModel):
@@ -46,6 +50,18 @@ class EmailAttachment(BaseModel):
     )
 
 
+class EmailMessage(BaseModel):
+    """An email to send in a batch, see `CRUDEmailLog.send_mails`"""
+
+    receiver_email: str
+    event: str
+    params: dict = {}
+    entity_type: Optional[str] = None
+    entity_id: Optional[int] = None
+    citizen_id: Optional[int] = None
+    attachments: Optional[List[EmailAttachment]] = None
+
+
 class EmailLogBase(BaseModel):
     receiver_email: str
     template: str
@@ -57,13 +73,10 @@ class EmailLogBase(BaseModel):
     entity_id: Optional[int] = None
     error_message: Optional[str] = None
     popup_city_id: Optional[int] = None
+    citizen_id: Optional[int] = None
     attachments: Optional[List[EmailAttachment]] = None
     created_at: Optional[datetime] = None
 
-    @field_serializer('params')
-    def serialize_params(self, params: dict) -> str:
-        return json.dumps(params, sort_keys=True)
-
 
 class EmailLogCreate(EmailLogBase):
     pass
@@ -75,3 +88,9 @@ class EmailLog(EmailLogBase):
     model_config = ConfigDict(
         from_attributes=True,
     )
+
+
+class EmailLogStats(BaseModel):
+    event: str
+    status: Optional[EmailStatus] = None
+    count: int
@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import List, Optional, Union
 
 from fastapi import HTTPException, status
+from sqlalchemy import ColumnElement, exists, false, true
 from sqlalchemy.orm import Session
 
 from app.api.applications.crud import application as applications_crud
@@ -30,6 +31,16 @@ class CRUDGroup(CRUDBase[models.Group, schemas.GroupBase, schemas.GroupBase]):
 
         return any(leader.id == user.citizen_id for leader in db_obj.leaders)
 
+    def _permission_filter(self, user: TokenData) -> ColumnElement[bool]:
+        if not user:
+            return false()
+        if user == SYSTEM_TOKEN:
+            return true()
+        return exists().where(
+            models.GroupLeader.group_id == models.Group.id,
+            models.GroupLeader.citizen_id == user.citizen_id,
+        )
+
     def find(
         self,
         db: Session,
@@ -39,6 +50,7 @@ class CRUDGroup(CRUDBase[models.Group, schemas.GroupBase, schemas.GroupBase]):
         user: Optional[TokenData] = None,
         sort_by: str = 'created_at',
         sort_order: str = 'desc',
+        cursor: Optional[str] = None,
     ) -> List[models.Group]:
         """Only return groups where the user is a leader"""
         if not user:
@@ -50,19 +62,10 @@ class CRUDGroup(CRUDBase[models.Group, schemas.GroupBase, schemas.GroupBase]):
         ).filter(models.GroupLeader.citizen_id == user.citizen_id)
 
         query = self._apply_filters(query, filters)
-
-        if not hasattr(self.model, sort_by):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f'Invalid sort field: {sort_by}',
-            )
-
-        order_by = getattr(self.model, sort_by)
-        if sort_order == 'desc':
-            order_by = order_by.desc()
-
-        query = query.order_by(order_by)
-        return query.offset(skip).limit(limit).all()
+        query = self._apply_sorting(query, sort_by, sort_order, cursor)
+        if cursor is None:
+            query = query.offset(skip)
+        return query.limit(limit).all()
 
     def _validate_member_addition(
         self,
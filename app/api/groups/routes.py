@@ -1,9 +1,11 @@
-from typing import List, Union
+from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.api.applications.schemas import Application, ApplicationWithAuth
+from app.api.common.pagination import cursor_param
+from app.api.common.schemas import CursorPaginatedResponse
 from app.api.groups import schemas
 from app.api.groups.crud import group as group_crud
 from app.core.config import settings
@@ -14,16 +16,32 @@ from app.core.security import TokenData, get_current_user
 router = APIRouter()
 
 
-@router.get('/', response_model=list[schemas.Group])
+@router.get(
+    '/',
+    response_model=Union[list[schemas.Group], CursorPaginatedResponse[schemas.Group]],
+)
 def get_groups(
     current_user: TokenData = Depends(get_current_user),
     filters: schemas.GroupFilter = Depends(),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=100),
+    cursor: Optional[str] = Depends(cursor_param),
     sort_by: str = Query(default='name', description='Field to sort by'),
     sort_order: str = Query(default='asc', pattern='^(asc|desc)$'),
     db: Session = Depends(get_db),
 ):
+    if cursor is not None:
+        groups, next_cursor = group_crud.find_page(
+            db=db,
+            cursor=cursor,
+            limit=limit,
+            filters=filters,
+            user=current_user,
+            sort_by=sort_by,
+            sort_order=sort_order,
+        )
+        return {'items': groups, 'next_cursor': next_cursor}
+
     return group_crud.find(
         db=db,
         skip=skip,
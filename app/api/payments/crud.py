@@ -1,11 +1,18 @@
-from typing import List, Optional
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 from fastapi import HTTPException
+from sqlalchemy import ColumnElement, exists
 from sqlalchemy.orm import Query, Session
 
+from app.api.application_events.crud import application_event as event_crud
+from app.api.application_events.schemas import ApplicationEventType
+from app.api.applications.crud import application as application_crud
 from app.api.applications.models import Application
+from app.api.attendees.crud import attendee as attendee_crud
 from app.api.attendees.models import Attendee, AttendeeProduct
 from app.api.base_crud import CRUDBase
+from app.api.check_in.codes import check_in_codes
 from app.api.coupon_codes.crud import coupon_code as coupon_code_crud
 from app.api.email_logs.crud import email_log
 from app.api.email_logs.schemas import EmailEvent
@@ -20,9 +27,17 @@ from app.core.security import TokenData
 class CRUDPayment(
     CRUDBase[models.Payment, schemas.PaymentCreate, schemas.PaymentUpdate]
 ):
+    nested_fields = ('products_snapshot',)
+
     def _check_permission(self, db_obj: models.Payment, user: TokenData) -> bool:
         return db_obj.application.citizen_id == user.citizen_id
 
+    def _permission_filter(self, user: TokenData) -> ColumnElement[bool]:
+        return exists().where(
+            Application.id == models.Payment.application_id,
+            Application.citizen_id == user.citizen_id,
+        )
+
     def _apply_filters(
         self, query: Query, filters: Optional[schemas.BaseModel] = None
     ) -> Query:
@@ -44,11 +59,48 @@ class CRUDPayment(
         limit: int = 100,
         filters: Optional[schemas.PaymentFilter] = None,
         user: Optional[TokenData] = None,
-    ) -> List[models.Payment]:
+        sort_by: str = 'created_at',
+        sort_order: str = 'desc',
+        projection: Optional[Sequence[str]] = None,
+        cursor: Optional[str] = None,
+    ) -> Union[List[models.Payment], List[Dict[str, Any]]]:
         if user:
             filters = filters or schemas.PaymentFilter()
             filters.citizen_id = user.citizen_id
-        return super().find(db, skip, limit, filters)
+        return super().find(
+            db,
+            skip,
+            limit,
+            filters,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            projection=projection,
+            cursor=cursor,
+        )
+
+    def _complete_projection(
+        self, db: Session, items: List[Dict[str, Any]], fields: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        if 'products_snapshot' not in fields or not items:
+            return items
+
+        columns = [
+            getattr(models.PaymentProduct, field).label(field)
+            for field in schemas.PaymentProductResponse.model_fields
+        ]
+        rows = (
+            db.query(models.PaymentProduct.payment_id.label('_payment_id'), *columns)
+            .filter(models.PaymentProduct.payment_id.in_([i['id'] for i in items]))
+            .all()
+        )
+        snapshots = defaultdict(list)
+        for row in rows:
+            snapshot = dict(row._mapping)
+            snapshots[snapshot.pop('_payment_id')].append(snapshot)
+
+        for item in items:
+            item['products_snapshot'] = snapshots[item['id']]
+        return items
 
     def preview(
         self,
@@ -115,12 +167,26 @@ class CRUDPayment(
                 coupon_code_crud.use_coupon_code(db, db_payment.coupon_code_id)
 
             self._add_products_to_attendees(db_payment)
+            attendee_crud.refresh_stay_summary(db, [obj.application_id])
+            application_crud.refresh_attendees_directory(db, [obj.application_id])
+            self._record_approval(db, db_payment)
             self._send_payment_confirmed_email(db_payment)
 
         db.commit()
         db.refresh(db_payment)
+        if db_payment.status == 'approved':
+            check_in_codes.invalidate(db_payment.application.popup_city_id)
         return db_payment
 
+    def _record_approval(self, db: Session, payment: models.Payment) -> None:
+        event_crud.record(
+            db,
+            application_id=payment.application_id,
+            popup_city_id=payment.application.popup_city_id,
+            event_type=ApplicationEventType.PAYMENT_APPROVED,
+            status=payment.application.status,
+        )
+
     def _add_products_to_attendees(self, payment: models.Payment) -> None:
         if not payment.products_snapshot:
             return
@@ -201,10 +267,15 @@ class CRUDPayment(
             coupon_code_crud.use_coupon_code(db, payment.coupon_code_id)
 
         self._add_products_to_attendees(payment)
+        attendee_crud.refresh_stay_summary(db, [payment.application_id])
+        application_crud.refresh_attendees_directory(db, [payment.application_id])
+        self._record_approval(db, payment)
         self._send_payment_confirmed_email(payment)
 
         logger.info('Payment %s approved', payment.id)
         db.commit()
+        # The attendees may have just got their products
+        check_in_codes.invalidate(payment.application.popup_city_id)
         return updated_payment
 
 
@@ -1,6 +1,15 @@
 from typing import TYPE_CHECKING, List
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.orm import Mapped, relationship
 
 from app.core.database import Base
@@ -70,3 +79,8 @@ class Payment(Base):
 
     created_at = Column(DateTime, default=current_time)
     updated_at = Column(DateTime, default=current_time, onupdate=current_time)
+
+    # Approved payments of an application, e.g. the check-in and reminder emails
+    __table_args__ = (
+        Index('ix_payments_application_status', application_id, status, created_at),
+    )
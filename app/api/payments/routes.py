@@ -1,6 +1,12 @@
+from typing import List, Optional, Union
+
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
+from app.api.common.fields import sparse_fields
+from app.api.common.pagination import cursor_param
+from app.api.common.schemas import CursorPaginatedResponse
 from app.api.payments import schemas
 from app.api.payments.crud import payment as payment_crud
 from app.core.database import get_db
@@ -10,21 +16,42 @@ from app.core.security import TokenData, get_current_user
 router = APIRouter()
 
 
-@router.get('/', response_model=list[schemas.Payment])
+@router.get(
+    '/',
+    response_model=Union[
+        list[schemas.Payment], CursorPaginatedResponse[schemas.Payment]
+    ],
+)
 def get_payments(
     current_user: TokenData = Depends(get_current_user),
     filters: schemas.PaymentFilter = Depends(),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=100),
+    cursor: Optional[str] = Depends(cursor_param),
+    fields: Optional[List[str]] = Depends(sparse_fields(schemas.Payment)),
     db: Session = Depends(get_db),
 ):
-    return payment_crud.find(
+    projection = fields or list(schemas.Payment.model_fields)
+    if cursor is not None:
+        payments, next_cursor = payment_crud.find_page(
+            db=db,
+            cursor=cursor,
+            limit=limit,
+            filters=filters,
+            user=current_user,
+            projection=projection,
+        )
+        return ORJSONResponse({'items': payments, 'next_cursor': next_cursor})
+
+    payments = payment_crud.find(
         db=db,
         skip=skip,
         limit=limit,
         filters=filters,
         user=current_user,
+        projection=projection,
     )
+    return ORJSONResponse(payments)
 
 
 @router.get('/{payment_id}', response_model=schemas.Payment)
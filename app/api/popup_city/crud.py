@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 
 from app.api.base_crud import CRUDBase
 from app.api.popup_city import models, schemas
+from app.api.popup_city.templates import email_templates
 from app.core.logger import logger
 from app.core.utils import current_time
 
@@ -15,23 +16,12 @@ class CRUDPopUpCity(
     def get_by_name(self, db: Session, name: str) -> Optional[models.PopUpCity]:
         return db.query(self.model).filter(self.model.name == name).first()
 
-    def get_email_template(
-        self, db: Session, popup_city_id: int, template: str
-    ) -> Optional[models.EmailTemplate]:
-        email_template = (
-            db.query(models.EmailTemplate)
-            .filter(
-                models.EmailTemplate.popup_city_id == popup_city_id,
-                models.EmailTemplate.event == template,
-            )
-            .first()
-        )
-        if not email_template:
-            error_message = (
-                f'Email template not found for {template} in popup city {popup_city_id}'
-            )
-            logger.error(error_message)
-            raise ValueError(error_message)
+    def get_email_template(self, db: Session, popup_city_id: int, template: str) -> str:
+        try:
+            email_template = email_templates.get(db, popup_city_id, template)
+        except ValueError as e:
+            logger.error(str(e))
+            raise
 
         logger.info('Email template found %s', email_template.template)
         return email_template.template
@@ -1,7 +1,18 @@
 from typing import List
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
-from sqlalchemy.orm import Mapped, relationship
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    Sequence,
+    String,
+    event,
+)
+from sqlalchemy.orm import Mapped, Session, relationship
 
 from app.api.email_logs.schemas import EmailEvent
 from app.core.database import Base
@@ -16,6 +27,9 @@ class EmailTemplate(Base):
     event = Column(String, nullable=False)
     template = Column(String, nullable=False)
     frequency = Column(String)
+    # Stamped by triggers from `email_template_versions` on every insert and
+    # update, so (count, sum of versions) changes whenever the templates do
+    version = Column(Integer, nullable=False, server_default='0')
     created_at = Column(DateTime, default=current_time)
     updated_at = Column(DateTime, default=current_time, onupdate=current_time)
 
@@ -68,9 +82,69 @@ class PopUpCity(Base):
     updated_by = Column(String)
 
     def get_email_template(self, event: EmailEvent) -> str:
+        db = Session.object_session(self)
+        if db is not None:
+            from app.api.popup_city.templates import email_templates
+
+            return email_templates.get(db, self.id, event).template
+
         for t in self.templates:
             if t.event == event:
                 return t.template
         raise ValueError(
             f'No template found for event: {event} (popup_city: {self.id} {self.name})'
         )
+
+
+# On Postgres the versions come from a sequence, so concurrent edits never get the
+# same one. SQLite runs one write at a time, so it takes one more than the highest.
+email_template_versions = Sequence('email_template_versions', metadata=Base.metadata)
+
+_POSTGRES_VERSION_TRIGGER = (
+    """
+CREATE OR REPLACE FUNCTION stamp_email_template_version() RETURNS trigger AS $$
+BEGIN
+    NEW.version := nextval('email_template_versions');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+""",
+    """
+CREATE TRIGGER email_template_version
+BEFORE INSERT OR UPDATE ON popup_email_templates
+FOR EACH ROW EXECUTE FUNCTION stamp_email_template_version()
+""",
+)
+
+_SQLITE_VERSION_TRIGGER = (
+    """
+CREATE TRIGGER email_template_version_insert AFTER INSERT ON popup_email_templates
+BEGIN
+    UPDATE popup_email_templates
+    SET version = (SELECT MAX(version) + 1 FROM popup_email_templates)
+    WHERE id = NEW.id;
+END
+""",
+    """
+CREATE TRIGGER email_template_version_update
+AFTER UPDATE OF popup_city_id, event, template, frequency ON popup_email_templates
+BEGIN
+    UPDATE popup_email_templates
+    SET version = (SELECT MAX(version) + 1 FROM popup_email_templates)
+    WHERE id = NEW.id;
+END
+""",
+)
+
+for statement in _POSTGRES_VERSION_TRIGGER:
+    event.listen(
+        EmailTemplate.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='postgresql'),
+    )
+for statement in _SQLITE_VERSION_TRIGGER:
+    event.listen(
+        EmailTemplate.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='sqlite'),
+    )
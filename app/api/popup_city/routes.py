@@ -1,6 +1,11 @@
+from typing import Optional, Union
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
+from app.api.common.pagination import cursor_param
+from app.api.common.schemas import CursorPaginatedResponse
 from app.api.popup_city import schemas
 from app.api.popup_city.crud import popup_city as popup_city_crud
 from app.core.database import get_db
@@ -9,22 +14,42 @@ from app.core.security import TokenData, get_current_user
 router = APIRouter()
 
 
-@router.get('/', response_model=list[schemas.PopUpCity])
+@router.get(
+    '/',
+    response_model=Union[
+        list[schemas.PopUpCity], CursorPaginatedResponse[schemas.PopUpCity]
+    ],
+)
 def get_popup_cities(
     current_user: TokenData = Depends(get_current_user),
     skip: int = 0,
+    # Unbounded as before for offset pages; `find_page` checks cursor pages
     limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
     sort_by: str = Query(default='portal_order', description='Field to sort by'),
     sort_order: str = Query(default='asc', pattern='^(asc|desc)$'),
     db: Session = Depends(get_db),
 ):
-    return popup_city_crud.find(
+    if cursor is not None:
+        popups, next_cursor = popup_city_crud.find_page(
+            db=db,
+            cursor=cursor,
+            limit=limit,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            projection=list(schemas.PopUpCity.model_fields),
+        )
+        return ORJSONResponse({'items': popups, 'next_cursor': next_cursor})
+
+    popups = popup_city_crud.find(
         db=db,
         skip=skip,
         limit=limit,
         sort_by=sort_by,
         sort_order=sort_order,
+        projection=list(schemas.PopUpCity.model_fields),
     )
+    return ORJSONResponse(popups)
 
 
 @router.get('/{popup_city_id}', response_model=schemas.PopUpCity)
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -34,3 +34,11 @@ class PopUpCity(PopUpCityBase):
     model_config = ConfigDict(
         from_attributes=True,
     )
+
+
+class EmailTemplate(BaseModel):
+    id: int
+    popup_city_id: int
+    event: str
+    template: str
+    frequencies: List[timedelta] = []
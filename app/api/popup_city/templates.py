@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+from enum import Enum
+from threading import Lock
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.api.popup_city import models, schemas
+from app.core.logger import logger
+from app.core.utils import current_time
+
+
+def parse_frequency(frequency: str) -> timedelta:
+    """Parse a reminder frequency such as `30m`, `12h`, `1d` or `2w`."""
+    if frequency.endswith('m'):
+        return timedelta(minutes=int(frequency[:-1]))
+    elif frequency.endswith('h'):
+        return timedelta(hours=int(frequency[:-1]))
+    elif frequency.endswith('d'):
+        return timedelta(days=int(frequency[:-1]))
+    elif frequency.endswith('w'):
+        return timedelta(weeks=int(frequency[:-1]))
+    raise ValueError(f'Invalid frequency: {frequency}')
+
+
+def format_frequency(frequency: timedelta) -> str:
+    """Inverse of `parse_frequency`, in the largest unit that fits exactly."""
+    minutes = int(frequency.total_seconds()) // 60
+    for unit, size in (('w', 7 * 24 * 60), ('d', 24 * 60), ('h', 60)):
+        if minutes and minutes % size == 0:
+            return f'{minutes // size}{unit}'
+    return f'{minutes}m'
+
+
+def parse_frequencies(frequency: Optional[str]) -> List[timedelta]:
+    """
+    Parse a comma separated list of frequencies, soonest first.
+
+    Invalid frequencies are logged and left out, so a typo in one template doesn't
+    stop its other reminders, nor the lookups of every other template.
+    """
+    frequencies = []
+    for f in (frequency or '').split(','):
+        if not f.strip():
+            continue
+        try:
+            frequencies.append(parse_frequency(f.strip()))
+        except ValueError:
+            logger.error('Skipping invalid frequency %r in %r', f.strip(), frequency)
+    return sorted(frequencies)
+
+
+class EmailTemplateRegistry:
+    """
+    In-process copy of the popup email templates, keyed by (popup_city_id, event).
+
+    The templates are loaded once and reloaded when their version stamp (see
+    `models.EmailTemplate.version`) changes. The stamp is read at most once per
+    `check_interval`, so an edit takes up to that long to reach every worker.
+    """
+
+    def __init__(self, check_interval: timedelta = timedelta(minutes=1)):
+        self._templates: Dict[Tuple[int, str], schemas.EmailTemplate] = {}
+        self._stamp: Optional[Tuple[int, Optional[int]]] = None
+        self._checked_at: Optional[datetime] = None
+        self._check_interval = check_interval
+        self._lock = Lock()
+
+    def _refresh(self, db: Session) -> None:
+        with self._lock:
+            now = current_time()
+            if self._checked_at and now - self._checked_at < self._check_interval:
+                return
+
+            Template = models.EmailTemplate
+            stamp = tuple(
+                db.query(func.count(Template.id), func.sum(Template.version)).one()
+            )
+            if stamp != self._stamp:
+                self._templates = {
+                    (t.popup_city_id, t.event): schemas.EmailTemplate(
+                        id=t.id,
+                        popup_city_id=t.popup_city_id,
+                        event=t.event,
+                        template=t.template,
+                        frequencies=parse_frequencies(t.frequency),
+                    )
+                    for t in db.query(Template)
+                }
+                self._stamp = stamp
+            self._checked_at = now
+
+    def get(
+        self, db: Session, popup_city_id: int, event: Union[str, Enum]
+    ) -> schemas.EmailTemplate:
+        self._refresh(db)
+        # Events are often str enums, which don't hash like their value
+        event = event.value if isinstance(event, Enum) else event
+        email_template = self._templates.get((popup_city_id, event))
+        if email_template is None:
+            raise ValueError(
+                f'Email template not found for {event} in popup city {popup_city_id}'
+            )
+        return email_template
+
+    def for_popup(self, db: Session, popup_city_id: int) -> List[schemas.EmailTemplate]:
+        self._refresh(db)
+        return [
+            t
+            for (popup_id, _), t in self._templates.items()
+            if popup_id == popup_city_id
+        ]
+
+    def invalidate(self) -> None:
+        """Reload the templates on the next lookup"""
+        with self._lock:
+            self._checked_at = None
+            self._stamp = None
+
+
+email_templates = EmailTemplateRegistry()
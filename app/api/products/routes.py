@@ -1,6 +1,11 @@
+from typing import Optional, Union
+
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
+from app.api.common.pagination import cursor_param
+from app.api.common.schemas import CursorPaginatedResponse
 from app.api.products import schemas
 from app.api.products.crud import product as product_crud
 from app.core.database import get_db
@@ -9,17 +14,36 @@ from app.core.security import TokenData, get_current_user
 router = APIRouter()
 
 
-@router.get('/', response_model=list[schemas.Product])
+@router.get(
+    '/',
+    response_model=Union[
+        list[schemas.Product], CursorPaginatedResponse[schemas.Product]
+    ],
+)
 def get_products(
     current_user: TokenData = Depends(get_current_user),
     filters: schemas.ProductFilter = Depends(),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=100),
+    cursor: Optional[str] = Depends(cursor_param),
     sort_by: str = Query(default='name', description='Field to sort by'),
     sort_order: str = Query(default='asc', pattern='^(asc|desc)$'),
     db: Session = Depends(get_db),
 ):
-    return product_crud.find(
+    if cursor is not None:
+        products, next_cursor = product_crud.find_page(
+            db=db,
+            cursor=cursor,
+            limit=limit,
+            filters=filters,
+            user=current_user,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            projection=list(schemas.Product.model_fields),
+        )
+        return ORJSONResponse({'items': products, 'next_cursor': next_cursor})
+
+    products = product_crud.find(
         db=db,
         skip=skip,
         limit=limit,
@@ -27,7 +51,9 @@ def get_products(
         user=current_user,
         sort_by=sort_by,
         sort_order=sort_order,
+        projection=list(schemas.Product.model_fields),
     )
+    return ORJSONResponse(products)
 
 
 @router.get('/{product_id}', response_model=schemas.Product)
@@ -5,6 +5,7 @@ import requests
 from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
+from app.api.applications.crud import application as application_crud
 from app.api.applications.crud import calculate_status
 from app.api.applications.models import Application
 from app.api.applications.schemas import ApplicationStatus
@@ -53,6 +54,12 @@ async def update_status_webhook(
             detail='Table name is not applications',
         )
 
+    # Rows edited in NocoDB bypass the API, so their directory entries are stale
+    application_crud.refresh_attendees_directory(
+        db, [row.id for row in webhook_payload.data.rows]
+    )
+    db.commit()
+
     table_id = webhook_payload.data.table_id
     url = f'{settings.NOCODB_URL}/api/v2/tables/{table_id}/records'
     headers = {
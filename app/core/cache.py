@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from threading import Lock
-from typing import Dict, Tuple
+from typing import Any, Dict, Hashable, Optional, Tuple
 
 from app.core.utils import current_time
 
@@ -38,3 +38,32 @@ class WebhookCache:
         ]
         for key in expired:
             del self._cache[key]
+
+
+class TTLCache:
+    """Thread-safe in-process cache whose values expire after a fixed time"""
+
+    def __init__(self, expiry: timedelta):
+        self._cache: Dict[Hashable, Tuple[datetime, Any]] = {}
+        self._expiry = expiry
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            timestamp, value = entry
+            if current_time() - timestamp > self._expiry:
+                del self._cache[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._cache[key] = (current_time(), value)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._cache.pop(key, None)
@@ -44,6 +44,8 @@ class Settings:
     ATTENDEES_TICKETS_API_KEY: str = os.getenv('ATTENDEES_TICKETS_API_KEY')
     GROUPS_API_KEY: str = os.getenv('GROUPS_API_KEY')
     CHECK_IN_API_KEY: str = os.getenv('CHECK_IN_API_KEY')
+    REVIEWS_API_KEY: str = os.getenv('REVIEWS_API_KEY')
+    EMAIL_LOGS_API_KEY: str = os.getenv('EMAIL_LOGS_API_KEY')
 
     APPLICATIONS_TABLE_ID: str = os.getenv('APPLICATIONS_TABLE_ID')
 
@@ -51,5 +53,18 @@ class Settings:
     POAP_CLIENT_ID: str = os.getenv('POAP_CLIENT_ID')
     POAP_CLIENT_SECRET: str = os.getenv('POAP_CLIENT_SECRET')
 
+    EMAIL_LOGS_RETENTION_MONTHS: int = int(
+        os.getenv('EMAIL_LOGS_RETENTION_MONTHS') or 12
+    )
+    # Must be durable storage, as archived logs are deleted from the database
+    EMAIL_LOGS_ARCHIVE_DIR: str = os.getenv('EMAIL_LOGS_ARCHIVE_DIR')
+    QR_CACHE_DIR: str = os.getenv('QR_CACHE_DIR') or 'qr_cache'
+    # Popups whose check-in emails are sent in parallel
+    CHECK_IN_WORKERS: int = int(os.getenv('CHECK_IN_WORKERS') or 4)
+    # Attach the QR images to check-in emails, besides linking them
+    CHECK_IN_QR_ATTACHMENTS: bool = (
+        os.getenv('CHECK_IN_QR_ATTACHMENTS', 'true').lower() == 'true'
+    )
+
 
 settings = Settings()
@@ -1,24 +1,29 @@
+from typing import List
+
 import requests
 
 from app.api.email_logs.schemas import EmailAttachment, EmailStatus
 from app.core.config import Environment, settings
 from app.core.logger import logger
 
+# Most messages Postmark accepts in one batch request
+POSTMARK_BATCH_SIZE = 500
 
-def send_mail(
-    receiver_mail: str,
-    *,
-    template: str,
-    params: dict,
-    attachments: list[EmailAttachment] = None,
-):
-    logger.info('sending %s email to %s', template, receiver_mail)
-    url = 'https://api.postmarkapp.com/email/withTemplate'
-    headers = {
+
+def _headers() -> dict:
+    return {
         'Accept': 'application/json',
         'Content-Type': 'application/json',
         'X-Postmark-Server-Token': settings.POSTMARK_API_TOKEN,
     }
+
+
+def _message(
+    receiver_mail: str,
+    template: str,
+    params: dict,
+    attachments: list[EmailAttachment] = None,
+) -> dict:
     data = {
         'From': f'{settings.EMAIL_FROM_NAME} <{settings.EMAIL_FROM_ADDRESS}>',
         'To': receiver_mail,
@@ -30,11 +35,53 @@ def send_mail(
 
     if attachments:
         data['Attachments'] = [a.model_dump(by_alias=True) for a in attachments]
+    return data
+
+
+def send_mail(
+    receiver_mail: str,
+    *,
+    template: str,
+    params: dict,
+    attachments: list[EmailAttachment] = None,
+):
+    logger.info('sending %s email to %s', template, receiver_mail)
+    url = 'https://api.postmarkapp.com/email/withTemplate'
+    data = _message(receiver_mail, template, params, attachments)
 
     if settings.ENVIRONMENT == Environment.TEST:
         return {'status': EmailStatus.SUCCESS}
 
-    response = requests.post(url, json=data, headers=headers)
+    response = requests.post(url, json=data, headers=_headers())
     response.raise_for_status()
 
     return {'status': EmailStatus.SUCCESS, 'response': response.json()}
+
+
+def send_mails(messages: List[dict]) -> List[dict]:
+    """
+    Send up to POSTMARK_BATCH_SIZE templated emails in one request.
+
+    Each message has the `send_mail` arguments (`receiver_mail`, `template`,
+    `params` and optionally `attachments`). Returns the outcome of each message,
+    in order, with the error message of the ones Postmark rejected.
+    """
+    logger.info('sending a batch of %s emails', len(messages))
+    url = 'https://api.postmarkapp.com/email/batchWithTemplates'
+    data = {'Messages': [_message(**message) for message in messages]}
+
+    if settings.ENVIRONMENT == Environment.TEST:
+        return [{'status': EmailStatus.SUCCESS} for _ in messages]
+
+    response = requests.post(url, json=data, headers=_headers())
+    response.raise_for_status()
+
+    results = []
+    for result in response.json():
+        if result.get('ErrorCode'):
+            results.append(
+                {'status': EmailStatus.FAILED, 'error_message': result.get('Message')}
+            )
+        else:
+            results.append({'status': EmailStatus.SUCCESS, 'response': result})
+    return results
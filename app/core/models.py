@@ -1,4 +1,5 @@
 # Import all models here to ensure SQLAlchemy can set up relationships correctly
+from app.api.application_events.models import ApplicationEvent
 from app.api.applications.models import Application
 from app.api.attendees.models import Attendee
 from app.api.citizens.models import Citizen
@@ -10,6 +11,7 @@ from app.api.products.models import Product
 
 # Re-export all models
 __all__ = [
+    'ApplicationEvent',
     'Application',
     'Attendee',
     'Citizen',
@@ -249,7 +249,7 @@ def _prepare_payment_response(
     obj: schemas.PaymentCreate,
     user: TokenData,
 ) -> Tuple[schemas.PaymentPreview, Application, List[Product]]:
-    application = application_crud.get(db, obj.application_id, user)
+    application = application_crud.get(db, obj.application_id, user, profile='payment')
     _validate_application(application)
 
     requested_product_ids = [p.product_id for p in obj.products]
@@ -0,0 +1,182 @@
+import base64
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from io import BytesIO
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+import jwt
+import qrcode
+import qrcode.image.svg
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.utils import encode
+
+# Misses below this are rendered inline, where starting a pool costs more
+MIN_POOL_BATCH = 8
+QR_TOKEN_EXPIRY = timedelta(days=90)
+# Pools are started from worker threads (one per popup in the check-in emails),
+# and forking there can copy locks held by other threads, so start them clean
+POOL_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+
+class QRFormat(str, Enum):
+    PNG = 'png'
+    SVG = 'svg'
+
+    @property
+    def media_type(self) -> str:
+        return 'image/png' if self == QRFormat.PNG else 'image/svg+xml'
+
+
+def render_qr(
+    data: str,
+    box_size: int = 10,
+    border: int = 4,
+    image_format: QRFormat = QRFormat.PNG,
+) -> bytes:
+    """Render the string as a QR code image."""
+    qr = qrcode.QRCode(
+        version=1,  # 1–40, controls size; fit=True grows it as needed
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,  # size of each "box" in pixels
+        border=border,  # thickness of the border (in boxes)
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    if image_format == QRFormat.SVG:
+        return qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).to_string()
+
+    img = qr.make_image(fill_color='black', back_color='white')
+    buffered = BytesIO()
+    img.save(buffered, format='PNG')
+    return buffered.getvalue()
+
+
+def _render(args: tuple) -> bytes:
+    return render_qr(*args)
+
+
+def create_qr_token(
+    check_in_code: str, expires_delta: timedelta = QR_TOKEN_EXPIRY
+) -> str:
+    """Signed token for the QR image URL of a check-in code."""
+    return encode({'check_in_code': check_in_code}, expires_delta=expires_delta)
+
+
+def decode_qr_token(token: str) -> Optional[Tuple[str, datetime]]:
+    """Return the check-in code and expiry of a token, or None if it is invalid."""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+        expires_at = datetime.fromtimestamp(payload['exp'], timezone.utc)
+        return payload['check_in_code'], expires_at.replace(tzinfo=None)
+    except (jwt.PyJWTError, KeyError):
+        return None
+
+
+class QRCache:
+    """
+    Content-addressed cache of rendered QR codes, in memory and on disk.
+
+    Entries are keyed by a hash of the encoded data and the render parameters,
+    so a code is rendered once and reused by later runs, such as the check-in
+    reminders. Misses are rendered in a process pool.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = settings.QR_CACHE_DIR,
+        box_size: int = 10,
+        border: int = 4,
+        max_workers: Optional[int] = None,
+    ):
+        self.directory = directory
+        self.box_size = box_size
+        self.border = border
+        self.max_workers = max_workers
+        self._images: Dict[str, bytes] = {}
+        self._lock = Lock()
+
+    def _key(self, data: str, image_format: QRFormat) -> str:
+        payload = json.dumps([data, self.box_size, self.border, image_format.value])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _load(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            image = self._images.get(key)
+        if image is not None or not self.directory:
+            return image
+
+        try:
+            with open(self._path(key), 'rb') as f:
+                image = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._images[key] = image
+        return image
+
+    def _store(self, key: str, image: bytes) -> None:
+        with self._lock:
+            self._images[key] = image
+        if not self.directory:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a concurrent reader never sees half a file
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(image)
+        os.replace(tmp_path, path)
+
+    def render_many(
+        self, data: Iterable[str], image_format: QRFormat = QRFormat.PNG
+    ) -> Dict[str, bytes]:
+        """Return the image of each string, rendering the ones not cached yet."""
+        images = {}
+        missing = []
+        for d in dict.fromkeys(data):
+            image = self._load(self._key(d, image_format))
+            if image is None:
+                missing.append(d)
+            else:
+                images[d] = image
+        if not missing:
+            return images
+
+        logger.info('Rendering %s QR codes', len(missing))
+        args = [(d, self.box_size, self.border, image_format) for d in missing]
+        if len(missing) < MIN_POOL_BATCH or self.max_workers == 1:
+            rendered = map(_render, args)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=POOL_CONTEXT
+            ) as executor:
+                rendered = list(executor.map(_render, args, chunksize=16))
+
+        for d, image in zip(missing, rendered):
+            self._store(self._key(d, image_format), image)
+            images[d] = image
+        return images
+
+    def render(self, data: str, image_format: QRFormat = QRFormat.PNG) -> bytes:
+        return self.render_many([data], image_format)[data]
+
+    def render_base64(self, data: str) -> str:
+        return base64.b64encode(self.render(data)).decode('utf-8')
+
+
+qr_cache = QRCache()
@@ -1,7 +1,10 @@
+import hashlib
+import hmac
 import json
 import random
 import string
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 from uuid import UUID
 
 import jwt
@@ -29,6 +32,29 @@ def current_time() -> datetime:
     return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
+def to_utc(value: datetime) -> datetime:
+    """Naive UTC datetime, as stored in the database."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 def create_spice() -> str:
     char_pool = string.ascii_letters + string.digits
     return ''.join(random.sample(char_pool, 12))
+
+
+def compute_etag(content: bytes) -> str:
+    return f'"{hashlib.sha256(content).hexdigest()}"'
+
+
+def sign(content: bytes, key: str) -> str:
+    """HMAC-SHA256 of the content, for clients sharing the key to verify it."""
+    return hmac.new(key.encode(), content, hashlib.sha256).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(',')]
+    return '*' in candidates or any(c.removeprefix('W/') == etag for c in candidates)
@@ -0,0 +1,154 @@
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.api.email_logs.models import EmailLog
+from app.core import models
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logger import logger
+from app.core.utils import current_time
+
+# Partitions created ahead of time, so inserts never fall in the default one
+MONTHS_AHEAD = 2
+
+
+def _month_start(date: datetime) -> datetime:
+    return datetime(date.year, date.month, 1)
+
+
+def _add_months(date: datetime, months: int) -> datetime:
+    month = date.month - 1 + months
+    return datetime(date.year + month // 12, month % 12 + 1, 1)
+
+
+def _partition_name(month: datetime) -> str:
+    return f'email_logs_{month:%Y_%m}'
+
+
+def is_partitioned(db: Session) -> bool:
+    """Whether email_logs was converted to a partitioned table (see schema changes)."""
+    if db.get_bind().dialect.name != 'postgresql':
+        return False
+    query = text(
+        'SELECT 1 FROM pg_partitioned_table WHERE partrelid = CAST(:t AS regclass)'
+    )
+    return db.execute(query, {'t': EmailLog.__tablename__}).first() is not None
+
+
+def ensure_partitions(db: Session, now: datetime) -> None:
+    month = _month_start(now)
+    for i in range(MONTHS_AHEAD + 1):
+        start = _add_months(month, i)
+        end = _add_months(start, 1)
+        db.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS {_partition_name(start)} '
+                f'PARTITION OF email_logs '
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+            )
+        )
+    db.commit()
+
+
+def _serialize(log: EmailLog) -> dict:
+    row = {}
+    for column in EmailLog.__table__.columns:
+        value = getattr(log, column.key)
+        row[column.key] = value.isoformat() if isinstance(value, datetime) else value
+    return row
+
+
+def get_expired_months(db: Session, cutoff: datetime) -> List[datetime]:
+    oldest = (
+        db.query(EmailLog.created_at)
+        .filter(EmailLog.created_at < cutoff)
+        .order_by(EmailLog.created_at)
+        .first()
+    )
+    if not oldest:
+        return []
+
+    months = []
+    month = _month_start(oldest[0])
+    while month < cutoff:
+        months.append(month)
+        month = _add_months(month, 1)
+    return months
+
+
+def archive_month(
+    db: Session, month: datetime, archive_dir: str, partitioned: bool = False
+) -> int:
+    """Export the logs of the month to a gzipped JSON lines file, then drop them."""
+    end = _add_months(month, 1)
+    in_month = (EmailLog.created_at >= month, EmailLog.created_at < end)
+    logs = db.query(EmailLog).filter(*in_month).order_by(EmailLog.id).yield_per(1000)
+
+    path = os.path.join(archive_dir, f'{_partition_name(month)}.jsonl.gz')
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    total = 0
+    # Rows are only dropped once the whole month is on disk, so a run that
+    # failed half way rewrites the file from scratch on the next one
+    with open(tmp_path, 'wb') as raw:
+        with gzip.open(raw, 'wt', encoding='utf-8') as f:
+            for log in logs:
+                f.write(json.dumps(_serialize(log)) + '\n')
+                total += 1
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp_path, path)
+
+    count = db.query(EmailLog).filter(*in_month).count()
+    if count != total:
+        raise RuntimeError(
+            f'Archived {total} email logs of {month:%Y-%m} but found {count}'
+        )
+
+    if partitioned:
+        db.execute(text(f'DROP TABLE IF EXISTS {_partition_name(month)}'))
+    # Rows of the month that ended up in the default partition, or all of them
+    # when the table is not partitioned
+    db.query(EmailLog).filter(*in_month).delete(synchronize_session=False)
+    db.commit()
+
+    logger.info('Archived %s email logs of %s to %s', total, f'{month:%Y-%m}', path)
+    return total
+
+
+def main(
+    archive_dir: Optional[str] = settings.EMAIL_LOGS_ARCHIVE_DIR,
+    now: Optional[datetime] = None,
+):
+    now = now or current_time()
+    cutoff = _add_months(_month_start(now), -settings.EMAIL_LOGS_RETENTION_MONTHS)
+    with SessionLocal() as db:
+        partitioned = is_partitioned(db)
+        if partitioned:
+            ensure_partitions(db, now)
+
+        # Not created here, so a missing volume doesn't send the logs to a
+        # directory that is lost on the next deploy
+        if not archive_dir or not os.path.isdir(archive_dir):
+            logger.error(
+                'EMAIL_LOGS_ARCHIVE_DIR must be an existing durable directory, '
+                'not archiving email logs (got %s)',
+                archive_dir,
+            )
+            return
+
+        for month in get_expired_months(db, cutoff):
+            archive_month(db, month, archive_dir, partitioned)
+
+
+if __name__ == '__main__':
+    logger.info('Starting email logs archive process...')
+    main()
+    logger.info('Email logs archive completed. Sleeping for 24 hours...')
+    time.sleep(24 * 60 * 60)
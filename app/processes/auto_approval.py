@@ -23,6 +23,7 @@ def process_popup_city(db: Session, popup_city: PopUpCity):
         db.query(Application)
         .filter(Application.popup_city_id == popup_city.id)
         .filter(Application.status == ApplicationStatus.IN_REVIEW)
+        .filter(Application.auto_approved.is_(False))
         .filter(
             Application.submitted_at
             < current_time() - timedelta(minutes=auto_approval_time)
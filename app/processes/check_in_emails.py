@@ -1,49 +1,60 @@
-import base64
 import json
 import re
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from enum import Enum
-from io import BytesIO
-from typing import List
+from typing import Callable, Dict, List, Optional
 from urllib.parse import urlencode, urljoin
 
-import qrcode
-from sqlalchemy import and_, func
+from sqlalchemy import exists, func, select
 from sqlalchemy.orm import Session
 
 from app.api.applications.models import Application
 from app.api.attendees.models import Attendee
 from app.api.check_in.models import CheckIn
+from app.api.email_logs.crud import EmailLogBatch
 from app.api.email_logs.crud import email_log as email_log_crud
 from app.api.email_logs.models import EmailLog
-from app.api.email_logs.schemas import EmailAttachment
+from app.api.email_logs.schemas import (
+    EmailAttachment,
+    EmailEvent,
+    EmailMessage,
+    EmailStatus,
+)
 from app.api.payments.models import Payment
-from app.api.popup_city.models import PopUpCity
-from app.api.products.models import Product
+from app.api.popup_city.models import EmailTemplate, PopUpCity
+from app.api.popup_city.templates import email_templates
 from app.core import models
 from app.core.config import settings
 from app.core.database import SessionLocal
 from app.core.logger import logger
+from app.core.qr import create_qr_token, qr_cache
 from app.core.utils import current_time
 
-POPUP_CITY_SLUG = 'edge-esmeralda'
+# Check-in emails are sent this long before the first stay starts, and the
+# reminder this long before it if the virtual check-in is still pending
+CHECK_IN_NOTICE = timedelta(days=5)
+REMINDER_NOTICE = timedelta(days=1)
+# Applications per round of emails, i.e. per batch of QR renders and sends
+BATCH_SIZE = 200
 
 
-class EmailTemplate(str, Enum):
-    WEEK1 = 'checkin-ee25-week1'
-    WEEK2 = 'checkin-ee25-week2'
-    WEEK3 = 'checkin-ee25-week3'
-    WEEK4 = 'checkin-ee25-week4'
-    DAY = 'checkin-ee25-day'
+class CheckInEvent:
+    """
+    Popup email template events of the check-in emails.
 
-    @classmethod
-    def all(cls):
-        return [t.value for t in cls]
+    A popup takes part once it has a `check-in` template. It can also set
+    `check-in-day` and `check-in-week<N>` templates for day and week passes;
+    missing ones fall back to `check-in`.
+    """
+
+    DEFAULT = EmailEvent.CHECK_IN.value
+    DAY = f'{DEFAULT}-day'
 
     @classmethod
-    def from_week_number(cls, week_number: int):
-        return cls[f'WEEK{week_number}']
+    def week(cls, week_number: int) -> str:
+        return f'{cls.DEFAULT}-week{week_number}'
 
 
 def extract_week_number_from_slug(slug: str) -> int:
@@ -53,49 +64,24 @@ def extract_week_number_from_slug(slug: str) -> int:
     raise ValueError(f'Invalid slug: {slug}')
 
 
-def generate_qr_base64(data: str) -> str:
-    """
-    Generate a QR code from the given string and return
-    the image as a Base64-encoded PNG.
-
-    :param data: The string to encode in the QR code
-    :return: Base64 string of the PNG image
-    """
-    # 1. Create QR code object
-    qr = qrcode.QRCode(
-        version=1,  # 1–40, controls size; or use fit=True to auto size
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,  # size of each "box" in pixels
-        border=4,  # thickness of the border (in boxes)
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-
-    # 2. Render to PIL image
-    img = qr.make_image(fill_color='black', back_color='white')
-
-    # 3. Save image to memory buffer as PNG
-    buffered = BytesIO()
-    img.save(buffered, format='PNG')
-    img_bytes = buffered.getvalue()
-
-    # 4. Encode to Base64 and return as UTF-8 string
-    base64_str = base64.b64encode(img_bytes).decode('utf-8')
-    return base64_str
+def _qr_data(check_in_code: str) -> str:
+    return json.dumps({'code': check_in_code})
 
 
 def generate_qr_attachment(check_in_code: str, attendee_name: str):
     logger.info('Generating QR code for %s %s', check_in_code, attendee_name)
-    data = json.dumps({'code': check_in_code})
     return EmailAttachment(
         name=f'{attendee_name}.png',
         content_id='cid:qr.png',
-        content=generate_qr_base64(data),
+        content=qr_cache.render_base64(_qr_data(check_in_code)),
         content_type='image/png',
     )
 
 
 def generate_qr_attachments(attendees: List[Attendee]):
+    if not settings.CHECK_IN_QR_ATTACHMENTS:
+        return []
+
     attachments = []
     for attendee in attendees:
         if attendee.products:
@@ -104,26 +90,52 @@ def generate_qr_attachments(attendees: List[Attendee]):
     return attachments
 
 
-def get_check_in_template(application: Application):
-    first_product = None
-    for attendee in application.attendees:
-        for product in attendee.products:
-            if not product.start_date:
-                continue
-            if not first_product:
-                first_product = product
-            elif product.start_date < first_product.start_date:
-                first_product = product
+def generate_qr_urls(attendees: List[Attendee]):
+    """Signed URLs of the QR images, for templates that link them."""
+    return [
+        {
+            'name': attendee.name,
+            'url': urljoin(
+                settings.BACKEND_URL,
+                f'check-in/qr/{create_qr_token(attendee.check_in_code)}.png',
+            ),
+        }
+        for attendee in attendees
+        if attendee.products
+    ]
+
+
+def prerender_qr_codes(applications: List[Application]):
+    """Render the QR codes of all the applications at once, across processes."""
+    if not settings.CHECK_IN_QR_ATTACHMENTS:
+        return
+
+    qr_cache.render_many(
+        _qr_data(attendee.check_in_code)
+        for application in applications
+        for attendee in application.attendees
+        if attendee.products
+    )
 
-    if not first_product or first_product.category in ['month', 'patreon']:
-        return EmailTemplate.WEEK1
-    if first_product.category == 'week':
-        week_number = extract_week_number_from_slug(first_product.slug)
-        return EmailTemplate.from_week_number(week_number)
-    if first_product.category == 'day':
-        return EmailTemplate.DAY
 
-    raise ValueError(f'Invalid product category: {first_product.category}')
+def get_check_in_event(application: Application, events: List[str]) -> str:
+    """The check-in event of the application's first pass, among the popup's events."""
+    first_attendee = min(
+        (a for a in application.attendees if a.stay_start),
+        key=lambda a: a.stay_start,
+        default=None,
+    )
+    pass_category = first_attendee.pass_category if first_attendee else None
+
+    event = CheckInEvent.DEFAULT
+    if pass_category == 'week':
+        week_number = extract_week_number_from_slug(first_attendee.first_product.slug)
+        event = CheckInEvent.week(week_number)
+    elif pass_category == 'day':
+        event = CheckInEvent.DAY
+    elif pass_category not in (None, 'month', 'patreon'):
+        raise ValueError(f'Invalid product category: {pass_category}')
+    return event if event in events else CheckInEvent.DEFAULT
 
 
 def _get_virtual_checkin_url(application: Application):
@@ -138,22 +150,40 @@ def _get_virtual_checkin_url(application: Application):
     return url
 
 
-def process_application_for_check_in(application: Application):
-    logger.info('Processing application %s %s', application.id, application.email)
-    attachments = generate_qr_attachments(application.attendees)
+def get_check_in_templates(db: Session, popup: PopUpCity) -> Dict[str, str]:
+    """Template alias of each check-in event configured for the popup."""
+    return {
+        t.event: t.template
+        for t in email_templates.for_popup(db, popup.id)
+        if t.event.startswith(CheckInEvent.DEFAULT)
+    }
 
-    event = get_check_in_template(application)
 
-    virtual_checkin_url = _get_virtual_checkin_url(application)
-    params = {
-        'virtual_checkin_url': virtual_checkin_url,
-        'first_name': application.first_name,
-    }
+def get_check_in_popups(db: Session) -> List[PopUpCity]:
+    """Popups that are not over yet and have check-in emails configured."""
+    return (
+        db.query(PopUpCity)
+        .filter(
+            PopUpCity.end_date > current_time(),
+            exists().where(
+                EmailTemplate.popup_city_id == PopUpCity.id,
+                EmailTemplate.event == CheckInEvent.DEFAULT,
+            ),
+        )
+        .order_by(PopUpCity.id)
+        .all()
+    )
 
-    logger.info('Sending email %s to %s', event, application.email)
 
-    email_log_crud.send_mail(
-        receiver_mail=application.email,
+def _check_in_message(
+    application: Application,
+    receiver_email: str,
+    event: str,
+    params: dict,
+    attachments: List[EmailAttachment],
+) -> EmailMessage:
+    return EmailMessage(
+        receiver_email=receiver_email,
         event=event,
         params=params,
         entity_type='application',
@@ -161,81 +191,88 @@ def process_application_for_check_in(application: Application):
         attachments=attachments,
     )
 
+
+def check_in_messages(
+    application: Application, events: List[str]
+) -> List[EmailMessage]:
+    logger.info('Processing application %s %s', application.id, application.email)
+    attachments = generate_qr_attachments(application.attendees)
+    event = get_check_in_event(application, events)
+    params = {
+        'virtual_checkin_url': _get_virtual_checkin_url(application),
+        'first_name': application.first_name,
+        'qr_codes': generate_qr_urls(application.attendees),
+    }
+    messages = [
+        _check_in_message(application, application.email, event, params, attachments)
+    ]
+
     spouse_attendee = next(
         (a for a in application.attendees if a.category == 'spouse'), None
     )
-    if spouse_attendee:
-        receiver_mail = spouse_attendee.email
-        params['first_name'] = spouse_attendee.name
-        logger.info('Sending email %s to spouse %s', event, receiver_mail)
-        try:
-            email_log_crud.send_mail(
-                receiver_mail=receiver_mail,
-                event=event,
-                params=params,
-                entity_type='application',
-                entity_id=application.id,
-                attachments=attachments,
+    if spouse_attendee and spouse_attendee.email:
+        spouse_params = {**params, 'first_name': spouse_attendee.name}
+        messages.append(
+            _check_in_message(
+                application, spouse_attendee.email, event, spouse_params, attachments
             )
-        except Exception as e:
-            logger.error('Error sending email to spouse %s', receiver_mail)
-            logger.error(e)
+        )
+    return messages
 
 
-def process_application_for_check_in_reminder(application: Application):
+def check_in_reminder_messages(
+    application: Application, events: List[str]
+) -> List[EmailMessage]:
     logger.info('Processing application %s %s', application.id, application.email)
-    attachments = generate_qr_attachments(application.attendees)
+    params = {
+        'virtual_checkin_url': _get_virtual_checkin_url(application),
+        'qr_codes': generate_qr_urls(application.attendees),
+    }
+    return [
+        _check_in_message(
+            application,
+            application.email,
+            get_check_in_event(application, events),
+            params,
+            generate_qr_attachments(application.attendees),
+        )
+    ]
 
-    virtual_checkin_url = _get_virtual_checkin_url(application)
-    params = {'virtual_checkin_url': virtual_checkin_url}
 
-    logger.info('Sending email to %s', application.email)
-    email_log_crud.send_mail(
-        receiver_mail=application.email,
-        event=get_check_in_template(application),
-        params=params,
-        entity_type='application',
-        entity_id=application.id,
-        attachments=attachments,
+def _check_in_emails_sent(templates: List[str]):
+    """Check-in emails logged for the application, by template alias"""
+    return select(EmailLog.id).where(
+        EmailLog.entity_type == 'application',
+        EmailLog.entity_id == Application.id,
+        EmailLog.template.in_(templates),
     )
 
 
-def get_sent_checkin_emails(db: Session):
-    logs = (
-        db.query(EmailLog.receiver_email.distinct())
-        .filter(EmailLog.template.in_(EmailTemplate.all()))
-        .all()
+def _stay_starts_before(date: datetime):
+    return exists().where(
+        Attendee.application_id == Application.id,
+        Attendee.stay_start <= date,
     )
-    return [log[0] for log in logs]
 
 
-def get_applications_for_check_in(db: Session):
-    popup = db.query(PopUpCity).filter(PopUpCity.slug == POPUP_CITY_SLUG).first()
-    if not popup:
-        raise ValueError('Popup not found')
-
-    popup_id = popup.id
-    excluded_application_emails = get_sent_checkin_emails(db)
-    logger.info('Excluded application emails: %s', excluded_application_emails)
-
-    today = current_time()
-    five_days_from_now = today + timedelta(days=5)
+def get_applications_for_check_in(
+    db: Session, popup: PopUpCity, templates: List[str]
+) -> List[Application]:
     one_hour_ago = current_time() - timedelta(hours=1)
 
     applications = (
         db.query(Application)
-        .join(Application.attendees)
-        .join(Attendee.products)
         .filter(
-            Application.popup_city_id == popup_id,
-            Application.email.notin_(excluded_application_emails),
-            Product.start_date <= five_days_from_now,
-            # <-- this line excludes any application that has at least one approved payment in the last hour
-            ~Application.payments.any(
-                and_(Payment.created_at > one_hour_ago, Payment.status == 'approved')
+            Application.popup_city_id == popup.id,
+            _stay_starts_before(current_time() + CHECK_IN_NOTICE),
+            ~_check_in_emails_sent(templates).exists(),
+            # Skip applications with a payment approved in the last hour
+            ~exists().where(
+                Payment.application_id == Application.id,
+                Payment.status == 'approved',
+                Payment.created_at > one_hour_ago,
             ),
         )
-        .distinct()
         .all()
     )
     logger.info('Total applications found: %s', len(applications))
@@ -244,77 +281,112 @@ def get_applications_for_check_in(db: Session):
     return applications
 
 
-def check_in_info_and_qr(db: Session):
-    logger.info('Starting check in info and QR code generation')
-    applications = get_applications_for_check_in(db)
-    logger.info('Total applications to process: %s', len(applications))
-    for application in applications:
-        process_application_for_check_in(application)
-    logger.info('Finished check in info and QR code generation')
-
-
-def get_applications_for_check_in_reminder(db: Session):
-    popup = db.query(PopUpCity).filter(PopUpCity.slug == POPUP_CITY_SLUG).first()
-    if not popup:
-        raise ValueError('Popup not found')
-
-    popup_id = popup.id
-
-    check_in_sent_once = (
-        db.query(EmailLog.receiver_email)
+def get_applications_for_check_in_reminder(
+    db: Session, popup: PopUpCity, templates: List[str]
+) -> List[Application]:
+    # Only the applicant's own emails: the spouse gets a copy of each one
+    check_ins_sent = (
+        _check_in_emails_sent(templates)
+        .where(EmailLog.receiver_email == Application.email)
+        .with_only_columns(func.count())
+        .scalar_subquery()
+    )
+    return (
+        db.query(Application)
         .filter(
-            EmailLog.template.in_(EmailTemplate.all()),
-            EmailLog.entity_type == 'application',
+            Application.popup_city_id == popup.id,
+            _stay_starts_before(current_time() + REMINDER_NOTICE),
+            check_ins_sent == 1,
+            ~exists().where(
+                Attendee.application_id == Application.id,
+                CheckIn.attendee_id == Attendee.id,
+                CheckIn.virtual_check_in,
+            ),
         )
-        .group_by(EmailLog.receiver_email)
-        .having(func.count() == 1)
         .all()
     )
-    check_in_sent_once = [row[0] for row in check_in_sent_once]
 
-    check_in_completed = (
-        db.query(Attendee.application_id)
-        .join(CheckIn, Attendee.id == CheckIn.attendee_id)
-        .filter(CheckIn.virtual_check_in)
-        .distinct()
-        .all()
-    )
-    check_in_completed = [row[0] for row in check_in_completed]
 
-    one_day_from_now = current_time() + timedelta(days=1)
+def send_check_in_emails(
+    db: Session,
+    popup: PopUpCity,
+    applications: List[Application],
+    build_messages: Callable[[Application, List[str]], List[EmailMessage]],
+    events: List[str],
+    stats: Counter,
+) -> None:
+    """Render the QR codes and send the emails of the applications, in batches."""
+    with EmailLogBatch(db) as log_batch:
+        for i in range(0, len(applications), BATCH_SIZE):
+            batch = applications[i : i + BATCH_SIZE]
+            prerender_qr_codes(batch)
+            messages = [m for a in batch for m in build_messages(a, events)]
+            statuses = email_log_crud.send_mails(
+                messages, popup_city=popup, log_batch=log_batch
+            )
+            stats['sent'] += statuses.count(EmailStatus.SUCCESS)
+            stats['failed'] += len(statuses) - statuses.count(EmailStatus.SUCCESS)
+            logger.info(
+                '%s: %s/%s applications processed (%s sent, %s failed)',
+                popup.slug,
+                min(i + BATCH_SIZE, len(applications)),
+                len(applications),
+                stats['sent'],
+                stats['failed'],
+            )
 
-    return (
-        db.query(Application)
-        .join(Application.attendees)
-        .join(Attendee.products)
-        .filter(
-            Application.popup_city_id == popup_id,
-            Application.id.notin_(check_in_completed),
-            Application.email.in_(check_in_sent_once),
-            Product.start_date <= one_day_from_now,
-        )
-        .distinct()
-        .all()
+
+def process_popup(db: Session, popup: PopUpCity) -> Counter:
+    """Send the pending check-in emails and reminders of a popup."""
+    started_at = time.monotonic()
+    stats = Counter()
+    templates = get_check_in_templates(db, popup)
+    events = list(templates)
+
+    logger.info('%s: starting check in info and QR code generation', popup.slug)
+    applications = get_applications_for_check_in(db, popup, list(templates.values()))
+    stats['check_in_applications'] = len(applications)
+    send_check_in_emails(db, popup, applications, check_in_messages, events, stats)
+
+    logger.info('%s: starting check in reminder', popup.slug)
+    applications = get_applications_for_check_in_reminder(
+        db, popup, list(templates.values())
+    )
+    stats['reminder_applications'] = len(applications)
+    send_check_in_emails(
+        db, popup, applications, check_in_reminder_messages, events, stats
     )
 
+    logger.info(
+        '%s: check-in mailing finished in %.1fs: %s',
+        popup.slug,
+        time.monotonic() - started_at,
+        dict(stats),
+    )
+    return stats
+
 
-def check_in_reminder(db: Session):
-    logger.info('Starting check in reminder')
-    applications = get_applications_for_check_in_reminder(db)
-    logger.info('Total applications to process: %s', len(applications))
-    for application in applications:
-        process_application_for_check_in_reminder(application)
-    logger.info('Finished check in reminder')
+def _process_popup(popup_id: int) -> Counter:
+    # Sessions are not thread safe, so each worker uses its own
+    with SessionLocal() as db:
+        return process_popup(db, db.get(PopUpCity, popup_id))
 
 
-def main():
+def main(max_workers: Optional[int] = None):
     with SessionLocal() as db:
-        check_in_info_and_qr(db)
-        logger.info('Finished check in info and QR code generation')
-        check_in_reminder(db)
-        logger.info('Finished check in reminder. Sleeping for 1 hour...')
-        time.sleep(1 * 60 * 60)
+        popup_ids = [popup.id for popup in get_check_in_popups(db)]
+    logger.info('Found %s popups with check-in emails', len(popup_ids))
+
+    with ThreadPoolExecutor(max_workers or settings.CHECK_IN_WORKERS) as executor:
+        futures = {executor.submit(_process_popup, id): id for id in popup_ids}
+        for future, popup_id in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                logger.error('Check-in mailing of popup %s failed: %s', popup_id, e)
 
 
 if __name__ == '__main__':
     main()
+    logger.info('Finished check-in mailings. Sleeping for 1 hour...')
+    time.sleep(1 * 60 * 60)
@@ -0,0 +1,99 @@
+"""
+Recompute the status of every application of a popup city.
+
+Run after changing the approval rules of a popup (e.g. requires_approval) or
+fixing reviews in bulk:
+
+    python app/processes/recompute_statuses.py <popup-slug> [--dry-run]
+"""
+
+import argparse
+from collections import Counter
+from typing import Any, Dict, List
+
+import requests
+
+from app.api.applications.crud import application as application_crud
+from app.api.popup_city.models import PopUpCity
+from app.core import models
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logger import logger
+
+NOCODB_BATCH_SIZE = 100
+
+
+def report(changes: List[Dict[str, Any]]) -> None:
+    for change in changes:
+        logger.info(
+            'Application %s %s: %s -> %s (requested discount %s -> %s)',
+            change['id'],
+            change['email'],
+            change['status'],
+            change['new_status'],
+            change['requested_discount'],
+            change['new_requested_discount'],
+        )
+    transitions = Counter((c['status'], c['new_status']) for c in changes)
+    for (old, new), count in transitions.most_common():
+        logger.info('%s -> %s: %s applications', old, new, count)
+
+
+def push_to_nocodb(changes: List[Dict[str, Any]]) -> None:
+    url = (
+        f'{settings.NOCODB_URL}/api/v2/tables/{settings.APPLICATIONS_TABLE_ID}/records'
+    )
+    headers = {
+        'accept': 'application/json',
+        'xc-token': settings.NOCODB_TOKEN,
+        'Content-Type': 'application/json',
+    }
+    for i in range(0, len(changes), NOCODB_BATCH_SIZE):
+        batch = changes[i : i + NOCODB_BATCH_SIZE]
+        data = [
+            {
+                'id': change['id'],
+                'status': change['new_status'],
+                'requested_discount': change['new_requested_discount'],
+                'accepted_at': change['accepted_at'].isoformat()
+                if change['accepted_at']
+                else None,
+            }
+            for change in batch
+        ]
+        response = requests.patch(url, headers=headers, json=data)
+        if response.status_code != 200:
+            logger.error(
+                'Error updating applications %s in NocoDB: %s',
+                [change['id'] for change in batch],
+                response.text,
+            )
+
+
+def main(slug: str, dry_run: bool = False) -> None:
+    with SessionLocal() as db:
+        popup_city = db.query(PopUpCity).filter(PopUpCity.slug == slug).first()
+        if not popup_city:
+            logger.error('Popup city %s not found', slug)
+            return
+
+        changes = application_crud.recompute_statuses(db, popup_city, dry_run=dry_run)
+        logger.info(
+            '%s applications of %s %s',
+            len(changes),
+            popup_city.name,
+            'would change' if dry_run else 'changed',
+        )
+        report(changes)
+        if changes and not dry_run:
+            push_to_nocodb(changes)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('slug', help='Slug of the popup city')
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    logger.info('Starting status recomputation process...')
+    main(args.slug, dry_run=args.dry_run)
+    logger.info('Status recomputation process completed')
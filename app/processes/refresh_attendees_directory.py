@@ -0,0 +1,61 @@
+import time
+
+from sqlalchemy.orm import Session
+
+from app.api.application_events.crud import application_event as event_crud
+from app.api.applications.crud import application as application_crud
+from app.api.applications.models import Application
+from app.api.attendees.crud import attendee as attendee_crud
+from app.api.popup_city.models import PopUpCity
+from app.core import models
+from app.core.database import SessionLocal
+from app.core.logger import logger
+
+CONSUMER = 'refresh_attendees_directory'
+
+
+def rebuild_all(db: Session):
+    popup_cities = db.query(PopUpCity).all()
+    for popup_city in popup_cities:
+        application_ids = db.query(Application.id).filter(
+            Application.popup_city_id == popup_city.id
+        )
+        attendee_crud.refresh_stay_summary(db, [id for (id,) in application_ids])
+        total = application_crud.rebuild_attendees_directory(db, popup_city.id)
+        logger.info(
+            'Rebuilt attendees directory of %s with %s entries',
+            popup_city.name,
+            total,
+        )
+
+
+def refresh_changed(db: Session):
+    for events in event_crud.consume(db, CONSUMER):
+        application_ids = {event.application_id for event in events}
+        attendee_crud.refresh_stay_summary(db, application_ids)
+        application_crud.refresh_attendees_directory(db, application_ids)
+        db.commit()
+        logger.info(
+            'Refreshed %s applications up to event %s',
+            len(application_ids),
+            events[-1].id,
+        )
+
+
+def main():
+    with SessionLocal() as db:
+        if event_crud.get_offset(db, CONSUMER) is not None:
+            refresh_changed(db)
+            return
+
+        # First run: build everything, then follow the feed from here
+        position = event_crud.get_last_position(db)
+        rebuild_all(db)
+        event_crud.set_offset(db, CONSUMER, position)
+
+
+if __name__ == '__main__':
+    logger.info('Starting attendees directory refresh process...')
+    main()
+    logger.info('Attendees directory refresh completed. Sleeping for 60 seconds...')
+    time.sleep(60)
@@ -1,25 +1,44 @@
-import json
 import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 from enum import Enum
+from typing import Dict, List, Sequence, Set
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, exists
+from sqlalchemy.orm import Session, selectinload
 
-from app.api.applications.crud import application as application_crud
+from app.api.application_events.crud import application_event as event_crud
+from app.api.application_events.models import ApplicationEventOffset
+from app.api.application_events.schemas import ApplicationEventType
 from app.api.applications.models import Application
-from app.api.applications.schemas import ApplicationFilter, ApplicationStatus
+from app.api.applications.schemas import ApplicationStatus
+from app.api.email_logs.crud import EmailLogBatch
 from app.api.email_logs.crud import email_log as email_log_crud
-from app.api.email_logs.models import EmailLog
+from app.api.email_logs.models import EmailLog, ReminderSchedule
 from app.api.email_logs.schemas import EmailStatus
-from app.api.payments.models import Payment, PaymentProduct
+from app.api.payments.models import Payment
 from app.api.popup_city.crud import popup_city as popup_city_crud
 from app.api.popup_city.models import EmailTemplate
-from app.api.products.models import Product
+from app.api.popup_city.templates import (
+    format_frequency,
+    parse_frequencies,
+    parse_frequency,
+)
 from app.core.config import settings
 from app.core.database import SessionLocal
 from app.core.logger import logger
 from app.core.utils import current_time
 
+BATCH_SIZE = 1000
+REMINDER_LOG_BATCH = 20
+# Reminders that could not be sent within this time after being due are skipped
+MAX_DELAY = timedelta(hours=1)
+SCHEDULING_EVENTS = [
+    ApplicationEventType.CREATED,
+    ApplicationEventType.STATUS_CHANGED,
+    ApplicationEventType.PAYMENT_APPROVED,
+]
+
 
 class ReminderEvent(str, Enum):
     PURCHASE_REMINDER = 'purchase-reminder'
@@ -30,6 +49,7 @@ def _send_reminder_email(
     application: Application,
     email_template: EmailTemplate,
     freq: str,
+    log_batch: EmailLogBatch,
 ):
     params = {
         'first_name': application.first_name,
@@ -47,68 +67,31 @@ def _send_reminder_email(
         spice=application.citizen.spice,
         citizen_id=application.citizen_id,
         popup_slug=application.popup_city.slug,
+        log_batch=log_batch,
     )
 
 
-def _get_frequency_timedelta(f: str) -> timedelta:
-    if f.endswith('m'):
-        return timedelta(minutes=int(f[:-1]))
-    elif f.endswith('h'):
-        return timedelta(hours=int(f[:-1]))
-    elif f.endswith('d'):
-        return timedelta(days=int(f[:-1]))
-    elif f.endswith('w'):
-        return timedelta(weeks=int(f[:-1]))
-    raise ValueError(f'Invalid frequency: {f}')
-
-
-def process_application_reminders(
-    db: Session,
-    application: Application,
-    email_template: EmailTemplate,
-) -> None:
-    used_frequencies = get_used_frequencies(db, application.id, email_template.template)
-    from_date = get_reminder_start_date(application, email_template.event)
-    if email_template.event == ReminderEvent.PURCHASE_REMINDER:
-        if any(payment.status == 'approved' for payment in application.payments):
-            logger.info('Application %s has a paid payment', application.id)
-            return
-
-    logger.info(
-        'Sending reminder emails for application %s, frequency %s',
-        application.id,
-        email_template.frequency,
-    )
-    for frequency in email_template.frequency.split(','):
-        freq_delta = _get_frequency_timedelta(frequency)
-        if freq_delta in used_frequencies:
-            logger.info('Email already sent for frequency: %s', frequency)
-            continue
-
-        if is_reminder_due(from_date, freq_delta):
-            _send_reminder_email(application, email_template, frequency)
-
-
 def get_used_frequencies(
-    db: Session, application_id: int, template_name: str
-) -> list[timedelta]:
-    """Get list of frequencies for which emails have already been sent."""
-    email_logs = (
-        db.query(EmailLog)
+    db: Session, application_ids: Sequence[int], template_name: str
+) -> Dict[int, Set[timedelta]]:
+    """Get the frequencies for which emails have already been sent, by application."""
+    freq = EmailLog.params['freq'].as_string()
+    sent = (
+        db.query(EmailLog.entity_id, freq)
         .filter(
-            EmailLog.entity_id == application_id,
+            EmailLog.entity_id.in_(application_ids),
             EmailLog.entity_type == 'application',
             EmailLog.template == template_name,
             EmailLog.status == EmailStatus.SUCCESS,
+            freq.isnot(None),
         )
-        .all()
+        .distinct()
     )
 
-    return [
-        _get_frequency_timedelta(params['freq'])
-        for log in email_logs
-        if log.params and (params := json.loads(log.params)).get('freq')
-    ]
+    used = defaultdict(set)
+    for application_id, frequency in sent:
+        used[application_id].add(parse_frequency(frequency))
+    return used
 
 
 def get_reminder_start_date(
@@ -136,35 +119,180 @@ def get_application_status(event: ReminderEvent) -> ApplicationStatus:
     raise ValueError(f'Invalid event: {event}')
 
 
-def is_reminder_due(from_date: datetime, frequency: timedelta) -> bool:
-    """Check if a reminder is due within the next 24 hours."""
-    _current_time = current_time()
-    reminder_time = from_date + frequency
-    return _current_time - timedelta(hours=1) < reminder_time < _current_time
+def _pending_frequencies(
+    starts_at: datetime, frequencies: Sequence[timedelta], used: Set[timedelta]
+) -> List[timedelta]:
+    """Frequencies not sent yet and not overdue, in the order they fall due."""
+    overdue = current_time() - MAX_DELAY
+    return sorted(f for f in frequencies if f not in used and starts_at + f > overdue)
 
 
-def send_reminder_email(db: Session, email_template: EmailTemplate):
-    popup_city_id = email_template.popup_city_id
-    skip = 0
-    limit = 1000
-    while True:
-        applications = application_crud.find(
-            db,
-            filters=ApplicationFilter(
-                popup_city_id=popup_city_id,
-                status=get_application_status(email_template.event),
-            ),
-            skip=skip,
-            limit=limit,
+def get_eligible_applications(
+    db: Session, email_template: EmailTemplate, application_ids: Sequence[int]
+) -> List[Application]:
+    """Applications that should receive the reminders of the template."""
+    query = db.query(Application).filter(
+        Application.id.in_(application_ids),
+        Application.popup_city_id == email_template.popup_city_id,
+        Application.status == get_application_status(email_template.event),
+    )
+    if email_template.event == ReminderEvent.PURCHASE_REMINDER:
+        query = query.filter(
+            ~exists().where(
+                Payment.application_id == Application.id,
+                Payment.status == 'approved',
+            )
+        )
+    return query.all()
+
+
+def schedule_reminders(
+    db: Session, email_template: EmailTemplate, application_ids: Sequence[int]
+) -> None:
+    """Create or drop the schedules of the template for the given applications."""
+    applications = get_eligible_applications(db, email_template, application_ids)
+    eligible_ids = [application.id for application in applications]
+    db.execute(
+        delete(ReminderSchedule).where(
+            ReminderSchedule.email_template_id == email_template.id,
+            ReminderSchedule.application_id.in_(application_ids),
+            ReminderSchedule.application_id.notin_(eligible_ids),
+        )
+    )
+
+    scheduled = {
+        application_id
+        for (application_id,) in db.query(ReminderSchedule.application_id).filter(
+            ReminderSchedule.email_template_id == email_template.id,
+            ReminderSchedule.application_id.in_(eligible_ids),
+        )
+    }
+    used = get_used_frequencies(db, eligible_ids, email_template.template)
+    frequencies = parse_frequencies(email_template.frequency)
+    for application in applications:
+        if application.id in scheduled:
+            continue
+        starts_at = get_reminder_start_date(application, email_template.event)
+        pending = _pending_frequencies(starts_at, frequencies, used[application.id])
+        if not pending:
+            continue
+        db.add(
+            ReminderSchedule(
+                application_id=application.id,
+                email_template_id=email_template.id,
+                starts_at=starts_at,
+                next_due_at=starts_at + pending[0],
+                remaining_frequencies=','.join(map(format_frequency, pending)),
+            )
+        )
+    db.commit()
+
+
+def rebuild_schedules(db: Session, email_template: EmailTemplate) -> None:
+    logger.info('Rebuilding reminder schedules of template %s', email_template.id)
+    db.query(ReminderSchedule).filter(
+        ReminderSchedule.email_template_id == email_template.id
+    ).delete()
+    application_ids = [
+        id
+        for (id,) in db.query(Application.id)
+        .filter(Application.popup_city_id == email_template.popup_city_id)
+        .order_by(Application.id)
+    ]
+    for i in range(0, len(application_ids), BATCH_SIZE):
+        schedule_reminders(db, email_template, application_ids[i : i + BATCH_SIZE])
+
+
+def update_schedules(db: Session, email_template: EmailTemplate) -> None:
+    """Follow the application event feed since the template's last run."""
+    consumer = f'reminders:{email_template.id}'
+    offset = db.get(ApplicationEventOffset, consumer)
+    edited = (
+        offset is not None
+        and email_template.updated_at is not None
+        and email_template.updated_at > offset.updated_at
+    )
+    if offset is None or edited:
+        # New or edited template: start over from the current applications
+        position = event_crud.get_last_position(db)
+        rebuild_schedules(db, email_template)
+        event_crud.set_offset(db, consumer, position)
+        return
+
+    for events in event_crud.consume(db, consumer, event_types=SCHEDULING_EVENTS):
+        application_ids = {
+            event.application_id
+            for event in events
+            if event.popup_city_id == email_template.popup_city_id
+        }
+        if application_ids:
+            schedule_reminders(db, email_template, list(application_ids))
+
+
+def _advance(db: Session, schedule: ReminderSchedule) -> None:
+    """Drop the frequency just handled and any that became overdue."""
+    remaining = parse_frequencies(schedule.remaining_frequencies)[1:]
+    remaining = _pending_frequencies(schedule.starts_at, remaining, set())
+    if not remaining:
+        db.delete(schedule)
+        return
+    schedule.remaining_frequencies = ','.join(map(format_frequency, remaining))
+    schedule.next_due_at = schedule.starts_at + remaining[0]
+
+
+def send_due_reminders(db: Session, email_template: EmailTemplate) -> None:
+    now = current_time()
+    schedules = (
+        db.query(ReminderSchedule)
+        .filter(
+            ReminderSchedule.email_template_id == email_template.id,
+            ReminderSchedule.next_due_at <= now,
+        )
+        .options(
+            selectinload(ReminderSchedule.application).selectinload(Application.citizen)
         )
-        logger.info(
-            f'Found {len(applications)} applications for popup city {popup_city_id}'
+        .all()
+    )
+    logger.info(
+        'Found %s due reminders for popup city %s',
+        len(schedules),
+        email_template.popup_city_id,
+    )
+    if not schedules:
+        return
+
+    # The feed lags a few seconds behind, so check again before sending
+    eligible_ids = {
+        application.id
+        for application in get_eligible_applications(
+            db, email_template, [s.application_id for s in schedules]
         )
-        for application in applications:
-            process_application_reminders(db, application, email_template)
-        skip += limit
-        if len(applications) < limit:
-            break
+    }
+    # Reminders are sent one by one, so keep few of them unlogged at a time:
+    # each flush also commits the schedules advanced so far
+    with EmailLogBatch(db, size=REMINDER_LOG_BATCH) as log_batch:
+        for schedule in schedules:
+            if schedule.application_id not in eligible_ids:
+                db.delete(schedule)
+                continue
+
+            frequency = schedule.remaining_frequencies.split(',')[0]
+            if schedule.next_due_at > now - MAX_DELAY:
+                logger.info(
+                    'Sending reminder email for application %s, frequency %s',
+                    schedule.application_id,
+                    frequency,
+                )
+                _send_reminder_email(
+                    schedule.application, email_template, frequency, log_batch
+                )
+            _advance(db, schedule)
+    db.commit()
+
+
+def send_reminder_email(db: Session, email_template: EmailTemplate):
+    update_schedules(db, email_template)
+    send_due_reminders(db, email_template)
 
 
 def main():
@@ -8,6 +8,7 @@ from app.api.attendees.routes import router as attendees_router
 from app.api.check_in.routes import router as check_in_router
 from app.api.citizens.routes import router as citizens_router
 from app.api.coupon_codes.routes import router as coupon_codes_router
+from app.api.email_logs.routes import router as email_logs_router
 from app.api.groups.routes import router as groups_router
 from app.api.organizations.routes import router as organizations_router
 from app.api.payments.routes import router as payments_router
@@ -33,6 +34,7 @@ app.include_router(attendees_router, prefix='/attendees', tags=['Attendees'])
 app.include_router(check_in_router, prefix='/check-in', tags=['Check In'])
 app.include_router(citizens_router, prefix='/citizens', tags=['Citizens'])
 app.include_router(coupon_codes_router, prefix='/coupon-codes', tags=['Coupon Codes'])
+app.include_router(email_logs_router, prefix='/email-logs', tags=['Email Logs'])
 app.include_router(groups_router, prefix='/groups', tags=['Groups'])
 app.include_router(payments_router, prefix='/payments', tags=['Payments'])
 app.include_router(popup_cities_router, prefix='/popups', tags=['Popups'])
@@ -0,0 +1,147 @@
+"""
+Benchmark payload size and serialization time of GET /applications.
+
+Seeds a throwaway SQLite database with a popup city holding thousands of
+applications (each with a main attendee and a product) and compares:
+
+- orm: ORM objects validated into schemas.Application (the previous read path)
+- projection: all response fields selected as columns and dumped with orjson
+- sparse: only the fields passed with --fields (the `?fields=` query parameter)
+
+Usage:
+    python scripts/benchmark_sparse_fields.py --applications 5000
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.applications import schemas
+from app.api.applications.crud import application as application_crud
+from app.api.applications.models import Application
+from app.api.attendees.models import Attendee, AttendeeProduct
+from app.api.citizens.models import Citizen
+from app.api.common.fields import parse_fields
+from app.api.coupon_codes.models import CouponCode  # noqa: F401
+from app.api.popup_city.models import PopUpCity
+from app.api.products.models import Product
+from app.core import models  # noqa: F401
+from app.core.database import Base
+
+
+def seed(db, total: int) -> None:
+    now = datetime(2025, 1, 1)
+    db.add(
+        PopUpCity(
+            id=1,
+            name='Benchmark City',
+            slug='benchmark-city',
+            start_date=now,
+            end_date=now,
+        )
+    )
+    db.add(
+        Product(
+            id=1,
+            name='Full pass',
+            slug='full-pass',
+            price=100.0,
+            category='week',
+            popup_city_id=1,
+            is_active=True,
+        )
+    )
+    for i in range(1, total + 1):
+        db.add(Citizen(id=i, primary_email=f'citizen{i}@example.com', created_at=now))
+        db.add(
+            Application(
+                id=i,
+                first_name=f'First {i}',
+                last_name=f'Last {i}',
+                email=f'citizen{i}@example.com',
+                citizen_id=i,
+                popup_city_id=1,
+                _status=schemas.ApplicationStatus.ACCEPTED.value,
+                personal_goals='Build things ' * 20,
+                created_at=now,
+                updated_at=now,
+            )
+        )
+        db.add(
+            Attendee(
+                id=i,
+                application_id=i,
+                name=f'First {i} Last {i}',
+                category='main',
+                email=f'citizen{i}@example.com',
+                check_in_code=f'BENCH{i}',
+            )
+        )
+        db.add(AttendeeProduct(attendee_id=i, product_id=1))
+    db.commit()
+
+
+def measure(label: str, render, rounds: int) -> None:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        payload = render()
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings) * 1000
+    print(f'{label:<12} {len(payload):>12,} bytes {median:>10.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--applications', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--fields', default='id,first_name,last_name,email,status')
+    args = parser.parse_args()
+
+    engine = create_engine(
+        'sqlite://',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        print(f'Seeding {args.applications} applications...')
+        seed(db, args.applications)
+
+    adapter = TypeAdapter(list[schemas.Application])
+    all_fields = list(schemas.Application.model_fields)
+    sparse = parse_fields(args.fields, schemas.Application)
+    limit = args.applications
+
+    def orm():
+        with Session() as db:
+            rows = application_crud.find(db, limit=limit, profile='detail')
+            return adapter.dump_json(
+                adapter.validate_python(rows, from_attributes=True)
+            )
+
+    def projection(fields):
+        def render():
+            with Session() as db:
+                rows = application_crud.find(db, limit=limit, projection=fields)
+                return orjson.dumps(rows)
+
+        return render
+
+    print(f'{"path":<12} {"payload":>18} {"median":>13}')
+    measure('orm', orm, args.rounds)
+    measure('projection', projection(all_fields), args.rounds)
+    measure('sparse', projection(sparse), args.rounds)
+
+
+if __name__ == '__main__':
+    main()
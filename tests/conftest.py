@@ -4,7 +4,7 @@ from unittest.mock import Mock, patch
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -35,11 +35,15 @@ def setup_test_api_keys():
     original_coupon_key = settings.COUPON_API_KEY
     original_groups_key = settings.GROUPS_API_KEY
     original_check_in_key = settings.CHECK_IN_API_KEY
+    original_reviews_key = settings.REVIEWS_API_KEY
+    original_email_logs_key = settings.EMAIL_LOGS_API_KEY
 
     # Set test values
     settings.COUPON_API_KEY = 'test_coupon_api_key'
     settings.GROUPS_API_KEY = 'test_groups_api_key'
     settings.CHECK_IN_API_KEY = 'test_check_in_api_key'
+    settings.REVIEWS_API_KEY = 'test_reviews_api_key'
+    settings.EMAIL_LOGS_API_KEY = 'test_email_logs_api_key'
 
     yield
 
@@ -47,6 +51,8 @@ def setup_test_api_keys():
     settings.COUPON_API_KEY = original_coupon_key
     settings.GROUPS_API_KEY = original_groups_key
     settings.CHECK_IN_API_KEY = original_check_in_key
+    settings.REVIEWS_API_KEY = original_reviews_key
+    settings.EMAIL_LOGS_API_KEY = original_email_logs_key
 
 
 @pytest.fixture(scope='session')
@@ -88,6 +94,19 @@ def db_session(test_db_engine):
         # Base.metadata.drop_all(bind=test_db_engine)
 
 
+@pytest.fixture(scope='function')
+def query_counter(test_db_engine):
+    """Counts the SQL statements executed while the test runs"""
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_db_engine, 'before_cursor_execute', _count)
+    yield statements
+    event.remove(test_db_engine, 'before_cursor_execute', _count)
+
+
 @pytest.fixture(scope='function')
 def client(db_session):
     def override_get_db():
@@ -375,3 +394,21 @@ def mock_poap_api():
         patch('requests.post', side_effect=mock_response_factory),
     ):
         yield
+
+
+@pytest.fixture(scope='function', autouse=True)
+def reset_check_in_codes():
+    """The check-in code registry outlives the test database, so start empty"""
+    from app.api.check_in.codes import check_in_codes
+
+    check_in_codes.invalidate()
+    yield
+
+
+@pytest.fixture(scope='function', autouse=True)
+def reset_email_templates():
+    """The email template registry outlives the test database, so start empty"""
+    from app.api.popup_city.templates import email_templates
+
+    email_templates.invalidate()
+    yield
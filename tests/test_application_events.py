@@ -0,0 +1,96 @@
+from app.api.application_events.crud import application_event as event_crud
+from app.api.application_events.models import ApplicationEvent
+from app.api.application_events.schemas import ApplicationEventType
+from app.api.applications.models import Application
+from app.api.applications.schemas import ApplicationStatus
+
+
+def _events(db_session):
+    return [
+        (e.application_id, e.event_type, e.status)
+        for e in db_session.query(ApplicationEvent).order_by(ApplicationEvent.id)
+    ]
+
+
+def _batches(db_session, **kwargs):
+    return list(event_crud.consume(db_session, 'test', **kwargs))
+
+
+def _consume(db_session, **kwargs):
+    return [[e.event_type for e in batch] for batch in _batches(db_session, **kwargs)]
+
+
+def test_application_changes_are_recorded(
+    client, auth_headers, test_application, db_session, mock_email_template
+):
+    response = client.post(
+        '/applications/', json=test_application, headers=auth_headers
+    )
+    application_id = response.json()['id']
+    response = client.post(
+        f'/applications/{application_id}/attendees',
+        json={'name': 'Kid', 'category': 'kid'},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+
+    application = db_session.get(Application, application_id)
+    application.status = ApplicationStatus.ACCEPTED.value
+    db_session.commit()
+    application.telegram = '@test'
+    db_session.commit()
+
+    assert _events(db_session) == [
+        (application_id, 'created', 'draft'),
+        # The main attendee, then the kid
+        (application_id, 'attendee_changed', 'draft'),
+        (application_id, 'attendee_changed', 'draft'),
+        (application_id, 'status_changed', 'accepted'),
+        (application_id, 'updated', 'accepted'),
+    ]
+
+
+def test_consume_resumes_from_offset(
+    client, auth_headers, test_application, db_session
+):
+    client.post('/applications/', json=test_application, headers=auth_headers)
+    application = db_session.query(Application).one()
+    application.status = ApplicationStatus.ACCEPTED.value
+    db_session.commit()
+
+    assert _consume(db_session, batch_size=2) == [
+        ['created', 'attendee_changed'],
+        ['status_changed'],
+    ]
+    assert _consume(db_session) == []
+
+    application.status = ApplicationStatus.WITHDRAWN.value
+    db_session.commit()
+    application.telegram = '@test'
+    db_session.commit()
+    assert _consume(db_session, event_types=[ApplicationEventType.STATUS_CHANGED]) == [
+        ['status_changed']
+    ]
+    assert event_crud.get_offset(db_session, 'test') == (0, 4)
+
+
+def test_consume_delivers_late_commits(db_session):
+    def add_event(id, txid):
+        db_session.add(
+            ApplicationEvent(
+                id=id,
+                txid=txid,
+                application_id=1,
+                popup_city_id=1,
+                event_type=ApplicationEventType.UPDATED.value,
+            )
+        )
+        db_session.commit()
+
+    # Event 1 belongs to a transaction that commits after the one of event 2
+    add_event(2, txid=10)
+    assert [[e.id for e in batch] for batch in _batches(db_session)] == [[2]]
+    add_event(1, txid=11)
+    assert [[e.id for e in batch] for batch in _batches(db_session)] == [[1]]
+    assert event_crud.get_offset(db_session, 'test') == (11, 1)
+    assert event_crud.get_last_position(db_session) == (11, 1)
@@ -1,6 +1,8 @@
-from fastapi import status
+import pytest
+from fastapi import HTTPException, status
 
 from app.api.applications.models import Application
+from app.api.applications.schemas import Application as ApplicationSchema
 from app.api.applications.schemas import ApplicationStatus
 from tests.conftest import get_auth_headers_for_citizen
 
@@ -571,6 +573,77 @@ def test_application_status_validation(
     assert response.json()['scholarship_request'] is False
 
 
+def test_get_applications_filters_by_effective_status(
+    client, auth_headers, test_application, db_session
+):
+    from app.api.applications.models import Application
+
+    test_application['scholarship_request'] = True
+    response = client.post(
+        '/applications/', json=test_application, headers=auth_headers
+    )
+    application = db_session.get(Application, response.json()['id'])
+    application.status = ApplicationStatus.ACCEPTED.value
+    db_session.commit()
+
+    def statuses(status_filter):
+        response = client.get(
+            '/applications/',
+            params={'status': status_filter},
+            headers=auth_headers,
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return [a['status'] for a in response.json()]
+
+    # Accepted by the reviewers but still waiting for a discount
+    assert statuses(ApplicationStatus.ACCEPTED.value) == []
+    assert statuses(ApplicationStatus.IN_REVIEW.value) == ['in review']
+
+    application.discount_assigned = 10
+    db_session.commit()
+    assert statuses(ApplicationStatus.ACCEPTED.value) == ['accepted']
+    assert statuses(ApplicationStatus.IN_REVIEW.value) == []
+
+
+def test_recompute_statuses_after_approval_rules_change(
+    client,
+    auth_headers,
+    test_application,
+    test_popup_city,
+    db_session,
+    mock_email_template,
+):
+    from app.api.applications.crud import application as application_crud
+    from app.api.applications.models import Application
+
+    test_application['status'] = ApplicationStatus.IN_REVIEW.value
+    response = client.post(
+        '/applications/', json=test_application, headers=auth_headers
+    )
+    application_id = response.json()['id']
+    assert response.json()['status'] == ApplicationStatus.IN_REVIEW.value
+
+    assert application_crud.recompute_statuses(db_session, test_popup_city) == []
+
+    test_popup_city.requires_approval = False
+    db_session.commit()
+    changes = application_crud.recompute_statuses(
+        db_session, test_popup_city, dry_run=True
+    )
+    assert [(c['id'], c['status'], c['new_status']) for c in changes] == [
+        (application_id, 'in review', 'accepted')
+    ]
+    application = db_session.get(Application, application_id)
+    assert application.status == ApplicationStatus.IN_REVIEW.value
+
+    application_crud.recompute_statuses(db_session, test_popup_city)
+    db_session.expire_all()
+    application = db_session.get(Application, application_id)
+    assert application.status == ApplicationStatus.ACCEPTED.value
+    assert application.accepted_at is not None
+    assert application_crud.recompute_statuses(db_session, test_popup_city) == []
+
+
 def test_create_application_with_new_organization(
     client, auth_headers, test_application, db_session
 ):
@@ -745,3 +818,361 @@ def test_delete_attendee_with_payment_products(
     # Verify attendee was deleted
     attendee = db_session.query(Attendee).filter_by(id=attendee_id).first()
     assert attendee is None
+
+
+@pytest.fixture
+def application_with_family(db_session, test_attendee_product, test_products):
+    """Main attendee plus spouse and two kids, each with a product"""
+    from app.api.attendees.models import Attendee, AttendeeProduct
+
+    for i, category in enumerate(['spouse', 'kid', 'kid'], start=2):
+        attendee = Attendee(
+            id=i,
+            application_id=1,
+            name=f'Attendee {i}',
+            category=category,
+            check_in_code=f'TEST{i}',
+        )
+        db_session.add(attendee)
+        db_session.flush()
+        db_session.add(
+            AttendeeProduct(attendee_id=attendee.id, product_id=test_products[1].id)
+        )
+    db_session.commit()
+    db_session.expunge_all()
+
+
+def test_get_applications_query_count(client, application_with_family, query_counter):
+    response = client.get('/applications/', headers=get_auth_headers_for_citizen(1))
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()[0]['attendees']) == 4
+    # applications, attendees, attendee products
+    assert len(query_counter) == 3
+
+
+def test_get_application_query_count(client, application_with_family, query_counter):
+    response = client.get('/applications/1', headers=get_auth_headers_for_citizen(1))
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()['attendees']) == 4
+    # application, attendees, products, attendee_products
+    assert len(query_counter) == 4
+
+
+def test_get_applications_projection_matches_schema(
+    client, db_session, application_with_family
+):
+    application = db_session.get(Application, 1)
+    application.info_not_shared = ['email', 'telegram']
+    application.discount_assigned = 10
+    # Stored before the email validator, which the projection applies too
+    application.email = 'MiXed@Example.com '
+    db_session.commit()
+    expected = ApplicationSchema.model_validate(application).model_dump(mode='json')
+
+    response = client.get('/applications/', headers=get_auth_headers_for_citizen(1))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [expected]
+    assert response.json()[0]['email'] == 'mixed@example.com'
+
+    response = client.get(
+        '/applications/1?fields=email', headers=get_auth_headers_for_citizen(1)
+    )
+    assert response.json() == {'email': 'mixed@example.com'}
+
+
+def test_get_applications_sparse_fields(client, test_application_with_attendee):
+    response = client.get(
+        '/applications/?fields=id,first_name,status',
+        headers=get_auth_headers_for_citizen(1),
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {
+            'id': 1,
+            'first_name': 'Test',
+            'status': ApplicationStatus.ACCEPTED.value,
+        }
+    ]
+
+
+def test_get_application_sparse_fields(
+    client, test_application_with_attendee, test_attendee
+):
+    response = client.get(
+        '/applications/1?fields=email,attendees',
+        headers=get_auth_headers_for_citizen(1),
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert set(data) == {'email', 'attendees'}
+    assert data['email'] == test_application_with_attendee.email
+    assert [a['name'] for a in data['attendees']] == ['Test Attendee']
+
+
+def test_get_applications_unknown_fields(client, test_application_with_attendee):
+    response = client.get(
+        '/applications/?fields=id,password',
+        headers=get_auth_headers_for_citizen(1),
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()['detail'] == 'Unknown fields: password'
+
+
+def test_get_application_sparse_fields_forbidden(
+    client, test_application_with_attendee
+):
+    response = client.get(
+        '/applications/1?fields=id',
+        headers=get_auth_headers_for_citizen(2),
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.fixture
+def many_applications(db_session, test_citizen):
+    """Five applications of the same citizen, two sharing a created_at"""
+    from datetime import datetime
+
+    from app.api.popup_city.models import PopUpCity
+
+    for i in range(1, 6):
+        db_session.add(PopUpCity(id=i, name=f'City {i}', slug=f'city-{i}'))
+        db_session.add(
+            Application(
+                id=i,
+                first_name=f'Test {i}',
+                last_name='User',
+                email=test_citizen.primary_email,
+                citizen_id=test_citizen.id,
+                popup_city_id=i,
+                created_at=datetime(2025, 1, min(i, 4)),
+            )
+        )
+    db_session.commit()
+
+
+def test_get_applications_cursor_pagination(client, many_applications):
+    headers = get_auth_headers_for_citizen(1)
+    ids = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(
+            '/applications/',
+            params={'cursor': cursor, 'limit': 2, 'fields': 'first_name'},
+            headers=headers,
+        )
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert len(page['items']) <= 2
+        ids += [int(item['first_name'].split()[-1]) for item in page['items']]
+        cursor = page['next_cursor']
+
+    # Newest first, ties broken by id
+    assert ids == [5, 4, 3, 2, 1]
+
+
+def test_get_applications_invalid_cursor(client, many_applications):
+    response = client.get(
+        '/applications/',
+        params={'cursor': 'not-a-cursor'},
+        headers=get_auth_headers_for_citizen(1),
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()['detail'] == 'Invalid cursor'
+
+
+def test_get_applications_limits(client, many_applications):
+    headers = get_auth_headers_for_citizen(1)
+    response = client.get('/applications/', params={'limit': 1000}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 5
+
+    response = client.get(
+        '/applications/', params={'cursor': '', 'limit': 0}, headers=headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_find_page_rejects_invalid_limit(db_session):
+    from app.api.applications.crud import application as application_crud
+
+    with pytest.raises(HTTPException) as exc_info:
+        application_crud.find_page(db_session, cursor='', limit=0)
+    assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_attendees_directory_refreshed_on_update(
+    client, db_session, test_attendee_product
+):
+    from app.api.applications.crud import application as application_crud
+
+    application_crud.refresh_attendees_directory(db_session, [1])
+    db_session.commit()
+    headers = get_auth_headers_for_citizen(1)
+
+    response = client.get('/applications/attendees_directory/1', headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data['pagination']['total'] == 1
+    entry = data['items'][0]
+    assert entry['first_name'] == 'Test'
+    assert entry['email'] == 'test1@example.com'
+    assert [p['id'] for p in entry['participation']] == [1]
+
+    response = client.put(
+        '/applications/1',
+        json={'info_not_shared': ['email', 'participation']},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get('/applications/attendees_directory/1', headers=headers)
+    entry = response.json()['items'][0]
+    assert entry['first_name'] == 'Test'
+    assert entry['email'] == '*'
+    assert entry['participation'] == '*'
+
+
+def test_attendees_directory_excludes_applications_without_products(
+    client, db_session, test_attendee
+):
+    from app.api.applications.crud import application as application_crud
+
+    application_crud.refresh_attendees_directory(db_session, [1])
+    db_session.commit()
+
+    response = client.get(
+        '/applications/attendees_directory/1',
+        headers=get_auth_headers_for_citizen(1),
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['items'] == []
+
+
+def test_attendees_directory_search_and_facets(
+    client, db_session, test_attendee_product
+):
+    headers = get_auth_headers_for_citizen(1)
+    response = client.put(
+        '/applications/1',
+        json={'organization': 'Acme Labs', 'brings_kids': True},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    def search(**params):
+        response = client.get(
+            '/applications/attendees_directory/1', params=params, headers=headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()['pagination']['total']
+
+    assert search(q='acme') == 1
+    assert search(q='ACME lab') == 1
+    assert search(q='nobody') == 0
+    assert search(product_id=1, brings_kids=True) == 1
+    assert search(product_id=2) == 0
+
+    response = client.get('/applications/attendees_directory/1/facets', headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        'total': 1,
+        'brings_kids': 1,
+        'products': [{'product_id': 1, 'name': 'Test Product', 'count': 1}],
+    }
+
+    # Hidden fields can neither be searched nor used as facets
+    response = client.put(
+        '/applications/1',
+        json={'info_not_shared': ['organization', 'brings_kids', 'participation']},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert search(q='acme') == 0
+    assert search(q='test') == 1
+    assert search(brings_kids=True) == 0
+    assert search(product_id=1) == 0
+
+
+@pytest.fixture
+def review_queue(db_session, create_test_citizen, test_popup_city):
+    """Five applications of the test popup, four of them effectively in review"""
+    from datetime import datetime
+
+    statuses = ['in review', 'in review', 'accepted', 'in review', 'draft']
+    for i, application_status in enumerate(statuses, start=1):
+        citizen = create_test_citizen(i)
+        db_session.add(
+            Application(
+                id=i,
+                first_name=f'Test {i}',
+                last_name='User',
+                email=citizen.primary_email,
+                citizen_id=citizen.id,
+                popup_city_id=test_popup_city.id,
+                _status=application_status,
+                scholarship_request=i == 2,
+                requested_discount=i in (2, 3),
+                submitted_at=datetime(2025, 1, 10 - i),
+            )
+        )
+    db_session.commit()
+
+
+def test_get_review_queue(client, review_queue, db_session):
+    headers = {'x-api-key': 'test_reviews_api_key'}
+    response = client.get('/applications/review-queue/1', headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    # Application 3 is accepted but still waiting for its discount
+    assert [a['id'] for a in data['items']] == [4, 3, 2, 1]
+    assert data['next_cursor'] is None
+    assert data['counts'] == {'in review': 4, 'draft': 1}
+
+    response = client.get(
+        '/applications/review-queue/1',
+        params={'limit': 2, 'cursor': '', 'fields': 'id,status'},
+        headers=headers,
+    )
+    page = response.json()
+    assert page['items'] == [
+        {'id': 4, 'status': 'in review'},
+        {'id': 3, 'status': 'in review'},
+    ]
+    response = client.get(
+        '/applications/review-queue/1',
+        params={'limit': 2, 'cursor': page['next_cursor'], 'fields': 'id'},
+        headers=headers,
+    )
+    assert response.json()['items'] == [{'id': 2}, {'id': 1}]
+
+    response = client.get(
+        '/applications/review-queue/1',
+        params={'scholarship_request': True},
+        headers=headers,
+    )
+    assert [a['id'] for a in response.json()['items']] == [2]
+
+    application = db_session.get(Application, 3)
+    application.discount_assigned = 10
+    db_session.delete(db_session.get(Application, 5))
+    db_session.commit()
+    response = client.get('/applications/review-queue/1', headers=headers)
+    assert response.json()['counts'] == {'in review': 3, 'accepted': 1}
+
+
+def test_get_review_queue_invalid_api_key(client, review_queue):
+    response = client.get(
+        '/applications/review-queue/1', headers={'x-api-key': 'invalid'}
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.parametrize('limit', [0, -1])
+def test_get_review_queue_invalid_limit(client, review_queue, limit):
+    response = client.get(
+        '/applications/review-queue/1',
+        params={'limit': limit},
+        headers={'x-api-key': 'test_reviews_api_key'},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,83 @@
+import gzip
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from app.api.email_logs.models import EmailLog
+from app.processes import archive_email_logs
+
+
+def _log(created_at, receiver_email='test@example.com'):
+    return EmailLog(
+        receiver_email=receiver_email,
+        event='check-in',
+        template='check-in',
+        params={'first_name': 'Test'},
+        status='success',
+        created_at=created_at,
+    )
+
+
+def test_expired_months_are_archived(db_session, tmp_path):
+    db_session.add_all(
+        [
+            _log(datetime(2024, 1, 10), 'first@example.com'),
+            _log(datetime(2024, 1, 31, 23, 59), 'second@example.com'),
+            _log(datetime(2024, 3, 5)),
+            _log(datetime(2025, 2, 1)),
+        ]
+    )
+    db_session.commit()
+
+    months = archive_email_logs.get_expired_months(db_session, datetime(2024, 4, 1))
+    assert months == [datetime(2024, m, 1) for m in (1, 2, 3)]
+
+    total = archive_email_logs.archive_month(
+        db_session, datetime(2024, 1, 1), str(tmp_path)
+    )
+    assert total == 2
+
+    with gzip.open(tmp_path / 'email_logs_2024_01.jsonl.gz', 'rt') as f:
+        rows = [json.loads(line) for line in f]
+    assert [r['receiver_email'] for r in rows] == [
+        'first@example.com',
+        'second@example.com',
+    ]
+    assert rows[0]['params'] == {'first_name': 'Test'}
+    assert rows[0]['created_at'] == '2024-01-10T00:00:00'
+
+    remaining = db_session.query(EmailLog.created_at).order_by(EmailLog.created_at)
+    assert [r[0] for r in remaining] == [datetime(2024, 3, 5), datetime(2025, 2, 1)]
+
+
+def test_failed_run_is_rewritten_not_appended(db_session, tmp_path):
+    db_session.add_all([_log(datetime(2024, 1, 10)), _log(datetime(2024, 1, 20))])
+    db_session.commit()
+
+    # A run that exported the month but failed before deleting it
+    with patch.object(db_session, 'commit', side_effect=RuntimeError):
+        with pytest.raises(RuntimeError):
+            archive_email_logs.archive_month(
+                db_session, datetime(2024, 1, 1), str(tmp_path)
+            )
+    db_session.rollback()
+    assert db_session.query(EmailLog).count() == 2
+
+    archive_email_logs.archive_month(db_session, datetime(2024, 1, 1), str(tmp_path))
+    with gzip.open(tmp_path / 'email_logs_2024_01.jsonl.gz', 'rt') as f:
+        assert len(f.readlines()) == 2
+    assert [p.name for p in tmp_path.iterdir()] == ['email_logs_2024_01.jsonl.gz']
+
+
+def test_logs_are_kept_without_an_archive_dir(db_session, tmp_path):
+    db_session.add(_log(datetime(2024, 1, 10)))
+    db_session.commit()
+
+    with patch.object(archive_email_logs, 'SessionLocal', return_value=db_session):
+        archive_email_logs.main(archive_dir=None, now=datetime(2026, 1, 1))
+        archive_email_logs.main(
+            archive_dir=str(tmp_path / 'missing'), now=datetime(2026, 1, 1)
+        )
+    assert db_session.query(EmailLog).count() == 1
@@ -1,6 +1,12 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from app.api.attendees.crud import attendee as attendee_crud
+from app.api.attendees.models import Attendee, AttendeeProduct
+from app.api.check_in import schemas
+from app.api.check_in.codes import check_in_codes
 from app.api.check_in.models import CheckIn
+from app.core.qr import create_qr_token, qr_cache
+from app.core.utils import sign
 
 
 def test_qr_check_in_success(client, test_attendee, test_attendee_product, db_session):
@@ -72,6 +78,77 @@ def test_qr_check_in_no_products(client, test_attendee):
     assert response.json()['success'] is False
 
 
+def test_qr_check_in_uses_warmed_codes(
+    client, test_attendee, test_attendee_product, db_session
+):
+    kid = Attendee(
+        application_id=test_attendee.application_id,
+        name='Kid',
+        category='kid',
+        check_in_code='KID123',
+    )
+    db_session.add(kid)
+    db_session.commit()
+
+    entry = check_in_codes.get(db_session, test_attendee.check_in_code)
+    assert (entry.attendee_id, entry.name, entry.has_products) == (
+        test_attendee.id,
+        'Test Attendee',
+        True,
+    )
+    # The whole popup was loaded by the first lookup
+    assert check_in_codes._cached('KID123')[1].has_products is False
+
+    # A code without products is checked again, so a new pass is seen at once
+    db_session.add(AttendeeProduct(attendee_id=kid.id, product_id=1))
+    db_session.commit()
+    response = client.post(
+        '/check-in/qr',
+        json={'code': 'KID123'},
+        headers={'x-api-key': 'test_check_in_api_key'},
+    )
+    assert response.json()['success'] is True
+    assert response.json()['name'] == 'Kid'
+
+    scan_time = response.json()['scan_time']
+    response = client.post(
+        '/check-in/qr',
+        json={'code': 'KID123'},
+        headers={'x-api-key': 'test_check_in_api_key'},
+    )
+    assert response.json()['first_check_in'] is False
+    assert response.json()['scan_time'] == scan_time
+    assert db_session.query(CheckIn).filter_by(attendee_id=kid.id).count() == 1
+
+
+def test_qr_check_in_keeps_virtual_check_in(
+    client, test_attendee, test_attendee_product, db_session
+):
+    db_session.add(
+        CheckIn(
+            code=test_attendee.check_in_code,
+            attendee_id=test_attendee.id,
+            virtual_check_in=True,
+            virtual_check_in_timestamp=datetime(2025, 1, 1),
+            qr_check_in=False,
+        )
+    )
+    db_session.commit()
+
+    response = client.post(
+        '/check-in/qr',
+        json={'code': test_attendee.check_in_code},
+        headers={'x-api-key': 'test_check_in_api_key'},
+    )
+    assert response.json()['first_check_in'] is True
+
+    check_in = db_session.query(CheckIn).one()
+    db_session.refresh(check_in)
+    assert check_in.qr_check_in is True
+    assert check_in.virtual_check_in is True
+    assert check_in.virtual_check_in_timestamp == datetime(2025, 1, 1)
+
+
 def test_virtual_check_in_success(
     client, test_attendee, test_attendee_product, db_session
 ):
@@ -183,3 +260,158 @@ def test_virtual_check_in_invalid_code(client, test_attendee):
 
     assert response.status_code == 200
     assert response.json()['success'] is False
+
+
+def test_qr_image_is_served_with_cache_headers(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(qr_cache, 'directory', str(tmp_path))
+    token = create_qr_token('ABC123')
+
+    response = client.get(f'/check-in/qr/{token}.png')
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'image/png'
+    assert response.content.startswith(b'\x89PNG')
+    assert 'max-age=' in response.headers['cache-control']
+
+    etag = response.headers['etag']
+    response = client.get(f'/check-in/qr/{token}.png', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    response = client.get(f'/check-in/qr/{token}.svg')
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'image/svg+xml'
+
+
+def test_qr_image_rejects_invalid_tokens(client):
+    expired = create_qr_token('ABC123', expires_delta=timedelta(seconds=-1))
+    assert client.get(f'/check-in/qr/{expired}.png').status_code == 404
+    assert client.get('/check-in/qr/not-a-token.png').status_code == 404
+
+
+def test_manifest_lists_valid_codes_and_changes(
+    client, test_attendee, test_attendee_product, db_session
+):
+    attendee_crud.refresh_stay_summary(db_session, [test_attendee.application_id])
+    db_session.commit()
+    headers = {'x-api-key': 'test_check_in_api_key'}
+
+    response = client.get('/check-in/manifest/1', headers=headers)
+    assert response.status_code == 200
+    assert response.headers['X-Signature'] == sign(
+        response.content, 'test_check_in_api_key'
+    )
+    manifest = response.json()
+    assert manifest['fields'][:3] == ['code', 'attendee_id', 'name']
+    assert [c[:3] for c in manifest['codes']] == [
+        ['TEST123', test_attendee.id, 'Test Attendee']
+    ]
+    assert manifest['removed'] == []
+
+    # Nothing changed since then, then the pass is removed
+    db_session.query(Attendee).update({'updated_at': datetime(2025, 1, 1)})
+    db_session.commit()
+    since = manifest['generated_at']
+    response = client.get(
+        '/check-in/manifest/1', params={'since': since}, headers=headers
+    )
+    assert response.json()['codes'] == []
+
+    db_session.delete(test_attendee_product)
+    attendee_crud.refresh_stay_summary(db_session, [test_attendee.application_id])
+    db_session.commit()
+    response = client.get(
+        '/check-in/manifest/1', params={'since': since}, headers=headers
+    )
+    assert response.json()['codes'] == []
+    assert response.json()['removed'] == ['TEST123']
+
+    response = client.get('/check-in/manifest/1', headers={'x-api-key': 'invalid'})
+    assert response.status_code == 403
+
+
+def test_manifest_lists_deleted_attendees(
+    client, test_attendee, test_attendee_product, db_session
+):
+    kid = Attendee(
+        application_id=test_attendee.application_id,
+        name='Kid',
+        category='kid',
+        check_in_code='KID123',
+    )
+    db_session.add(kid)
+    attendee_crud.refresh_stay_summary(db_session, [test_attendee.application_id])
+    db_session.commit()
+    headers = {'x-api-key': 'test_check_in_api_key'}
+    since = client.get('/check-in/manifest/1', headers=headers).json()['generated_at']
+
+    db_session.delete(kid)
+    db_session.commit()
+    response = client.get(
+        '/check-in/manifest/1', params={'since': since}, headers=headers
+    )
+    assert response.json()['removed'] == ['KID123']
+
+
+def test_qr_scans_of_deleted_cached_attendees_fail(
+    client, test_attendee, test_attendee_product, db_session
+):
+    headers = {'x-api-key': 'test_check_in_api_key'}
+    assert check_in_codes.get(db_session, 'TEST123').has_products is True
+    db_session.query(AttendeeProduct).delete()
+    db_session.delete(test_attendee)
+    db_session.commit()
+
+    # The tests' SQLite does not check foreign keys unless asked to
+    db_session.connection().exec_driver_sql('PRAGMA foreign_keys = ON')
+    try:
+        response = client.post(
+            '/check-in/qr', json={'code': 'TEST123'}, headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()['success'] is False
+        assert check_in_codes._cached('TEST123') == (None, None)
+
+        check_in_codes.load(db_session, 1)
+        check_in_codes._popups[1][1]['TEST123'] = schemas.CheckInCode(
+            attendee_id=test_attendee.id, name='Test Attendee', has_products=True
+        )
+        scans = [{'code': 'TEST123', 'scanned_at': '2025-01-01T10:00:00Z'}]
+        response = client.post(
+            '/check-in/qr/batch', json={'scans': scans}, headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()[0]['success'] is False
+    finally:
+        db_session.rollback()
+        db_session.connection().exec_driver_sql('PRAGMA foreign_keys = OFF')
+    assert db_session.query(CheckIn).count() == 0
+
+
+def test_offline_scans_are_applied_idempotently(
+    client, test_attendee, test_attendee_product, db_session
+):
+    scans = [
+        {'code': 'TEST123', 'scanned_at': '2025-01-01T10:05:00Z'},
+        {'code': 'TEST123', 'scanned_at': '2025-01-01T10:00:00Z'},
+        {'code': 'WRONG_CODE', 'scanned_at': '2025-01-01T10:00:00Z'},
+    ]
+    headers = {'x-api-key': 'test_check_in_api_key'}
+    for _ in range(2):
+        response = client.post(
+            '/check-in/qr/batch', json={'scans': scans}, headers=headers
+        )
+        assert response.status_code == 200
+        results = response.json()
+        assert [(r['code'], r['success'], r['first_check_in']) for r in results] == [
+            ('TEST123', True, False),
+            ('TEST123', True, True),
+            ('WRONG_CODE', False, False),
+        ]
+        assert results[0]['scan_time'] == '2025-01-01T10:00:00'
+
+    check_in = db_session.query(CheckIn).one()
+    assert check_in.qr_scan_timestamp == datetime(2025, 1, 1, 10, 0)
+
+    # A later live scan keeps the offline scan time
+    response = client.post('/check-in/qr', json={'code': 'TEST123'}, headers=headers)
+    assert response.json()['first_check_in'] is False
+    assert response.json()['scan_time'] == '2025-01-01T10:00:00'
@@ -0,0 +1,178 @@
+from datetime import timedelta
+
+import pytest
+
+from app.api.attendees.crud import attendee as attendee_crud
+from app.api.attendees.models import Attendee, AttendeeProduct
+from app.api.check_in.models import CheckIn
+from app.api.email_logs.models import EmailLog
+from app.api.popup_city.models import EmailTemplate
+from app.api.popup_city.templates import email_templates
+from app.api.products.models import Product
+from app.core.qr import qr_cache
+from app.core.utils import current_time
+from app.processes import check_in_emails
+
+
+@pytest.fixture
+def check_in_popup(db_session, test_popup_city, monkeypatch, tmp_path):
+    monkeypatch.setattr(qr_cache, 'directory', str(tmp_path))
+    test_popup_city.end_date = current_time() + timedelta(days=30)
+    db_session.add_all(
+        [
+            EmailTemplate(
+                popup_city_id=test_popup_city.id,
+                event='check-in',
+                template='checkin-week1',
+            ),
+            EmailTemplate(
+                popup_city_id=test_popup_city.id,
+                event='check-in-day',
+                template='checkin-day',
+            ),
+        ]
+    )
+    db_session.commit()
+    email_templates.invalidate()
+    return test_popup_city
+
+
+@pytest.fixture
+def day_pass_attendee(db_session, check_in_popup, test_attendee):
+    product = Product(
+        name='Day pass',
+        slug='day-pass',
+        price=10.0,
+        category='day',
+        popup_city_id=check_in_popup.id,
+        start_date=current_time() + timedelta(days=3),
+        end_date=current_time() + timedelta(days=4),
+    )
+    db_session.add(product)
+    db_session.flush()
+    db_session.add(AttendeeProduct(attendee_id=test_attendee.id, product_id=product.id))
+    attendee_crud.refresh_stay_summary(db_session, [test_attendee.application_id])
+    db_session.commit()
+    return test_attendee
+
+
+def _logs(db_session):
+    return [
+        (log.receiver_email, log.event, log.template, log.status)
+        for log in db_session.query(EmailLog).order_by(EmailLog.id)
+    ]
+
+
+def test_logs_of_the_previous_aliases_count_as_sent(
+    db_session, test_popup_city, day_pass_attendee
+):
+    # The templates of docs/schema_changes.md, with a log sent by the old mailing
+    db_session.query(EmailTemplate).delete()
+    aliases = {
+        'check-in': 'checkin-ee25-week1',
+        **{f'check-in-week{n}': f'checkin-ee25-week{n}' for n in range(1, 5)},
+        'check-in-day': 'checkin-ee25-day',
+    }
+    for event, template in aliases.items():
+        db_session.add(
+            EmailTemplate(
+                popup_city_id=test_popup_city.id, event=event, template=template
+            )
+        )
+    application = day_pass_attendee.application
+    db_session.add(
+        EmailLog(
+            receiver_email=application.email,
+            event='checkin-ee25-day',
+            template='checkin-ee25-day',
+            status='success',
+            entity_type='application',
+            entity_id=application.id,
+        )
+    )
+    db_session.commit()
+    email_templates.invalidate()
+
+    templates = check_in_emails.get_check_in_templates(db_session, test_popup_city)
+    assert templates == aliases
+    stats = check_in_emails.process_popup(db_session, test_popup_city)
+    assert stats['check_in_applications'] == 0
+    assert stats['sent'] == 0
+
+
+def test_check_in_popups_are_configured_by_templates(db_session, check_in_popup):
+    assert check_in_emails.get_check_in_popups(db_session) == [check_in_popup]
+
+    check_in_popup.end_date = current_time() - timedelta(days=1)
+    db_session.commit()
+    assert check_in_emails.get_check_in_popups(db_session) == []
+
+
+def test_check_in_emails_are_sent_once(db_session, check_in_popup, day_pass_attendee):
+    application = day_pass_attendee.application
+    stats = check_in_emails.process_popup(db_session, check_in_popup)
+    assert stats['sent'] == 1
+    assert _logs(db_session) == [
+        (application.email, 'check-in-day', 'checkin-day', 'success')
+    ]
+
+    # Already sent, and the stay is too far away for the reminder
+    stats = check_in_emails.process_popup(db_session, check_in_popup)
+    assert stats['sent'] == 0
+    assert len(_logs(db_session)) == 1
+
+
+def test_check_in_reminder_skips_completed_check_ins(
+    db_session, check_in_popup, day_pass_attendee
+):
+    day_pass_attendee.stay_start = current_time() + timedelta(hours=12)
+    db_session.add(
+        CheckIn(
+            code=day_pass_attendee.check_in_code,
+            attendee_id=day_pass_attendee.id,
+            virtual_check_in=True,
+            qr_check_in=False,
+        )
+    )
+    db_session.commit()
+    templates = ['checkin-week1', 'checkin-day']
+
+    check_in_emails.process_popup(db_session, check_in_popup)
+    assert len(_logs(db_session)) == 1
+    assert (
+        check_in_emails.get_applications_for_check_in_reminder(
+            db_session, check_in_popup, templates
+        )
+        == []
+    )
+
+    db_session.query(CheckIn).delete()
+    db_session.commit()
+    assert check_in_emails.get_applications_for_check_in_reminder(
+        db_session, check_in_popup, templates
+    ) == [day_pass_attendee.application]
+
+
+def test_check_in_reminder_is_sent_with_a_spouse(
+    db_session, check_in_popup, day_pass_attendee
+):
+    spouse = Attendee(
+        application_id=day_pass_attendee.application_id,
+        name='Spouse',
+        category='spouse',
+        email='spouse@example.com',
+        check_in_code='SPOUSE1',
+    )
+    db_session.add(spouse)
+    day_pass_attendee.stay_start = current_time() + timedelta(hours=12)
+    db_session.commit()
+
+    # The first mailing goes to both, then the applicant gets the reminder
+    stats = check_in_emails.process_popup(db_session, check_in_popup)
+    assert stats['reminder_applications'] == 1
+    application_email = day_pass_attendee.application.email
+    assert [log[0] for log in _logs(db_session)] == [
+        application_email,
+        'spouse@example.com',
+        application_email,
+    ]
@@ -230,3 +230,56 @@ def test_get_my_poaps_no_poaps(client, test_citizen, test_popup_city, db_session
     # Check that there are no results since no POAPs are available
     assert 'results' in data
     assert len(data['results']) == 0
+
+
+def test_get_my_bootstrap(
+    client, test_citizen, test_application_with_attendee, test_attendee_product
+):
+    headers = get_auth_headers_for_citizen(test_citizen.id)
+
+    response = client.get('/citizens/me/bootstrap', headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data['citizen']['id'] == test_citizen.id
+    assert len(data['popups']) == 1
+    assert len(data['applications']) == 1
+    assert len(data['applications'][0]['attendees']) == 1
+    assert len(data['products']) == 2
+    assert data['payments'] == []
+    assert data['groups'] == []
+
+    etag = response.headers['etag']
+    response = client.get(
+        '/citizens/me/bootstrap', headers={**headers, 'If-None-Match': etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers['etag'] == etag
+
+
+def test_get_my_bootstrap_etag_changes(client, test_citizen, test_popup_city):
+    headers = get_auth_headers_for_citizen(test_citizen.id)
+
+    response = client.get('/citizens/me/bootstrap', headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['applications'] == []
+    etag = response.headers['etag']
+
+    application = {
+        'first_name': 'Test',
+        'last_name': 'User',
+        'citizen_id': test_citizen.id,
+        'popup_city_id': test_popup_city.id,
+    }
+    client.post('/applications/', json=application, headers=headers)
+
+    response = client.get(
+        '/citizens/me/bootstrap', headers={**headers, 'If-None-Match': etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers['etag'] != etag
+    assert len(response.json()['applications']) == 1
+
+
+def test_get_my_bootstrap_unauthorized(client):
+    response = client.get('/citizens/me/bootstrap')
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,212 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.api.email_logs import crud as email_logs_crud
+from app.api.email_logs.crud import EmailLogBatch
+from app.api.email_logs.crud import email_log as email_log_crud
+from app.api.email_logs.models import EmailLog
+from app.api.email_logs.schemas import EmailLogFilter, EmailMessage
+from app.core.utils import current_time
+
+
+def test_batched_logs_are_written_with_citizen_ids(db_session, test_citizen):
+    with EmailLogBatch(db_session, size=2) as log_batch:
+        for receiver_email in [
+            test_citizen.primary_email,
+            'unknown@example.com',
+            test_citizen.primary_email,
+        ]:
+            email_log_crud.send_mail(
+                receiver_email,
+                event='check-in',
+                params={'first_name': 'Test'},
+                log_batch=log_batch,
+            )
+        # The first two were written once the batch was full
+        assert db_session.query(EmailLog).count() == 2
+
+    logs = db_session.query(EmailLog).order_by(EmailLog.id).all()
+    assert [(log.receiver_email, log.citizen_id) for log in logs] == [
+        (test_citizen.primary_email, test_citizen.id),
+        ('unknown@example.com', None),
+        (test_citizen.primary_email, test_citizen.id),
+    ]
+    assert logs[0].status == 'success'
+    assert logs[0].params['first_name'] == 'Test'
+    assert logs[0].created_at is not None
+
+
+def test_logs_are_written_after_each_postmark_batch(db_session):
+    messages = [
+        EmailMessage(receiver_email=f'user{i}@example.com', event='check-in')
+        for i in range(3)
+    ]
+    logged_before_send = []
+
+    def send(prepared):
+        logged_before_send.append(db_session.query(EmailLog).count())
+        return [{'status': 'success'} for _ in prepared]
+
+    with (
+        patch.object(email_logs_crud, 'POSTMARK_BATCH_SIZE', 2),
+        patch.object(email_logs_crud, 'send_mails', side_effect=send),
+        EmailLogBatch(db_session) as log_batch,
+    ):
+        email_log_crud.send_mails(messages, log_batch=log_batch)
+        assert db_session.query(EmailLog).count() == 3
+    assert logged_before_send == [0, 2]
+
+
+def test_failed_log_writes_are_raised_and_kept(db_session):
+    log_batch = EmailLogBatch(db_session, size=1)
+    with (
+        patch.object(db_session, 'execute', side_effect=OperationalError('', {}, None)),
+        patch.object(db_session, 'rollback', wraps=db_session.rollback) as rollback,
+        pytest.raises(OperationalError),
+    ):
+        email_log_crud.send_mail(
+            'user@example.com', event='check-in', log_batch=log_batch
+        )
+    rollback.assert_called_once()
+    assert len(log_batch.logs) == 1
+
+    # Closing the batch writes them once the database is back
+    with log_batch:
+        pass
+    assert log_batch.logs == []
+    assert db_session.query(EmailLog.receiver_email).all() == [('user@example.com',)]
+
+
+def test_logs_are_filtered_by_typed_params(db_session):
+    for params in [{'freq': '1h', 'sent': True, 'count': 2}, {'sent': False}]:
+        db_session.add(
+            EmailLog(
+                receiver_email='user@example.com',
+                event='check-in',
+                template='check-in',
+                params=params,
+                status='success',
+            )
+        )
+    db_session.commit()
+
+    def find(**params):
+        filters = EmailLogFilter(params=params)
+        return [log.params for log in email_log_crud.find(db_session, filters=filters)]
+
+    assert find(sent=True) == [{'freq': '1h', 'sent': True, 'count': 2}]
+    assert find(sent=False) == [{'sent': False}]
+    assert find(count=2, freq='1h') == [{'freq': '1h', 'sent': True, 'count': 2}]
+    assert find(count=3) == []
+    with pytest.raises(ValueError):
+        find(sent=None)
+
+
+API_KEY_HEADERS = {'x-api-key': 'test_email_logs_api_key'}
+
+
+@pytest.fixture
+def email_logs(db_session):
+    now = current_time()
+    logs = [
+        EmailLog(
+            receiver_email=f'user{i}@example.com',
+            event='check-in' if i % 2 else 'auth-citizen-portal',
+            template='check-in' if i % 2 else 'auth-citizen-portal',
+            params={},
+            status='failed' if i == 4 else 'success',
+            entity_type='application',
+            entity_id=i,
+            created_at=now - timedelta(hours=i),
+        )
+        for i in range(5)
+    ]
+    db_session.add_all(logs)
+    db_session.commit()
+    return logs
+
+
+def test_get_email_logs_pages_by_cursor(client, email_logs):
+    response = client.get(
+        '/email-logs/',
+        params={'event': 'check-in', 'limit': 1},
+        headers=API_KEY_HEADERS,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [log['entity_id'] for log in data['items']] == [1]
+
+    response = client.get(
+        '/email-logs/',
+        params={'event': 'check-in', 'limit': 1, 'cursor': data['next_cursor']},
+        headers=API_KEY_HEADERS,
+    )
+    data = response.json()
+    assert [log['entity_id'] for log in data['items']] == [3]
+    assert data['next_cursor'] is None
+
+
+def test_get_email_logs_filters_by_date_range(client, email_logs):
+    response = client.get(
+        '/email-logs/',
+        params={
+            'created_from': (current_time() - timedelta(hours=3.5)).isoformat(),
+            'created_to': (current_time() - timedelta(hours=0.5)).isoformat(),
+            'fields': 'receiver_email',
+        },
+        headers=API_KEY_HEADERS,
+    )
+    assert response.status_code == 200
+    assert response.json()['items'] == [
+        {'receiver_email': f'user{i}@example.com'} for i in (1, 2, 3)
+    ]
+
+
+def test_get_email_logs_redacts_secret_params(client, db_session):
+    db_session.add(
+        EmailLog(
+            receiver_email='user@example.com',
+            event='auth-citizen-portal',
+            template='auth-citizen-portal',
+            params={
+                'code': 123456,
+                'the_url': 'https://example.com/auth?token=secret',
+                'qr_codes': [{'name': 'Test', 'url': 'https://example.com/qr'}],
+                'first_name': 'Test',
+            },
+            status='success',
+        )
+    )
+    db_session.commit()
+
+    response = client.get(
+        '/email-logs/', params={'fields': 'params'}, headers=API_KEY_HEADERS
+    )
+    assert response.json()['items'] == [
+        {
+            'params': {
+                'code': '[redacted]',
+                'the_url': '[redacted]',
+                'qr_codes': '[redacted]',
+                'first_name': 'Test',
+            }
+        }
+    ]
+
+
+def test_get_email_log_stats(client, email_logs):
+    response = client.get('/email-logs/stats', headers=API_KEY_HEADERS)
+    assert response.status_code == 200
+    assert response.json() == [
+        {'event': 'auth-citizen-portal', 'status': 'failed', 'count': 1},
+        {'event': 'auth-citizen-portal', 'status': 'success', 'count': 2},
+        {'event': 'check-in', 'status': 'success', 'count': 2},
+    ]
+
+
+def test_get_email_logs_invalid_api_key(client, email_logs):
+    response = client.get('/email-logs/', headers={'x-api-key': 'invalid'})
+    assert response.status_code == 403
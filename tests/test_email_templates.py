@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+import pytest
+
+from app.api.email_logs.schemas import EmailEvent
+from app.api.popup_city.models import EmailTemplate, PopUpCity
+from app.api.popup_city.templates import (
+    EmailTemplateRegistry,
+    format_frequency,
+    parse_frequencies,
+)
+
+
+@pytest.fixture
+def registry():
+    return EmailTemplateRegistry()
+
+
+@pytest.fixture
+def email_template(db_session, test_popup_city):
+    template = EmailTemplate(
+        popup_city_id=test_popup_city.id,
+        event=EmailEvent.AUTH_CITIZEN_PORTAL.value,
+        template='auth-citizen-portal-v1',
+        frequency='1d, 1h',
+    )
+    db_session.add(template)
+    db_session.commit()
+    return template
+
+
+def test_parse_frequencies():
+    assert parse_frequencies('1w,30m, 2d') == [
+        timedelta(minutes=30),
+        timedelta(days=2),
+        timedelta(weeks=1),
+    ]
+    assert parse_frequencies(None) == []
+    assert parse_frequencies('3 days, 1h, x') == [timedelta(hours=1)]
+
+
+def test_format_frequency():
+    for frequency in ['30m', '90m', '12h', '1d', '2w']:
+        assert format_frequency(parse_frequencies(frequency)[0]) == frequency
+    assert format_frequency(timedelta(days=14)) == '2w'
+
+
+def test_registry_returns_parsed_templates(
+    db_session, registry, email_template, test_popup_city
+):
+    entry = registry.get(db_session, test_popup_city.id, EmailEvent.AUTH_CITIZEN_PORTAL)
+    assert entry.template == 'auth-citizen-portal-v1'
+    assert entry.frequencies == [timedelta(hours=1), timedelta(days=1)]
+
+    with pytest.raises(ValueError):
+        registry.get(db_session, test_popup_city.id, 'unknown-event')
+
+
+def test_registry_reloads_when_templates_change(
+    db_session, registry, email_template, test_popup_city
+):
+    event = EmailEvent.AUTH_CITIZEN_PORTAL
+    registry.get(db_session, test_popup_city.id, event)
+
+    email_template.template = 'auth-citizen-portal-v2'
+    db_session.commit()
+    # The version stamp is only checked once per interval
+    assert registry.get(db_session, test_popup_city.id, event).template == (
+        'auth-citizen-portal-v1'
+    )
+
+    registry.invalidate()
+    assert registry.get(db_session, test_popup_city.id, event).template == (
+        'auth-citizen-portal-v2'
+    )
+
+    db_session.delete(email_template)
+    db_session.commit()
+    registry.invalidate()
+    with pytest.raises(ValueError):
+        registry.get(db_session, test_popup_city.id, event)
+
+
+def test_registry_skips_invalid_frequencies(
+    db_session, registry, email_template, test_popup_city
+):
+    other_popup = PopUpCity(id=2, name='Other City', slug='other-city')
+    db_session.add(other_popup)
+    db_session.add(
+        EmailTemplate(
+            popup_city_id=other_popup.id,
+            event='purchase-reminder',
+            template='purchase-reminder',
+            frequency='3 days, 1w',
+        )
+    )
+    db_session.commit()
+
+    entry = registry.get(db_session, test_popup_city.id, EmailEvent.AUTH_CITIZEN_PORTAL)
+    assert entry.template == 'auth-citizen-portal-v1'
+    entry = registry.get(db_session, other_popup.id, 'purchase-reminder')
+    assert entry.frequencies == [timedelta(weeks=1)]
@@ -194,6 +194,48 @@ def test_get_groups_invalid_sort_field(client, auth_headers):
     assert 'Invalid sort field' in response.json()['detail']
 
 
+def test_get_groups_cursor_pagination(client, auth_headers, test_group, db_session):
+    """Test paging through groups by cursor"""
+    for i in range(2):
+        group = Group(
+            name=f'Group {i}',
+            slug=f'group-{i}',
+            discount_percentage=10.0,
+            popup_city_id=test_group.popup_city_id,
+        )
+        db_session.add(group)
+        db_session.flush()
+        db_session.add(
+            GroupLeader(citizen_id=test_group.leaders[0].id, group_id=group.id)
+        )
+    db_session.commit()
+
+    names = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(
+            '/groups',
+            params={'cursor': cursor, 'limit': 2, 'sort_by': 'name'},
+            headers=auth_headers,
+        )
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert len(page['items']) <= 2
+        names += [group['name'] for group in page['items']]
+        cursor = page['next_cursor']
+
+    assert names == ['Group 0', 'Group 1', 'Test Group']
+
+
+@pytest.mark.parametrize('limit', [0, -1])
+def test_get_groups_invalid_limit(client, auth_headers, test_group, limit):
+    """Test paging with a limit below one"""
+    response = client.get(
+        '/groups', params={'cursor': '', 'limit': limit}, headers=auth_headers
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 @pytest.mark.parametrize('identifier_type', ['id', 'slug'])
 def test_add_new_member_success(
     client, db_session, auth_headers, test_group, identifier_type
@@ -894,3 +936,30 @@ def test_create_members_batch_forbidden(client, create_test_citizen, test_group)
     )
 
     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_leader_can_get_member_application(client, auth_headers, test_group):
+    new_member_data = {
+        'email': 'john.doe@example.com',
+        'first_name': 'John',
+        'last_name': 'Doe',
+    }
+    response = client.post(
+        f'/groups/{test_group.id}/new_member',
+        json=new_member_data,
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    application_id = response.json()['id']
+    member_id = response.json()['citizen_id']
+
+    response = client.get(f'/applications/{application_id}', headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['citizen_id'] == member_id
+
+    outsider_headers = get_auth_headers_for_citizen(member_id + 1)
+    response = client.get(f'/applications/{application_id}', headers=outsider_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    response = client.get('/applications/999', headers=auth_headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
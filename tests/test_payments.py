@@ -1,3 +1,5 @@
+from datetime import datetime
+
 import pytest
 from fastapi import status
 
@@ -209,6 +211,11 @@ def test_get_payment_other_citizen(
     assert response.status_code == status.HTTP_403_FORBIDDEN
 
 
+def test_get_payment_not_found(client, auth_headers):
+    response = client.get('/payments/999', headers=auth_headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 def test_create_payment_two_kids_same_ticket(
     client,
     auth_headers,
@@ -363,6 +370,51 @@ def test_simplefi_webhook_payment_approval(
     assert payment_response.json()['source'] == PaymentSource.SIMPLEFI.value
 
 
+def test_payment_approval_refreshes_stay_summary(
+    client,
+    auth_headers,
+    test_payment_data,
+    test_products,
+    mock_create_payment,
+    mock_simplefi_response,
+    mock_webhook_cache,
+    mock_email_template,
+    db_session,
+):
+    from app.api.applications.models import Application
+    from app.api.attendees.models import Attendee
+
+    product1, product2 = test_products
+    product1.start_date = datetime(2025, 1, 8)
+    product1.end_date = datetime(2025, 1, 15)
+    product2.start_date = datetime(2025, 1, 1)
+    product2.end_date = datetime(2025, 1, 8)
+    product2.category = 'week'
+    application = db_session.get(Application, test_payment_data['application_id'])
+    application.status = ApplicationStatus.ACCEPTED.value
+    db_session.commit()
+
+    attendee_id = test_payment_data['products'][0]['attendee_id']
+    test_payment_data['products'].append(
+        {'product_id': 2, 'attendee_id': attendee_id, 'quantity': 1}
+    )
+    payment = client.post(
+        '/payments/', json=test_payment_data, headers=auth_headers
+    ).json()
+    attendee = db_session.get(Attendee, attendee_id)
+    assert attendee.products_count == 0
+
+    _approve_payment(client, payment, mock_simplefi_response)
+
+    db_session.expire_all()
+    attendee = db_session.get(Attendee, attendee_id)
+    assert attendee.stay_start == datetime(2025, 1, 1)
+    assert attendee.stay_end == datetime(2025, 1, 15)
+    assert attendee.first_product_id == 2
+    assert attendee.pass_category == 'week'
+    assert attendee.products_count == 2
+
+
 def test_simplefi_webhook_payment_expired(
     client,
     auth_headers,
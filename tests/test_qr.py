@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from app.core import qr
+from app.core.qr import QRCache
+
+PNG_SIGNATURE = b'\x89PNG'
+
+
+def test_qr_codes_are_rendered_once(tmp_path):
+    cache = QRCache(directory=str(tmp_path))
+    image = cache.render('{"code": "ABC123"}')
+    assert image.startswith(PNG_SIGNATURE)
+
+    # A new cache, as in a later run, reads it back from disk
+    with patch.object(qr, '_render') as render:
+        assert QRCache(directory=str(tmp_path)).render('{"code": "ABC123"}') == image
+        render.assert_not_called()
+
+    # Other render parameters are a different entry
+    with patch.object(qr, '_render', return_value=b'png') as render:
+        QRCache(directory=str(tmp_path), box_size=5).render('{"code": "ABC123"}')
+        render.assert_called_once()
+
+
+def test_qr_code_misses_are_rendered_in_a_pool(tmp_path):
+    cache = QRCache(directory=str(tmp_path), max_workers=2)
+    data = [f'{{"code": "CODE{i}"}}' for i in range(qr.MIN_POOL_BATCH)]
+    # From a worker thread, as the check-in emails do, without forking it
+    assert qr.POOL_CONTEXT.get_start_method() != 'fork'
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        images = executor.submit(cache.render_many, data).result()
+    assert list(images) == data
+    assert all(image.startswith(PNG_SIGNATURE) for image in images.values())
+    assert images[data[0]] == qr.render_qr(data[0])
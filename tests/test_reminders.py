@@ -0,0 +1,121 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.api.applications.models import Application
+from app.api.applications.schemas import ApplicationStatus
+from app.api.email_logs.models import EmailLog, ReminderSchedule
+from app.api.popup_city.models import EmailTemplate
+from app.core.utils import current_time
+from app.processes import send_reminder_emails
+
+
+@pytest.fixture
+def purchase_reminder(db_session, test_popup_city):
+    test_popup_city.end_date = current_time() + timedelta(days=30)
+    template = EmailTemplate(
+        popup_city_id=test_popup_city.id,
+        event='purchase-reminder',
+        template='purchase-reminder',
+        frequency='1d, 1h',
+    )
+    db_session.add(template)
+    db_session.commit()
+    return template
+
+
+@pytest.fixture
+def accepted_application(db_session, test_citizen, test_popup_city):
+    application = Application(
+        id=1,
+        first_name='Test',
+        last_name='User',
+        email=test_citizen.primary_email,
+        citizen_id=test_citizen.id,
+        popup_city_id=test_popup_city.id,
+        _status=ApplicationStatus.ACCEPTED.value,
+        accepted_at=current_time() - timedelta(minutes=90),
+    )
+    db_session.add(application)
+    db_session.commit()
+    return application
+
+
+def _schedules(db_session):
+    return [
+        (s.application_id, s.remaining_frequencies)
+        for s in db_session.query(ReminderSchedule)
+    ]
+
+
+def test_due_reminder_is_sent_and_advanced(
+    db_session, purchase_reminder, accepted_application
+):
+    with patch.object(send_reminder_emails, '_send_reminder_email') as send:
+        send_reminder_emails.send_reminder_email(db_session, purchase_reminder)
+        send.assert_called_once()
+        assert send.call_args.args[0].id == accepted_application.id
+        assert send.call_args.args[2] == '1h'
+        assert _schedules(db_session) == [(accepted_application.id, '1d')]
+
+        # The next frequency is not due yet
+        send.reset_mock()
+        send_reminder_emails.send_reminder_email(db_session, purchase_reminder)
+        send.assert_not_called()
+
+
+def test_reminder_is_dropped_when_application_stops_qualifying(
+    db_session, purchase_reminder, accepted_application
+):
+    with patch.object(send_reminder_emails, '_send_reminder_email') as send:
+        send_reminder_emails.send_reminder_email(db_session, purchase_reminder)
+        assert send.call_count == 1
+
+        accepted_application.status = ApplicationStatus.WITHDRAWN.value
+        schedule = db_session.query(ReminderSchedule).one()
+        schedule.next_due_at = current_time()
+        db_session.commit()
+
+        send_reminder_emails.send_reminder_email(db_session, purchase_reminder)
+        assert send.call_count == 1
+        assert _schedules(db_session) == []
+
+
+def test_sent_frequencies_are_not_scheduled(
+    db_session, purchase_reminder, accepted_application
+):
+    db_session.add(
+        EmailLog(
+            receiver_email=accepted_application.email,
+            event='purchase-reminder',
+            template='purchase-reminder',
+            params={'freq': '1h', 'first_name': 'Test'},
+            status='success',
+            entity_type='application',
+            entity_id=accepted_application.id,
+        )
+    )
+    db_session.commit()
+
+    used = send_reminder_emails.get_used_frequencies(
+        db_session, [accepted_application.id], 'purchase-reminder'
+    )
+    assert used == {accepted_application.id: {timedelta(hours=1)}}
+
+    with patch.object(send_reminder_emails, '_send_reminder_email') as send:
+        send_reminder_emails.send_reminder_email(db_session, purchase_reminder)
+        send.assert_not_called()
+    assert _schedules(db_session) == [(accepted_application.id, '1d')]
+
+
+def test_invalid_frequencies_are_skipped(
+    db_session, purchase_reminder, accepted_application
+):
+    purchase_reminder.frequency = '3 days, 1d'
+    db_session.commit()
+
+    with patch.object(send_reminder_emails, '_send_reminder_email') as send:
+        send_reminder_emails.send_reminder_email(db_session, purchase_reminder)
+        send.assert_not_called()
+    assert _schedules(db_session) == [(accepted_application.id, '1d')]